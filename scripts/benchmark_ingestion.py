@@ -0,0 +1,105 @@
+"""
+Compara o tempo de load_and_validate_file com a leitura anterior (tipos
+inferidos pelo pandas e convertidos depois) no arquivo de exemplo e em
+arquivos sintéticos maiores, gerados repetindo as linhas do exemplo.
+
+Uso: python scripts/benchmark_ingestion.py [linhas_sinteticas ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from hanami.services import ingestion
+
+SAMPLE = Path("data/raw/vendas_ficticias_10000_linhas.csv")
+
+SYNTHETIC_ROWS = [int(rows) for rows in sys.argv[1:]] or [100_000, 1_000_000]
+
+# Execuções por leitor; vale o menor tempo
+REPEAT = 3
+
+
+def inferred_load(path: Path) -> pd.DataFrame:
+    """
+    Caminho anterior: pd.read_csv sem tipos e conversões sem formato.
+    """
+    df = pd.read_csv(path)
+    ingestion._check_required_columns(df.columns)
+
+    for column in ingestion.NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["data_venda"] = pd.to_datetime(df["data_venda"], errors="coerce")
+    for column in ("canal_venda", "forma_pagamento"):
+        df[column] = df[column].astype(str).str.strip().str.lower()
+
+    ingestion._raise_semantic_errors(ingestion._semantic_errors(df))
+
+    return df.dropna(subset=ingestion.CRITICAL_COLUMNS)
+
+
+def typed_pandas_load(path: Path) -> pd.DataFrame:
+    """
+    Esquema declarado, sem o leitor do pyarrow (como sem o extra columnar).
+    """
+    reader = ingestion.pa_csv
+    ingestion.pa_csv = None
+    try:
+        return ingestion.load_and_validate_file(path)
+    finally:
+        ingestion.pa_csv = reader
+
+
+LOADERS = {"anterior": inferred_load, "tipado (pandas)": typed_pandas_load}
+
+if ingestion.pa_csv is not None:
+    LOADERS["tipado (pyarrow)"] = ingestion.load_and_validate_file
+
+
+def synthetic_file(rows: int, directory: Path) -> Path:
+    sample = pd.read_csv(SAMPLE)
+    copies = -(-rows // len(sample))
+
+    df = pd.concat([sample] * copies, ignore_index=True).iloc[:rows]
+    df["id_transacao"] = [f"S{index:09d}" for index in range(rows)]
+
+    path = directory / f"sintetico_{rows}_linhas.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def best_time(loader, path: Path) -> tuple[float, int]:
+    times = []
+
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        rows = len(loader(path))
+        times.append(time.perf_counter() - started)
+
+    return min(times), rows
+
+
+if not SAMPLE.exists():
+    sys.exit(
+        f"Arquivo de exemplo não encontrado: {SAMPLE} "
+        "(gere-o com python scripts/generate_sales.py)"
+    )
+
+with tempfile.TemporaryDirectory() as directory:
+    files = [SAMPLE] + [synthetic_file(rows, Path(directory)) for rows in SYNTHETIC_ROWS]
+
+    print(f"{'arquivo':<36} {'leitor':<18} {'linhas':>10} {'segundos':>9} {'linhas/s':>11} {'ganho':>6}")
+
+    for path in files:
+        baseline = None
+
+        for name, loader in LOADERS.items():
+            seconds, rows = best_time(loader, path)
+            baseline = baseline or seconds
+
+            print(
+                f"{path.name:<36} {name:<18} {rows:>10} {seconds:>9.3f} "
+                f"{rows / seconds:>11,.0f} {baseline / seconds:>5.1f}x"
+            )
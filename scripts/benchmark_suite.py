@@ -0,0 +1,248 @@
+"""
+Mede a API de ponta a ponta em vários tamanhos de dados: gera vendas com
+generate_sales.py, envia o arquivo por /upload/ e cronometra os endpoints
+de /reports, /analytics/trends e /data/search. Cada tamanho roda em um
+processo e diretório próprios, com um banco novo.
+
+O resultado é salvo em JSON; com --comparar, as medianas são comparadas
+com as de uma execução anterior.
+
+Uso: python scripts/benchmark_suite.py [--linhas 10000 100000 ...]
+                                       [--repeticoes N] [--saida ARQUIVO]
+                                       [--comparar ANTERIOR.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from generate_sales import DEFAULT_SEED, write_sales
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 5
+
+RESULTS_DIR = Path("data/processed/benchmarks")
+
+# Espera máxima pela conclusão do job de ingestão
+UPLOAD_TIMEOUT_SECONDS = 3600
+
+ENDPOINTS = [
+    "/reports/sales-summary",
+    "/reports/sales-summary?start_date=2024-01-01&end_date=2024-06-30",
+    "/reports/product-analysis",
+    "/reports/financial-metrics",
+    "/reports/regional-performance",
+    "/reports/regional-performance?estado=SP",
+    "/reports/customer-profile",
+    "/reports/dashboard",
+    "/reports/download?format=json",
+    "/reports/download?format=pdf",
+    "/analytics/trends?freq=D",
+    "/analytics/trends?freq=M",
+    "/analytics/trends?freq=W&estado=SP&media_movel=4",
+    "/data/search",
+    "/data/search?estado=SP&produto=Notebook",
+    "/data/search?start_date=2024-11-01&end_date=2024-11-30&min_valor=1000&limit=500",
+    "/data/search?categoria=Informática&incluir_total=true",
+]
+
+
+def _milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def measure(data_file: Path, repeat: int) -> dict:
+    """
+    Executado no processo de cada tamanho, com o diretório de trabalho
+    (e portanto data/ e o banco) vazio.
+    """
+    from fastapi.testclient import TestClient
+
+    from hanami.main import app
+    from hanami.services.jobs import FINISHED_STATUSES
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        with data_file.open("rb") as content:
+            job = client.post(
+                "/upload/", files={"file": (data_file.name, content, "text/csv")}
+            ).json()
+
+        deadline = started + UPLOAD_TIMEOUT_SECONDS
+        while job.get("status") not in FINISHED_STATUSES and time.perf_counter() < deadline:
+            time.sleep(0.05)
+            job = client.get(f"/upload/jobs/{job['job_id']}").json()
+
+        upload_seconds = time.perf_counter() - started
+
+        ingestion = {
+            "status": job.get("status"),
+            "linhas_inseridas": job.get("linhas_inseridas"),
+            "segundos": round(upload_seconds, 3),
+            "linhas_por_segundo": round((job.get("linhas_inseridas") or 0) / upload_seconds),
+        }
+
+        endpoints = {}
+        for url in ENDPOINTS:
+            times = []
+            for _ in range(repeat + 1):
+                request_started = time.perf_counter()
+                response = client.get(url)
+                times.append(time.perf_counter() - request_started)
+
+            # A primeira chamada inclui caches frios; as demais formam a mediana
+            endpoints[url] = {
+                "status": response.status_code,
+                "bytes": len(response.content),
+                "primeira_ms": _milliseconds(times[0]),
+                "mediana_ms": _milliseconds(statistics.median(times[1:])),
+                "min_ms": _milliseconds(min(times[1:])),
+                "max_ms": _milliseconds(max(times[1:])),
+            }
+
+    return {"ingestao": ingestion, "endpoints": endpoints}
+
+
+def run_size(rows: int, seed: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="hanami-bench-") as directory:
+        directory = Path(directory)
+
+        started = time.perf_counter()
+        data_file = write_sales(directory / f"vendas_{rows}.csv", rows, seed)
+        generation_seconds = time.perf_counter() - started
+
+        result_file = directory / "resultado.json"
+        process = subprocess.run(
+            [
+                sys.executable,
+                str(Path(__file__).resolve()),
+                "--medir", str(data_file),
+                "--resultado", str(result_file),
+                "--repeticoes", str(repeat),
+            ],
+            cwd=directory,
+            # Nunca usa o banco configurado no ambiente
+            env={**os.environ, "HANAMI_DB_PATH": str(directory / "hanami.db")},
+            capture_output=True,
+            text=True,
+        )
+
+        if process.returncode != 0:
+            sys.stderr.write(process.stderr)
+            sys.exit(f"Falha ao medir {rows} linhas")
+
+        result = json.loads(result_file.read_text(encoding="utf-8"))
+
+        return {
+            "linhas": rows,
+            "arquivo_bytes": data_file.stat().st_size,
+            "geracao_segundos": round(generation_seconds, 3),
+            **result,
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_size(result: dict) -> None:
+    ingestion = result["ingestao"]
+    print(
+        f"\n# {result['linhas']} linhas | ingestão {ingestion['status']} em "
+        f"{ingestion['segundos']:.2f}s ({ingestion['linhas_por_segundo']:,} linhas/s)"
+    )
+    print(f"{'endpoint':<82} {'status':>6} {'1ª ms':>9} {'mediana':>9}")
+
+    for url, timing in result["endpoints"].items():
+        print(
+            f"{url:<82} {timing['status']:>6} "
+            f"{timing['primeira_ms']:>9.1f} {timing['mediana_ms']:>9.1f}"
+        )
+
+
+def compare(previous: dict, current: dict) -> None:
+    """
+    Razão anterior/atual das medianas (> 1 significa mais rápido agora).
+    """
+    previous_sizes = {size["linhas"]: size for size in previous["tamanhos"]}
+
+    for size in current["tamanhos"]:
+        before = previous_sizes.get(size["linhas"])
+        if before is None:
+            continue
+
+        print(f"\n# Comparação em {size['linhas']} linhas (anterior / atual)")
+        print(
+            f"{'ingestão':<82} "
+            f"{before['ingestao']['segundos'] / size['ingestao']['segundos']:>6.2f}x"
+        )
+
+        for url, timing in size["endpoints"].items():
+            old = before["endpoints"].get(url)
+            if old is None or not timing["mediana_ms"]:
+                continue
+            print(f"{url:<82} {old['mediana_ms'] / timing['mediana_ms']:>6.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta da API.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeticoes", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--semente", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultado")
+    parser.add_argument("--comparar", type=Path, help="Resultado anterior para comparação")
+    # Uso interno: medição de um tamanho no processo filho
+    parser.add_argument("--medir", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.repeticoes < 1:
+        parser.error("repeticoes deve ser maior que zero")
+
+    if args.medir:
+        result = measure(args.medir, args.repeticoes)
+        args.resultado.write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    started_at = datetime.now(timezone.utc)
+    report = {
+        "gerado_em": started_at.isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "semente": args.semente,
+        "repeticoes": args.repeticoes,
+        "tamanhos": [],
+    }
+
+    for rows in args.linhas:
+        result = run_size(rows, args.semente, args.repeticoes)
+        report["tamanhos"].append(result)
+        print_size(result)
+
+    output = args.saida or RESULTS_DIR / f"benchmark_{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado salvo em {output}")
+
+    if args.comparar:
+        compare(json.loads(args.comparar.read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compara as agregações executadas no banco (SalesRepository) com as
+funções de referência em pandas (services/analytics.py).
+"""
+import math
+
+from hanami.db.connection import engine
+from hanami.db.repository import SalesRepository
+from hanami.services.analytics import (
+    calculate_financial_metrics,
+    calculate_product_analysis,
+    calculate_sales_metrics,
+    demographic_distribution,
+    metrics_by_region,
+    metrics_by_state,
+    sales_trends,
+)
+
+
+def same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=0.011)
+    return a == b
+
+
+def compare_records(name: str, expected: list[dict], actual: list[dict]) -> bool:
+    ok = len(expected) == len(actual) and all(
+        set(e) == set(a) and all(same(e[k], a[k]) for k in e)
+        for e, a in zip(expected, actual)
+    )
+    print(f"{'OK ' if ok else 'DIVERGENTE'} {name}")
+    return ok
+
+
+repo = SalesRepository(engine)
+
+
+def check(df) -> list[bool]:
+    results = []
+
+    results.append(compare_records(
+        "sales_summary",
+        [calculate_sales_metrics(df)],
+        [repo.sales_summary()],
+    ))
+
+    results.append(compare_records(
+        "financial_summary",
+        [calculate_financial_metrics(df)],
+        [repo.financial_summary()],
+    ))
+
+    results.append(compare_records(
+        "product_summary",
+        calculate_product_analysis(df),
+        repo.product_summary(),
+    ))
+
+    results.append(compare_records(
+        "metrics_by_group(regiao)",
+        metrics_by_region(df).to_dict(orient="records"),
+        repo.metrics_by_group("regiao").to_dict(orient="records"),
+    ))
+
+    results.append(compare_records(
+        "metrics_by_group(estado_cliente)",
+        metrics_by_state(df).to_dict(orient="records"),
+        repo.metrics_by_group("estado_cliente").to_dict(orient="records"),
+    ))
+
+    expected_profile = demographic_distribution(df)
+    actual_profile = repo.customer_distribution()
+    results.append(compare_records(
+        "customer_distribution.total_clientes",
+        [{"total": expected_profile["total_clientes"]}],
+        [{"total": actual_profile["total_clientes"]}],
+    ))
+    for key in ("por_genero", "por_faixa_etaria", "por_cidade", "por_estado", "por_regiao"):
+        results.append(compare_records(
+            f"customer_distribution.{key}",
+            expected_profile[key].sort_values("valor").to_dict(orient="records"),
+            actual_profile[key].sort_values("valor").to_dict(orient="records"),
+        ))
+
+    for freq in ("D", "W", "M", "Q", "Y"):
+        results.append(compare_records(
+            f"trends({freq})",
+            sales_trends(df, freq=freq),
+            repo.trends(freq=freq),
+        ))
+
+    return results
+
+
+for label, compact in (("padrão", False), ("compacto", True)):
+    print(f"\n# Frame {label}")
+    results = check(repo.fetch_dataframe(compact=compact))
+    print(f"\n{sum(results)}/{len(results)} agregações equivalentes")
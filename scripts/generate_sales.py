@@ -0,0 +1,287 @@
+"""
+Gera um CSV determinístico de vendas fictícias com as colunas esperadas
+pela ingestão e pelas análises. A mesma semente e o mesmo número de linhas
+produzem sempre o mesmo arquivo.
+
+O arquivo é escrito em blocos, então tamanhos grandes (dezenas de milhões
+de linhas) não precisam caber em memória.
+
+Uso: python scripts/generate_sales.py [linhas] [--semente N] [--saida ARQUIVO]
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROWS = 10_000
+DEFAULT_SEED = 42
+
+# Linhas geradas e escritas por vez; fixo para que a saída não dependa dele
+BLOCK_ROWS = 1_000_000
+
+# Período coberto pelas vendas
+START_DATE = "2023-01-01"
+END_DATE = "2024-12-31"
+
+# UF: (região, cidades, peso relativo de clientes)
+STATES = {
+    "SP": ("Sudeste", ["São Paulo", "Campinas", "Santos", "Ribeirão Preto"], 22),
+    "RJ": ("Sudeste", ["Rio de Janeiro", "Niterói", "Petrópolis"], 8),
+    "MG": ("Sudeste", ["Belo Horizonte", "Uberlândia", "Juiz de Fora"], 10),
+    "ES": ("Sudeste", ["Vitória", "Vila Velha"], 2),
+    "PR": ("Sul", ["Curitiba", "Londrina", "Maringá"], 6),
+    "SC": ("Sul", ["Florianópolis", "Joinville", "Blumenau"], 4),
+    "RS": ("Sul", ["Porto Alegre", "Caxias do Sul", "Pelotas"], 5),
+    "BA": ("Nordeste", ["Salvador", "Feira de Santana"], 7),
+    "PE": ("Nordeste", ["Recife", "Olinda", "Caruaru"], 4),
+    "CE": ("Nordeste", ["Fortaleza", "Juazeiro do Norte"], 4),
+    "MA": ("Nordeste", ["São Luís"], 3),
+    "PB": ("Nordeste", ["João Pessoa", "Campina Grande"], 2),
+    "RN": ("Nordeste", ["Natal"], 2),
+    "AL": ("Nordeste", ["Maceió"], 2),
+    "PI": ("Nordeste", ["Teresina"], 2),
+    "SE": ("Nordeste", ["Aracaju"], 1),
+    "GO": ("Centro-Oeste", ["Goiânia", "Anápolis"], 3),
+    "DF": ("Centro-Oeste", ["Brasília"], 2),
+    "MT": ("Centro-Oeste", ["Cuiabá"], 2),
+    "MS": ("Centro-Oeste", ["Campo Grande"], 1),
+    "PA": ("Norte", ["Belém", "Santarém"], 4),
+    "AM": ("Norte", ["Manaus"], 2),
+    "RO": ("Norte", ["Porto Velho"], 1),
+    "TO": ("Norte", ["Palmas"], 1),
+    "AC": ("Norte", ["Rio Branco"], 1),
+    "AP": ("Norte", ["Macapá"], 1),
+    "RR": ("Norte", ["Boa Vista"], 1),
+}
+
+# Produto: (categoria, preço unitário de referência, peso nas vendas)
+PRODUCTS = {
+    "Notebook Dell Inspiron": ("Eletrônicos", 4200.00, 5),
+    "Notebook Lenovo IdeaPad": ("Eletrônicos", 3600.00, 5),
+    "Smartphone Samsung Galaxy": ("Eletrônicos", 2300.00, 9),
+    "Smartphone Motorola Moto G": ("Eletrônicos", 1400.00, 9),
+    "Tablet Samsung Galaxy Tab": ("Eletrônicos", 1800.00, 4),
+    "Smart TV LG 50": ("Eletrônicos", 2700.00, 4),
+    "Monitor LG 27": ("Informática", 1300.00, 5),
+    "Mouse Logitech": ("Informática", 120.00, 12),
+    "Teclado Mecânico Redragon": ("Informática", 280.00, 8),
+    "Headset HyperX": ("Informática", 450.00, 6),
+    "SSD Kingston 1TB": ("Informática", 420.00, 6),
+    "Geladeira Brastemp": ("Eletrodomésticos", 3900.00, 2),
+    "Micro-ondas Electrolux": ("Eletrodomésticos", 650.00, 4),
+    "Air Fryer Philco": ("Eletrodomésticos", 380.00, 8),
+    "Cafeteira Nespresso": ("Eletrodomésticos", 550.00, 4),
+    "Cadeira Gamer ThunderX3": ("Móveis", 1100.00, 3),
+    "Mesa de Escritório": ("Móveis", 750.00, 3),
+    "Fone JBL Bluetooth": ("Acessórios", 300.00, 10),
+    "Carregador Portátil Anker": ("Acessórios", 200.00, 8),
+    "Smartwatch Xiaomi": ("Acessórios", 500.00, 6),
+}
+
+# Fração do subtotal que corresponde ao custo, por categoria
+COST_RATIOS = {
+    "Eletrônicos": (0.70, 0.85),
+    "Informática": (0.55, 0.75),
+    "Eletrodomésticos": (0.65, 0.80),
+    "Móveis": (0.45, 0.65),
+    "Acessórios": (0.35, 0.55),
+}
+
+SALES_CHANNELS = {
+    "Online": 35,
+    "Loja Física": 25,
+    "Marketplace": 20,
+    "App Mobile": 15,
+    "Telefone": 5,
+}
+
+PAYMENT_METHODS = {
+    "Cartão Crédito": 45,
+    "Pix": 30,
+    "Cartão Débito": 15,
+    "Boleto": 10,
+}
+
+DELIVERY_STATUSES = {
+    "Entregue": 82,
+    "Em trânsito": 9,
+    "Pendente": 5,
+    "Cancelado": 4,
+}
+
+DISCOUNTS = {0: 45, 5: 20, 10: 15, 15: 10, 20: 6, 25: 3, 30: 1}
+
+COLUMNS = [
+    "id_transacao",
+    "data_venda",
+    "cliente_id",
+    "idade_cliente",
+    "genero_cliente",
+    "cidade_cliente",
+    "estado_cliente",
+    "regiao",
+    "nome_produto",
+    "categoria",
+    "quantidade",
+    "subtotal",
+    "desconto_percent",
+    "valor_final",
+    "custo_produto",
+    "margem_lucro",
+    "canal_venda",
+    "forma_pagamento",
+    "status_entrega",
+]
+
+
+def _weights(weights) -> np.ndarray:
+    weights = np.asarray(list(weights), dtype="float64")
+    return weights / weights.sum()
+
+
+def _sale_days() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Dias do período e a probabilidade de cada um: mais vendas em novembro
+    e dezembro e nos fins de semana, com crescimento ao longo do período.
+    """
+    days = pd.date_range(START_DATE, END_DATE, freq="D")
+
+    weights = np.ones(len(days))
+    weights[days.month == 11] *= 1.6
+    weights[days.month == 12] *= 1.8
+    weights[days.dayofweek >= 5] *= 1.25
+    weights *= np.linspace(1.0, 1.3, len(days))
+
+    return days.strftime("%Y-%m-%d").to_numpy(), _weights(weights)
+
+
+def _clients(rng: np.random.Generator, count: int) -> dict[str, np.ndarray]:
+    """
+    Atributos fixos de cada cliente, para que as vendas de um mesmo
+    cliente tenham idade, gênero e endereço consistentes.
+    """
+    states = np.array(list(STATES))
+    state_index = rng.choice(len(states), size=count, p=_weights(v[2] for v in STATES.values()))
+
+    cities = np.empty(count, dtype=object)
+    for index, (_, state_cities, _) in enumerate(STATES.values()):
+        selected = state_index == index
+        cities[selected] = np.array(state_cities, dtype=object)[
+            rng.integers(0, len(state_cities), size=selected.sum())
+        ]
+
+    return {
+        "idade_cliente": np.clip(rng.normal(38, 12, size=count).round(), 18, 80).astype("int64"),
+        "genero_cliente": rng.choice(np.array(["F", "M"]), size=count, p=[0.51, 0.49]),
+        "cidade_cliente": cities,
+        "estado_cliente": states[state_index],
+        "regiao": np.array([v[0] for v in STATES.values()])[state_index],
+    }
+
+
+def generate_sales(rows: int, seed: int = DEFAULT_SEED) -> Iterator[pd.DataFrame]:
+    """
+    Gera as vendas em blocos de até BLOCK_ROWS linhas.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Em média quatro compras por cliente
+    client_count = max(1, rows // 4)
+    clients = _clients(rng, client_count)
+
+    days, day_weights = _sale_days()
+
+    products = np.array(list(PRODUCTS))
+    categories = np.array([v[0] for v in PRODUCTS.values()])
+    prices = np.array([v[1] for v in PRODUCTS.values()])
+    product_weights = _weights(v[2] for v in PRODUCTS.values())
+    cost_low = np.array([COST_RATIOS[c][0] for c in categories])
+    cost_high = np.array([COST_RATIOS[c][1] for c in categories])
+
+    discounts = np.array(list(DISCOUNTS))
+
+    for offset in range(0, rows, BLOCK_ROWS):
+        size = min(BLOCK_ROWS, rows - offset)
+
+        client = rng.integers(0, client_count, size=size)
+        product = rng.choice(len(products), size=size, p=product_weights)
+
+        # Itens baratos saem em quantidades maiores
+        quantity = 1 + rng.poisson(np.where(prices[product] < 500, 1.0, 0.15))
+        unit_price = prices[product] * rng.uniform(0.9, 1.1, size=size)
+        subtotal = np.round(unit_price * quantity, 2)
+
+        discount = rng.choice(discounts, size=size, p=_weights(DISCOUNTS.values()))
+        final_value = np.round(subtotal * (1 - discount / 100), 2)
+        cost = np.round(
+            subtotal * rng.uniform(cost_low[product], cost_high[product]), 2
+        )
+
+        block = {
+            "id_transacao": [f"TRX{number:010d}" for number in range(offset + 1, offset + size + 1)],
+            "data_venda": rng.choice(days, size=size, p=day_weights),
+            "cliente_id": client + 1,
+        }
+        block.update({column: values[client] for column, values in clients.items()})
+        block.update({
+            "nome_produto": products[product],
+            "categoria": categories[product],
+            "quantidade": quantity,
+            "subtotal": subtotal,
+            "desconto_percent": discount,
+            "valor_final": final_value,
+            "custo_produto": cost,
+            "margem_lucro": np.round(final_value - cost, 2),
+            "canal_venda": rng.choice(
+                np.array(list(SALES_CHANNELS)), size=size, p=_weights(SALES_CHANNELS.values())
+            ),
+            "forma_pagamento": rng.choice(
+                np.array(list(PAYMENT_METHODS)), size=size, p=_weights(PAYMENT_METHODS.values())
+            ),
+            "status_entrega": rng.choice(
+                np.array(list(DELIVERY_STATUSES)), size=size, p=_weights(DELIVERY_STATUSES.values())
+            ),
+        })
+
+        yield pd.DataFrame(block, columns=COLUMNS)
+
+
+def write_sales(path: Path, rows: int, seed: int = DEFAULT_SEED) -> Path:
+    """
+    Escreve as vendas geradas em um CSV, bloco a bloco.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with path.open("w", encoding="utf-8", newline="") as output:
+        for index, block in enumerate(generate_sales(rows, seed)):
+            block.to_csv(output, index=False, header=index == 0, float_format="%.2f")
+
+    return path
+
+
+def default_path(rows: int) -> Path:
+    return Path(f"data/raw/vendas_ficticias_{rows}_linhas.csv")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera vendas fictícias em CSV.")
+    parser.add_argument("linhas", type=int, nargs="?", default=DEFAULT_ROWS)
+    parser.add_argument("--semente", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--saida",
+        type=Path,
+        help="Arquivo de saída (padrão: data/raw/vendas_ficticias_<linhas>_linhas.csv)",
+    )
+    args = parser.parse_args()
+
+    if args.linhas < 1:
+        parser.error("linhas deve ser maior que zero")
+
+    started = time.perf_counter()
+    path = write_sales(args.saida or default_path(args.linhas), args.linhas, args.semente)
+
+    print(f"{args.linhas} linhas escritas em {path} ({time.perf_counter() - started:.1f}s)")
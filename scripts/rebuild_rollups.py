@@ -0,0 +1,12 @@
+"""
+Regenera o rollup diário (sales_rollup_daily) a partir da tabela sales.
+
+Útil após alterações de schema ou correções manuais na base.
+"""
+from hanami.db.connection import engine
+from hanami.db.repository import SalesRepository
+
+repo = SalesRepository(engine)
+version = repo.rebuild_rollups()
+
+print(f"Rollup diário regenerado a partir de sales (versão do dataset: {version})")
@@ -1,29 +1,82 @@
-from fastapi import APIRouter, Query, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, HTTPException
+from hanami.api.caching import conditional_get
 from hanami.db.connection import engine
 from hanami.db.repository import SalesRepository
-from hanami.services.analytics import sales_trends
+from hanami.db.rollups import Frequency
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 @router.get(
     "/trends",
+    dependencies=[Depends(conditional_get)],
     summary="Análise de tendências temporais",
-    description="Retorna a evolução das vendas ao longo do tempo."
+    description=(
+        "Retorna a evolução das vendas ao longo do tempo, com filtros "
+        "opcionais de período e de uma dimensão (região, estado, produto ou "
+        "canal) e médias móveis."
+    )
 )
 def trends(
-    freq: str = Query(
+    freq: Frequency = Query(
         default="M",
-        description="Frequência temporal: D (dia), M (mês), Y (ano)",
-        enum=["D", "M", "Y"]
-    )
+        description="Frequência temporal: D (dia), W (semana), M (mês), Q (trimestre), Y (ano)",
+    ),
+    start_date: date | None = Query(None, description="Data inicial (YYYY-MM-DD)"),
+    end_date: date | None = Query(None, description="Data final (YYYY-MM-DD)"),
+    regiao: str | None = Query(None, example="Sudeste"),
+    estado: str | None = Query(None, example="SP"),
+    produto: str | None = Query(None, description="Nome exato do produto", example="Notebook"),
+    canal: str | None = Query(
+        None,
+        description="Canal de venda (maiúsculas e minúsculas são equivalentes)",
+        example="online",
+    ),
+    media_movel: int | None = Query(
+        None,
+        ge=2,
+        le=366,
+        description="Inclui médias móveis de receita e transações sobre esse número de períodos",
+    ),
 ):
+    if canal is not None:
+        # A ingestão grava canal_venda em minúsculas
+        canal = canal.strip().lower()
+
+    dimension_filters = {
+        "regiao": regiao,
+        "estado_cliente": estado,
+        "nome_produto": produto,
+        "canal_venda": canal,
+    }
+    selected = {
+        dimension: value
+        for dimension, value in dimension_filters.items()
+        if value is not None
+    }
+
+    if len(selected) > 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Informe no máximo um filtro entre regiao, estado, produto e canal"
+        )
+
+    dimension, value = next(iter(selected.items()), ("total", None))
+
     repo = SalesRepository(engine)
-    df = repo.fetch_dataframe()
 
-    if df.empty:
+    if not repo.has_sales():
         raise HTTPException(status_code=404, detail="Nenhum dado disponível")
 
     try:
-        return sales_trends(df, freq=freq)
+        return repo.trends(
+            freq=freq,
+            start_date=start_date,
+            end_date=end_date,
+            dimension=dimension,
+            value=value,
+            window=media_movel,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from fastapi import HTTPException, Request, Response
+
+from hanami.core.config import settings
+from hanami.core.metrics import CacheCounter
+from hanami.core.versioning import dataset_versions
+from hanami.db.connection import engine
+
+# Requisições condicionais respondidas com 304 (hits) ou calculadas (misses)
+conditional_requests = CacheCounter()
+
+
+def dataset_etag(request: Request, version: int) -> str:
+    """
+    ETag derivado da versão do dataset, do caminho, dos parâmetros e do
+    cabeçalho Accept (que pode escolher o formato da resposta).
+
+    A ordem dos parâmetros na URL não altera o ETag.
+    """
+    params = sorted(request.query_params.multi_items())
+    accept = request.headers.get("accept", "")
+    digest = hashlib.sha256(
+        json.dumps([request.url.path, params, accept]).encode("utf-8")
+    ).hexdigest()[:20]
+
+    return f'"v{version}-{digest}"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        # Proxies podem guardar a resposta, mas revalidam com o ETag
+        "Cache-Control": (
+            f"public, max-age={settings.http_cache_max_age}, must-revalidate"
+        ),
+        "Vary": "Accept",
+    }
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # Comparação fraca, como pede a RFC 9110 para If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+    return etag in candidates
+
+
+def conditional_get(request: Request, response: Response) -> None:
+    """
+    Dependência para GETs cujo resultado só muda com a versão do dataset.
+
+    Se o If-None-Match do cliente corresponder ao ETag atual, responde
+    304 sem executar o endpoint (e sem consultar o banco enquanto a versão
+    em memória for válida). Caso contrário, adiciona ETag e Cache-Control
+    à resposta.
+    """
+    etag = dataset_etag(request, dataset_versions.get(engine))
+
+    if etag_matches(request, etag):
+        conditional_requests.hit()
+        raise HTTPException(status_code=304, headers=cache_headers(etag))
+
+    conditional_requests.miss()
+
+    # A resposta será calculada agora: o ETag usa a versão lida do banco,
+    # nunca mais nova que os dados que o endpoint vai ler
+    etag = dataset_etag(request, dataset_versions.refresh(engine))
+    response.headers.update(cache_headers(etag))
@@ -1,17 +1,51 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from datetime import date
+import pandas as pd
 from hanami.db.connection import engine
 from hanami.db.repository import SalesRepository
-from hanami.services.search import build_search_filters
+from hanami.db.schema import SALES_COLUMNS
+from hanami.api.caching import conditional_get
+from hanami.services.formats import (
+    ARROW_FORMATS,
+    MEDIA_TYPES,
+    STREAM_FORMATS,
+    encode_frames,
+    iter_gzip,
+    negotiate_format,
+    sql_schema,
+)
+from hanami.services.search import build_search_filters, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/data", tags=["Data"])
 
+# Colunas de SELECT * FROM sales
+SEARCH_COLUMN_TYPES = {"id": "INTEGER", **SALES_COLUMNS}
+
+
+def _rows_frame(rows) -> pd.DataFrame:
+    # Monta o bloco direto das tuplas do cursor, sem um dict por linha
+    columns = list(rows[0].keys()) if rows else list(SEARCH_COLUMN_TYPES)
+    return pd.DataFrame.from_records(
+        [tuple(row.values()) for row in rows],
+        columns=columns,
+    )
+
+
 @router.get(
     "/search",
+    dependencies=[Depends(conditional_get)],
     summary="Busca genérica de vendas",
-    description="Permite buscar vendas com múltiplos filtros opcionais."
+    description=(
+        "Permite buscar vendas com múltiplos filtros opcionais. "
+        "Os resultados vêm da venda mais recente para a mais antiga; use o "
+        "next_cursor da resposta no parâmetro cursor para obter a próxima página. "
+        "Com format (ou Accept) csv, ndjson, arrow ou parquet, as linhas vêm nesse "
+        "formato e o próximo cursor no cabeçalho X-Next-Cursor."
+    )
 )
 def search_data(
+    http_response: Response,
     estado: str | None = Query(None, example="SP"),
     cidade: str | None = Query(None, example="São Paulo"),
     produto: str | None = Query(None, example="Notebook"),
@@ -20,8 +54,26 @@ def search_data(
     end_date: date | None = Query(None, example="2023-12-31"),
     min_valor: float | None = Query(None, example=1000),
     max_valor: float | None = Query(None, example=5000),
-    limit: int = Query(100, le=500),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(
+        None,
+        description="Cursor opaco (next_cursor) da página anterior",
+    ),
+    incluir_total: bool = Query(
+        False,
+        description="Inclui a contagem exata de resultados (consulta adicional)",
+    ),
+    format: str | None = Query(
+        None,
+        description="json, csv, ndjson, arrow ou parquet (padrão: cabeçalho Accept ou json)",
+    ),
+    accept: str | None = Header(None, include_in_schema=False),
 ):
+    try:
+        format = negotiate_format(format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     repo = SalesRepository(engine)
 
     filters = build_search_filters(
@@ -35,12 +87,127 @@ def search_data(
         max_valor,
     )
 
-    results = repo.search(filters, limit=limit)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Uma linha extra indica se existe próxima página
+    results = repo.search(filters, limit=limit + 1, after=after)
 
-    if not results:
+    if not results and after is None:
         raise HTTPException(status_code=404, detail="Nenhum resultado encontrado")
 
-    return {
-        "total": len(results),
-        "items": results
+    items = results[:limit]
+    next_cursor = None
+
+    if len(results) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["data_venda"], last["id"])
+
+    if format != "json":
+        # ETag e Cache-Control definidos por conditional_get
+        headers = dict(http_response.headers)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        if incluir_total:
+            headers["X-Total-Count"] = str(repo.count_search(filters))
+
+        frame = _rows_frame(items)
+        schema = (
+            sql_schema(frame.columns, SEARCH_COLUMN_TYPES)
+            if format in ARROW_FORMATS
+            else None
+        )
+
+        return StreamingResponse(
+            encode_frames([frame], format, schema),
+            media_type=MEDIA_TYPES[format],
+            headers=headers,
+        )
+
+    response = {
+        "total": len(items),
+        "items": items,
+        "next_cursor": next_cursor,
     }
+
+    if incluir_total:
+        response["total_resultados"] = repo.count_search(filters)
+
+    return response
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(conditional_get)],
+    summary="Exportação de vendas",
+    description=(
+        "Exporta todas as vendas que atendem aos filtros (os mesmos de "
+        "/data/search), sem limite de linhas. O resultado é lido do banco e "
+        "enviado em blocos, com uso de memória constante. Formato padrão CSV; "
+        "com gzip=true o arquivo é comprimido durante o envio."
+    )
+)
+def export_data(
+    http_response: Response,
+    estado: str | None = Query(None, example="SP"),
+    cidade: str | None = Query(None, example="São Paulo"),
+    produto: str | None = Query(None, example="Notebook"),
+    categoria: str | None = Query(None, example="Eletrônicos"),
+    start_date: date | None = Query(None, example="2023-01-01"),
+    end_date: date | None = Query(None, example="2023-12-31"),
+    min_valor: float | None = Query(None, example=1000),
+    max_valor: float | None = Query(None, example=5000),
+    format: str | None = Query(
+        None,
+        description="csv, ndjson, arrow ou parquet (padrão: cabeçalho Accept ou csv)",
+    ),
+    gzip: bool = Query(False, description="Comprime o arquivo em gzip"),
+    accept: str | None = Header(None, include_in_schema=False),
+):
+    try:
+        format = negotiate_format(format, accept, default="csv")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido para exportação. Use {', '.join(STREAM_FORMATS)}.",
+        )
+
+    filters = build_search_filters(
+        estado,
+        cidade,
+        produto,
+        categoria,
+        start_date,
+        end_date,
+        min_valor,
+        max_valor,
+    )
+
+    repo = SalesRepository(engine)
+
+    schema = (
+        sql_schema(list(SEARCH_COLUMN_TYPES), SEARCH_COLUMN_TYPES)
+        if format in ARROW_FORMATS
+        else None
+    )
+    body = encode_frames(repo.iter_search(filters), format, schema)
+    media_type = MEDIA_TYPES[format]
+    filename = f"vendas.{format}"
+
+    if gzip:
+        body = iter_gzip(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    # ETag e Cache-Control definidos por conditional_get
+    headers = dict(http_response.headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -0,0 +1,141 @@
+import time
+
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from hanami.api.caching import conditional_requests
+from hanami.core.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricFamily,
+    registry,
+    render_prometheus,
+    request_duration,
+    request_stages,
+    server_timing,
+    timed,
+)
+from hanami.core.storage import dataframe_cache
+from hanami.core.versioning import dataset_versions
+from hanami.services.rendering import report_cache
+
+router = APIRouter(tags=["Metrics"])
+
+# Caches expostos em /metrics; todos contam hits e misses
+CACHES = {
+    "dataframe": dataframe_cache,
+    "relatorio": report_cache,
+    "versao_dataset": dataset_versions,
+    "http_etag": conditional_requests,
+}
+
+# Rótulo de rota das requisições que não casaram com nenhum endpoint
+UNMATCHED_ROUTE = "nao_encontrada"
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse que registra a serialização do corpo como etapa.
+    """
+
+    def render(self, content) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
+
+
+class TimingMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP.
+
+    A duração total (até o último byte, inclusive em streaming) alimenta o
+    histograma por método, rota e status. Com `server_timing`, a resposta
+    leva o cabeçalho Server-Timing com as etapas registradas até o início
+    do envio (sql, fetch_dataframe, serialization, render...).
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        with request_stages() as stages:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+
+                    if self.server_timing:
+                        MutableHeaders(scope=message).append(
+                            "Server-Timing",
+                            server_timing(stages, time.perf_counter() - started),
+                        )
+
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # O template da rota (ex: /upload/jobs/{job_id}) mantém
+                # a cardinalidade dos rótulos baixa
+                route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+                request_duration.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=route,
+                    status=status,
+                )
+
+
+def _cache_families() -> list[MetricFamily]:
+    hits = [("hanami_cache_hits_total", {"cache": name}, cache.hits) for name, cache in CACHES.items()]
+    misses = [("hanami_cache_misses_total", {"cache": name}, cache.misses) for name, cache in CACHES.items()]
+    ratios = [
+        (
+            "hanami_cache_hit_ratio",
+            {"cache": name},
+            cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0,
+        )
+        for name, cache in CACHES.items()
+    ]
+
+    return [
+        MetricFamily("hanami_cache_hits_total", "counter", "Acertos de cache", hits),
+        MetricFamily("hanami_cache_misses_total", "counter", "Falhas de cache", misses),
+        MetricFamily(
+            "hanami_cache_hit_ratio", "gauge", "Fração de acertos desde o início do processo", ratios
+        ),
+        MetricFamily(
+            "hanami_dataframe_cache_bytes",
+            "gauge",
+            "Memória ocupada pelo cache de DataFrames",
+            [("hanami_dataframe_cache_bytes", {}, dataframe_cache.size)],
+        ),
+    ]
+
+
+@router.get(
+    "/metrics",
+    summary="Métricas no formato Prometheus",
+    description=(
+        "Histogramas de latência por rota e por etapa interna (SQL, pandas, "
+        "serialização, renderização, ingestão), linhas processadas e taxas "
+        "de acerto dos caches, no formato texto do Prometheus."
+    ),
+    response_class=Response,
+)
+def metrics():
+    return Response(
+        content=render_prometheus(registry.collect() + _cache_families()),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
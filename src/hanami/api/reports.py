@@ -1,23 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from loguru import logger
 from pathlib import Path
 from hanami.db.connection import engine
 from hanami.db.repository import SalesRepository
-from hanami.services.analytics import calculate_sales_metrics, calculate_product_analysis, calculate_financial_metrics, metrics_by_region, metrics_by_state, demographic_distribution
-from fastapi.responses import FileResponse
+from hanami.db.rollups import Frequency
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi import Query
 from typing import Optional
 from datetime import date
-import pandas as pd
-import json
-
-import matplotlib
-matplotlib.use("Agg")
-
-import matplotlib.pyplot as plt
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, Image
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
 
 from typing import Literal
 from hanami.models.reports import (
@@ -26,15 +17,48 @@ from hanami.models.reports import (
     FinancialMetricsResponse,
     RegionalPerformanceResponse,
     CustomerProfileResponse,
+    DashboardResponse,
 )
+from hanami.services.reports import REPORT_SECTIONS, build_report
+from hanami.services.reports import customer_profile as build_customer_profile
+from hanami.services.rendering import (
+    REPORT_MEDIA_TYPES,
+    ReportRequiredError,
+    render_service,
+    report_cache,
+)
+from hanami.api.caching import cache_headers, conditional_get, dataset_etag, etag_matches
+from hanami.core.versioning import dataset_versions
+from hanami.services.formats import MEDIA_TYPES, encode_frames, negotiate_format
+import pandas as pd
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
-REPORTS_DIR = Path("data/processed/reports")
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+FORMAT_DESCRIPTION = "json, csv, ndjson, arrow ou parquet (padrão: cabeçalho Accept ou json)"
+
+
+def _response_format(format: Optional[str], accept: Optional[str]) -> str:
+    try:
+        return negotiate_format(format, accept)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _tabular_response(
+    frame: pd.DataFrame,
+    format: str,
+    http_response: Response,
+) -> StreamingResponse:
+    # Mantém o ETag e o Cache-Control definidos por conditional_get
+    return StreamingResponse(
+        encode_frames([frame], format),
+        media_type=MEDIA_TYPES[format],
+        headers=dict(http_response.headers),
+    )
 
 @router.get(
     "/sales-summary",
+    dependencies=[Depends(conditional_get)],
     summary="Resumo de vendas",
     description="Retorna métricas agregadas de vendas, com filtro opcional por período."
 )
@@ -50,31 +74,23 @@ def get_sales_summary(
 ):
     try:
         repo = SalesRepository(engine)
-        df = repo.fetch_dataframe()
 
-        if df.empty:
+        if not repo.has_sales():
             raise HTTPException(
                 status_code=404,
                 detail="Nenhum dado de vendas disponível"
             )
 
-        # 🔹 Conversão explícita (essencial)
-        df["data_venda"] = pd.to_datetime(df["data_venda"])
-
-        # 🔹 Aplicação dos filtros
-        if start_date:
-            df = df[df["data_venda"] >= pd.Timestamp(start_date)]
-
-        if end_date:
-            df = df[df["data_venda"] <= pd.Timestamp(end_date)]
+        # 🔹 Agregação com filtro de período executada no banco
+        summary = repo.sales_summary(start_date, end_date)
 
-        if df.empty:
+        if summary["numero_transacoes"] == 0:
             raise HTTPException(
                 status_code=404,
                 detail="Nenhuma venda encontrada no período informado"
             )
 
-        return calculate_sales_metrics(df)
+        return summary
 
     except HTTPException:
         raise
@@ -88,27 +104,35 @@ def get_sales_summary(
 
 @router.get(
     "/product-analysis",
+    dependencies=[Depends(conditional_get)],
     response_model=list[ProductAnalysisItem],
     summary="Análise de vendas por produto",
-    description="Retorna métricas agregadas por produto com opção de ordenação."
+    description=(
+        "Retorna métricas agregadas por produto com opção de ordenação. "
+        "Aceita format (ou Accept) csv, ndjson, arrow ou parquet."
+    )
 )
 def product_analysis(
+    http_response: Response,
     sort_by: str | None = Query(
         default=None,
         description="Campo para ordenação: quantidade_vendida ou total_arrecadado"
-    )
+    ),
+    format: Optional[str] = Query(default=None, description=FORMAT_DESCRIPTION),
+    accept: Optional[str] = Header(default=None, include_in_schema=False),
 ):
+    format = _response_format(format, accept)
+
     try:
         repo = SalesRepository(engine)
-        df = repo.fetch_dataframe()
 
-        if df.empty:
+        if not repo.has_sales():
             raise HTTPException(
                 status_code=404,
                 detail="Nenhum dado de vendas disponível"
             )
 
-        products = calculate_product_analysis(df)
+        products = repo.product_summary()
 
         if sort_by:
             if sort_by not in {"quantidade_vendida", "total_arrecadado"}:
@@ -122,6 +146,16 @@ def product_analysis(
                 reverse=True
             )
 
+        if format != "json":
+            return _tabular_response(
+                pd.DataFrame(
+                    products,
+                    columns=["nome_produto", "quantidade_vendida", "total_arrecadado"],
+                ),
+                format,
+                http_response,
+            )
+
         return products
 
     except HTTPException:
@@ -136,6 +170,7 @@ def product_analysis(
 
 @router.get(
     "/financial-metrics",
+    dependencies=[Depends(conditional_get)],
     response_model=FinancialMetricsResponse,
     summary="Métricas financeiras",
     description="Retorna receita líquida, custo total e lucro bruto."
@@ -143,15 +178,14 @@ def product_analysis(
 def financial_metrics():
     try:
         repo = SalesRepository(engine)
-        df = repo.fetch_dataframe()
 
-        if df.empty:
+        if not repo.has_sales():
             raise HTTPException(
                 status_code=404,
                 detail="Nenhum dado de vendas disponível"
             )
 
-        metrics = calculate_financial_metrics(df)
+        metrics = repo.financial_summary()
 
         return metrics
 
@@ -168,37 +202,44 @@ def financial_metrics():
 
 @router.get(
     "/regional-performance",
+    dependencies=[Depends(conditional_get)],
     summary="Performance regional",
     description=(
         "Retorna métricas agregadas por região. "
-        "Se o parâmetro estado for informado, retorna métricas apenas para aquele estado."
+        "Se o parâmetro estado for informado, retorna métricas apenas para aquele estado. "
+        "Aceita format (ou Accept) csv, ndjson, arrow ou parquet, com uma linha por grupo."
     )
 )
 def regional_performance(
+    http_response: Response,
     estado: Optional[str] = Query(
         default=None,
         description="Filtra os dados por estado (ex: SP, RJ, MG)"
-    )
+    ),
+    format: Optional[str] = Query(default=None, description=FORMAT_DESCRIPTION),
+    accept: Optional[str] = Header(default=None, include_in_schema=False),
 ):
+    format = _response_format(format, accept)
+
     repo = SalesRepository(engine)
-    df = repo.fetch_dataframe()
 
-    if df.empty:
+    if not repo.has_sales():
         raise HTTPException(
             status_code=404,
             detail="Nenhum dado disponível"
         )
 
     if estado:
-        df = df[df["estado_cliente"] == estado]
+        state_df = repo.metrics_by_group("estado_cliente", value=estado)
 
-        if df.empty:
+        if state_df.empty:
             raise HTTPException(
                 status_code=404,
                 detail=f"Nenhum dado encontrado para o estado {estado}"
             )
 
-        state_df = metrics_by_state(df)
+        if format != "json":
+            return _tabular_response(state_df.round(2), format, http_response)
 
         return (
             state_df
@@ -208,7 +249,10 @@ def regional_performance(
         )
 
     # fallback: visão regional completa
-    regional_df = metrics_by_region(df)
+    regional_df = repo.metrics_by_group("regiao")
+
+    if format != "json":
+        return _tabular_response(regional_df.round(2), format, http_response)
 
     return (
         regional_df
@@ -220,6 +264,7 @@ def regional_performance(
 
 @router.get(
     "/customer-profile",
+    dependencies=[Depends(conditional_get)],
     response_model=CustomerProfileResponse,
     summary="Perfil demográfico dos clientes",
     description="Retorna distribuições demográficas dos clientes como gênero, faixa etária, cidade, estado e região."
@@ -227,26 +272,14 @@ def regional_performance(
 def customer_profile():
     try:
         repo = SalesRepository(engine)
-        df = repo.fetch_dataframe()
 
-        if df.empty:
+        if not repo.has_sales():
             raise HTTPException(
                 status_code=404,
                 detail="Nenhum dado disponível"
             )
 
-        profile = demographic_distribution(df)
-
-        result = {
-            "total_clientes": profile["total_clientes"],
-            "genero": profile["por_genero"].to_dict(orient="records"),
-            "faixa_etaria": profile["por_faixa_etaria"].to_dict(orient="records"),
-            "cidade": profile["por_cidade"].to_dict(orient="records"),
-            "estado": profile["por_estado"].to_dict(orient="records"),
-            "regiao": profile["por_regiao"].to_dict(orient="records"),
-        }
-
-        return result
+        return build_customer_profile(repo)
 
     except HTTPException:
         raise
@@ -257,97 +290,204 @@ def customer_profile():
             detail="Erro ao gerar perfil de clientes"
         )
 
+@router.get(
+    "/dashboard",
+    dependencies=[Depends(conditional_get)],
+    response_model=DashboardResponse,
+    response_model_exclude_none=True,
+    summary="Painel consolidado",
+    description=(
+        "Retorna em uma única chamada as seções de relatório pedidas em "
+        "`secoes` (padrão: todas). As seções baseadas em agregados são "
+        "calculadas a partir de uma única leitura dos dados."
+    )
+)
+def dashboard(
+    secoes: list[str] = Query(
+        default=list(REPORT_SECTIONS),
+        description=f"Seções do painel: {', '.join(REPORT_SECTIONS)}"
+    ),
+    start_date: Optional[date] = Query(
+        default=None,
+        description="Data inicial no formato YYYY-MM-DD (não se aplica a clientes)"
+    ),
+    end_date: Optional[date] = Query(
+        default=None,
+        description="Data final no formato YYYY-MM-DD (não se aplica a clientes)"
+    ),
+    freq: Frequency = Query(
+        default="M",
+        description=(
+            "Frequência da seção tendencias: D (dia), W (semana), M (mês), "
+            "Q (trimestre), Y (ano)"
+        )
+    ),
+):
+    try:
+        repo = SalesRepository(engine)
+
+        if not repo.has_sales():
+            raise HTTPException(
+                status_code=404,
+                detail="Nenhum dado de vendas disponível"
+            )
+
+        # Aceita tanto ?secoes=a&secoes=b quanto ?secoes=a,b
+        sections = [
+            section.strip()
+            for item in secoes
+            for section in item.split(",")
+            if section.strip()
+        ]
+
+        return build_report(repo, sections, start_date, end_date, freq)
+
+    except HTTPException:
+        raise
+
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    except Exception:
+        logger.exception("Erro ao gerar painel")
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao gerar painel"
+        )
+
 @router.get(
     "/download",
     summary="Download de relatório",
-    description="Gera e salva em disco um relatório consolidado em JSON ou PDF."
+    description=(
+        "Gera um relatório consolidado em JSON ou PDF. A renderização roda em "
+        "um pool de processos; com modo=job a resposta é imediata (202) e traz "
+        "um job_id para consulta em /reports/jobs/{job_id}."
+    )
 )
-def download_report(
-    format: str = Query(..., description="Formato do relatório: json ou pdf")
+async def download_report(
+    request: Request,
+    format: str = Query(..., description="Formato do relatório: json ou pdf"),
+    modo: Literal["direto", "job"] = Query(
+        default="direto",
+        description="direto: aguarda e retorna o arquivo; job: retorna um job_id"
+    ),
 ):
-    repo = SalesRepository(engine)
-    df = repo.fetch_dataframe()
+    if format not in REPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail="Formato inválido. Use json ou pdf."
+        )
+
+    if modo == "direto":
+        current = await run_in_threadpool(dataset_versions.get, engine)
+        etag = dataset_etag(request, current)
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=cache_headers(etag))
 
-    if df.empty:
+    repo = await run_in_threadpool(SalesRepository, engine)
+
+    has_sales, version = await run_in_threadpool(
+        lambda: (repo.has_sales(), repo.dataset_version())
+    )
+
+    if not has_sales:
         raise HTTPException(
             status_code=404,
             detail="Nenhum dado disponível para gerar relatório"
         )
 
-    sales = calculate_sales_metrics(df)
-    financial = calculate_financial_metrics(df)
-    regional = metrics_by_region(df)
+    # Enquanto a versão do dataset não muda, o arquivo é servido do cache
+    key = report_cache.key(version, report="download", format=format)
+    report = None
 
-    report = {
-        "vendas": sales,
-        "financeiro": financial,
-        "regional": regional.round(2).to_dict(orient="records"),
-    }
+    # Todas as seções em uma única leitura do rollup
+    sections = ["vendas", "financeiro", "regional"]
 
-    # -------- JSON --------
-    if format == "json":
-        file_path = REPORTS_DIR / "report.json"
+    # Só verifica: o acerto ou a falha é contado uma vez, em render_service
+    if not report_cache.exists(key, f".{format}"):
+        report = await run_in_threadpool(build_report, repo, sections)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+    if modo == "job":
+        try:
+            job = render_service.submit_job(key, format, report)
+        except ReportRequiredError:
+            # Artefato removido do cache desde a verificação acima
+            report = await run_in_threadpool(build_report, repo, sections)
+            job = render_service.submit_job(key, format, report)
 
-        return FileResponse(
-            path=file_path,
-            media_type="application/json",
-            filename="report.json"
+        return JSONResponse(status_code=202, content=_render_job_payload(job))
+
+    try:
+        try:
+            file_path = await render_service.render(key, format, report)
+        except ReportRequiredError:
+            report = await run_in_threadpool(build_report, repo, sections)
+            file_path = await render_service.render(key, format, report)
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao gerar relatório"
         )
 
-    # -------- PDF --------
-    if format == "pdf":
-        file_path = REPORTS_DIR / "report.pdf"
+    return FileResponse(
+        path=file_path,
+        media_type=REPORT_MEDIA_TYPES[format],
+        filename=f"report.{format}",
+        headers=cache_headers(dataset_etag(request, version)),
+    )
 
-        doc = SimpleDocTemplate(str(file_path), pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
 
-        elements.append(
-            Paragraph("Relatório Analítico - Hanami API", styles["Title"])
-        )
+def _render_job_payload(job: dict) -> dict:
+    payload = {key: value for key, value in job.items() if key != "arquivo"}
 
-        # ----- TABELA -----
-        table_data = [
-            ["Região", "Receita Total", "Unidades Vendidas", "Ticket Médio"]
-        ]
+    if job["arquivo"] is not None:
+        payload["url"] = f"/reports/jobs/{job['job_id']}/arquivo"
 
-        for _, row in regional.iterrows():
-            table_data.append([
-                row["regiao"],
-                f"{row['receita_total']:.2f}",
-                int(row["unidades_vendidas"]),
-                f"{row['ticket_medio']:.2f}",
-            ])
+    return payload
 
-        elements.append(Table(table_data))
 
-        # ----- GRÁFICO -----
-        plt.figure()
-        plt.bar(regional["regiao"], regional["receita_total"])
-        plt.title("Receita por Região")
-        plt.tight_layout()
+@router.get(
+    "/jobs/{job_id}",
+    summary="Status de uma renderização",
+    description="Retorna o status de um relatório pedido com modo=job."
+)
+def render_job_status(job_id: str):
+    job = render_service.get_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    return _render_job_payload(job)
+
 
-        chart_path = REPORTS_DIR / "receita_por_regiao.png"
-        plt.savefig(chart_path)
-        plt.close()
+@router.get(
+    "/jobs/{job_id}/arquivo",
+    summary="Arquivo de uma renderização",
+    description="Retorna o relatório gerado por um job concluído."
+)
+def render_job_file(job_id: str):
+    job = render_service.get_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
 
-        elements.append(
-            Image(str(chart_path), width=400, height=250)
+    if job["arquivo"] is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Relatório ainda não disponível (status: {job['status']})"
         )
 
-        doc.build(elements)
+    file_path = Path(job["arquivo"])
 
-        return FileResponse(
-            path=file_path,
-            media_type="application/pdf",
-            filename="report.pdf"
+    if not file_path.exists():
+        raise HTTPException(
+            status_code=410,
+            detail="Relatório removido do cache; solicite novamente"
         )
 
-    # -------- ERRO --------
-    raise HTTPException(
-        status_code=400,
-        detail="Formato inválido. Use json ou pdf."
+    return FileResponse(
+        path=file_path,
+        media_type=REPORT_MEDIA_TYPES[job["formato"]],
+        filename=f"report.{job['formato']}"
     )
@@ -3,9 +3,11 @@ from .upload import router as upload_router
 from .reports import router as reports_router
 from .analytics import router as analytics_router
 from .data import router as data_router
+from .metrics import router as metrics_router
 
 router = APIRouter()
 router.include_router(upload_router)
 router.include_router(reports_router)
 router.include_router(analytics_router)
-router.include_router(data_router)
\ No newline at end of file
+router.include_router(data_router)
+router.include_router(metrics_router)
\ No newline at end of file
@@ -1,27 +1,154 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
+from typing import BinaryIO, Literal, Optional
 from loguru import logger
+import hashlib
+import shutil
 import uuid
+import zipfile
 
-from hanami.services.ingestion import load_and_validate_file, InvalidDataError
+from hanami.core.config import settings
 from hanami.db.connection import engine
 from hanami.db.repository import SalesRepository
+from hanami.models.schemas import UploadBatchResponse, UploadJobResponse
+from hanami.services.jobs import ingestion_jobs
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
 RAW_DIR = Path("data/raw")
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
+# Tamanho dos blocos lidos do upload ao copiar para o disco
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Modos de `duplicados` e os correspondentes do repositório
+DUPLICATE_MODES = {"ignorar": "ignore", "substituir": "replace"}
+
+# Extensões extraídas de arquivos ZIP enviados em lote
+DATA_EXTENSIONS = {".csv", ".xlsx", ".xls"}
+
+
+class ZipLimitError(ValueError):
+    """ZIP excede os limites de entradas ou de tamanho descompactado."""
+    pass
+
+
+def _save_upload(source: BinaryIO, file_path: Path) -> str:
+    """
+    Salva o upload em disco sem carregá-lo inteiro em memória e retorna o
+    SHA-256 do conteúdo, que identifica reenvios do mesmo arquivo.
+
+    Leitura, hash e escrita são bloqueantes: chamar via run_in_threadpool.
+    """
+    digest = hashlib.sha256()
+
+    with file_path.open("wb") as output:
+        while chunk := source.read(COPY_BUFFER_SIZE):
+            digest.update(chunk)
+            output.write(chunk)
+
+    return digest.hexdigest()
+
+
+def _data_members(archive: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """
+    Entradas de dados do ZIP, depois de conferir os limites de entradas e
+    de bytes descompactados declarados no diretório central.
+    """
+    members = archive.infolist()
+
+    if len(members) > settings.zip_max_entries:
+        raise ZipLimitError(
+            f"ZIP com {len(members)} entradas (máximo: {settings.zip_max_entries})"
+        )
+
+    data_members = [
+        member
+        for member in members
+        if not member.is_dir()
+        and not Path(member.filename).name.startswith(".")
+        and Path(member.filename).suffix.lower() in DATA_EXTENSIONS
+    ]
+
+    total_size = sum(member.file_size for member in data_members)
+    if total_size > settings.zip_max_uncompressed_bytes:
+        raise ZipLimitError(
+            f"ZIP com {total_size} bytes descompactados "
+            f"(máximo: {settings.zip_max_uncompressed_bytes})"
+        )
+
+    return data_members
+
+
+def _extract_zip(archive_path: Path) -> list[tuple[Path, str, str]]:
+    """
+    Extrai para RAW_DIR os arquivos de dados do ZIP, retornando
+    (caminho, nome, hash) de cada um. Demais entradas são ignoradas.
+
+    A cópia de cada entrada para ao passar do tamanho declarado no ZIP,
+    que já foi conferido contra os limites (ver _data_members).
+    """
+    extracted = []
+
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in _data_members(archive):
+                # Apenas o nome: caminhos do ZIP nunca saem de RAW_DIR
+                name = Path(member.filename).name
+                file_path = RAW_DIR / f"{uuid.uuid4().hex}_{name}"
+                digest = hashlib.sha256()
+                written = 0
+
+                # Registrado antes da cópia para ser removido se ela falhar
+                extracted.append((file_path, name, None))
+
+                with archive.open(member) as source, file_path.open("wb") as output:
+                    while chunk := source.read(COPY_BUFFER_SIZE):
+                        written += len(chunk)
+                        if written > member.file_size:
+                            raise ZipLimitError(
+                                f"Entrada {name} maior que o tamanho declarado no ZIP"
+                            )
+
+                        digest.update(chunk)
+                        output.write(chunk)
+
+                extracted[-1] = (file_path, name, digest.hexdigest())
+    except BaseException:
+        _discard(extracted)
+        raise
+
+    return extracted
+
+
+def _discard(saved: list[tuple[Path, str, Optional[str]]]) -> None:
+    for file_path, _, _ in saved:
+        file_path.unlink(missing_ok=True)
+
 
 @router.post(
     "/",
+    status_code=202,
+    response_model=UploadJobResponse,
     summary="Upload de arquivo de vendas",
-    description="Recebe um arquivo CSV ou XLSX, valida os dados e persiste no banco."
+    description=(
+        "Recebe um arquivo CSV ou XLSX e agenda sua validação e persistência "
+        "em segundo plano. Acompanhe o processamento em /upload/jobs/{job_id}. "
+        "Reenviar um arquivo idêntico não insere nada (status \"duplicado\"); "
+        "transações com id_transacao já existente são ignoradas ou substituem "
+        "as anteriores, conforme `duplicados`."
+    ),
 )
-async def upload_file(file: UploadFile = File(None)):
+async def upload_file(
+    file: UploadFile = File(None),
+    duplicados: Literal["ignorar", "substituir"] = Query(
+        "ignorar",
+        description="O que fazer com transações cujo id_transacao já existe",
+    ),
+):
     """
-    Recebe um arquivo CSV ou XLSX, valida os dados
-    e persiste o conteúdo no banco de dados.
+    Salva o arquivo em disco e retorna imediatamente o job de ingestão.
     """
 
     if file is None:
@@ -35,47 +162,168 @@ async def upload_file(file: UploadFile = File(None)):
     file_path = RAW_DIR / f"{file_id}_{file.filename}"
 
     try:
-        # Salva arquivo temporariamente
-        content = await file.read()
-        file_path.write_bytes(content)
+        file_hash = await run_in_threadpool(_save_upload, file.file, file_path)
+
+        # Validação em um processo separado e inserção na thread de escrita.
+        # O schema e a consulta a arquivos já ingeridos tocam o SQLite, então
+        # também saem do event loop.
+        job = await run_in_threadpool(
+            lambda: ingestion_jobs.submit(
+                file_path,
+                file.filename,
+                SalesRepository(engine),
+                file_hash=file_hash,
+                on_duplicate=DUPLICATE_MODES[duplicados],
+            )
+        )
+
+    except Exception:
+        logger.exception(
+            "Erro inesperado durante upload | arquivo={}",
+            file.filename,
+        )
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Erro interno no servidor",
+        )
+
+    logger.info(
+        "Upload recebido | arquivo={} | job_id={}",
+        file_path.name,
+        job["job_id"],
+    )
 
-        # Validação e limpeza
-        df = load_and_validate_file(file_path)
+    return job
 
-        # Persistência
-        repository = SalesRepository(engine)
-        rows_inserted = repository.save_dataframe(df)
 
-        logger.info(
-            "Upload concluído com sucesso | arquivo={} | linhas_processadas={}",
-            file_path.name,
-            rows_inserted,
+@router.post(
+    "/batch",
+    status_code=202,
+    response_model=UploadBatchResponse,
+    summary="Upload de vários arquivos de vendas",
+    description=(
+        "Recebe vários arquivos CSV/XLSX e/ou arquivos ZIP contendo-os. Os "
+        "arquivos são validados em paralelo e os válidos são gravados juntos "
+        "em uma única transação; o resultado de cada arquivo é informado "
+        "separadamente. Acompanhe o lote em /upload/batch/{job_id}."
+    ),
+)
+async def upload_batch(
+    files: Optional[list[UploadFile]] = File(None),
+    duplicados: Literal["ignorar", "substituir"] = Query(
+        "ignorar",
+        description="O que fazer com transações cujo id_transacao já existe",
+    ),
+):
+    """
+    Salva os arquivos (extraindo os ZIPs) e retorna imediatamente o lote.
+    """
+
+    if not files:
+        logger.error("Upload em lote falhou: nenhum arquivo enviado")
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhum arquivo enviado"
         )
 
-        return {
-            "status": "sucesso",
-            "linhas_processadas": rows_inserted,
-        }
+    saved: list[tuple[Path, str, Optional[str]]] = []
 
-    except InvalidDataError as exc:
-        logger.error(
-            "Erro de validação no upload | arquivo={} | erro={}",
-            file.filename,
-            exc,
+    try:
+        for file in files:
+            file_path = RAW_DIR / f"{uuid.uuid4().hex}_{file.filename}"
+
+            if Path(file.filename or "").suffix.lower() != ".zip":
+                file_hash = await run_in_threadpool(_save_upload, file.file, file_path)
+                saved.append((file_path, file.filename, file_hash))
+                continue
+
+            with file_path.open("wb") as output:
+                await run_in_threadpool(shutil.copyfileobj, file.file, output, COPY_BUFFER_SIZE)
+
+            try:
+                saved.extend(await run_in_threadpool(_extract_zip, file_path))
+            finally:
+                file_path.unlink(missing_ok=True)
+
+        if not saved:
+            raise HTTPException(
+                status_code=400,
+                detail="Nenhum arquivo CSV ou XLSX encontrado no envio",
+            )
+
+        # Validação em paralelo nos processos e inserção única na thread de escrita
+        batch = await run_in_threadpool(
+            lambda: ingestion_jobs.submit_batch(
+                saved,
+                SalesRepository(engine),
+                on_duplicate=DUPLICATE_MODES[duplicados],
+            )
         )
-        file_path.unlink(missing_ok=True)
+
+    except HTTPException:
+        raise
+
+    except zipfile.BadZipFile:
+        _discard(saved)
         raise HTTPException(
-            status_code=422,
-            detail=str(exc),
+            status_code=400,
+            detail=f"Arquivo ZIP inválido: {file.filename}",
         )
 
-    except Exception as exc:
-        logger.exception(
-            "Erro inesperado durante upload | arquivo={}",
-            file.filename,
+    except ZipLimitError as e:
+        logger.error("Upload em lote recusado | arquivo={} | {}", file.filename, e)
+        _discard(saved)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Arquivo ZIP recusado ({file.filename}): {e}",
         )
-        file_path.unlink(missing_ok=True)
+
+    except Exception:
+        logger.exception("Erro inesperado durante upload em lote")
+        _discard(saved)
         raise HTTPException(
             status_code=500,
             detail="Erro interno no servidor",
         )
+
+    logger.info(
+        "Lote recebido | arquivos={} | job_id={}",
+        len(saved),
+        batch["job_id"],
+    )
+
+    return batch
+
+
+@router.get(
+    "/batch/{job_id}",
+    response_model=UploadBatchResponse,
+    summary="Status de um upload em lote",
+    description="Retorna o status do lote e o resultado de cada arquivo.",
+)
+def upload_batch_status(job_id: str):
+    batch = ingestion_jobs.get_batch(job_id)
+
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+
+    return batch
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=UploadJobResponse,
+    summary="Status de um upload",
+    description=(
+        "Retorna o progresso (linhas lidas, validadas e inseridas) e o "
+        "resultado final ou os erros de validação de um upload."
+    ),
+)
+def upload_job_status(job_id: str):
+    job = ingestion_jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    return job
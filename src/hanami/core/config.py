@@ -0,0 +1,162 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import find_dotenv, load_dotenv
+
+# O .env é procurado a partir do diretório de execução, assim como os
+# caminhos em data/. Variáveis já definidas no ambiente têm precedência.
+load_dotenv(find_dotenv(usecwd=True))
+
+ENV_PREFIX = "HANAMI_"
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(ENV_PREFIX + name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = _env(name, str(default))
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{ENV_PREFIX}{name} deve ser um inteiro: {value!r}")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = _env(name, str(default)).strip().lower()
+    return value in {"1", "true", "yes", "on", "sim"}
+
+
+def _env_choice(name: str, default: str, choices: set[str]) -> str:
+    value = _env(name, default).strip().upper()
+    if value not in choices:
+        raise ValueError(
+            f"{ENV_PREFIX}{name} inválido: {value!r} "
+            f"(opções: {', '.join(sorted(choices))})"
+        )
+    return value
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configurações da aplicação, lidas de variáveis de ambiente com o
+    prefixo HANAMI_ (ou de um arquivo .env).
+    """
+
+    # Banco de dados
+    database_path: Path = Path("data/processed/hanami.db")
+
+    # Pool de conexões do SQLAlchemy
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+
+    # PRAGMAs aplicados a cada nova conexão SQLite. WAL permite que
+    # leituras prossigam enquanto um upload está gravando.
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Negativo: tamanho em KiB (padrão: 64 MiB por conexão)
+    sqlite_cache_size: int = -65_536
+
+    # Ingestão
+    ingestion_chunk_size: int = 50_000
+    bulk_insert_batch_size: int = 10_000
+    bulk_load_pragmas: bool = False
+    # Processos que leem e validam uploads em segundo plano
+    ingestion_workers: int = min(4, os.cpu_count() or 1)
+    # Limites de cada ZIP enviado em /upload/batch: entradas e bytes
+    # descompactados dos arquivos de dados, verificados antes da extração
+    zip_max_entries: int = 1_000
+    zip_max_uncompressed_bytes: int = 2 * 1024 * 1024 * 1024
+
+    # Snapshot colunar (Arrow IPC) de `sales`, gravado na primeira leitura
+    # completa (fetch_dataframe) após cada upload, nunca no próprio upload.
+    # Requer pyarrow (pip install -e .[columnar]); sem ele é ignorado.
+    columnar_snapshot: bool = True
+
+    # Cache de DataFrames
+    dataframe_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Processos que renderizam gráficos e PDFs
+    render_workers: int = 2
+
+    # Cache em disco dos relatórios gerados
+    report_cache_max_bytes: int = 256 * 1024 * 1024
+    report_cache_max_age_seconds: int = 7 * 24 * 60 * 60
+
+    # Respostas condicionais (ETag). A versão do dataset fica em memória por
+    # até version_cache_seconds; uploads feitos por este processo a
+    # atualizam na hora.
+    http_cache_max_age: int = 0
+    version_cache_seconds: int = 2
+
+    # Linhas lidas do cursor por bloco em /data/export
+    export_batch_size: int = 10_000
+
+    # Cabeçalho Server-Timing com o tempo de cada etapa da requisição
+    server_timing: bool = True
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        defaults = cls()
+
+        return cls(
+            database_path=Path(_env("DB_PATH", str(defaults.database_path))),
+            db_pool_size=_env_int("DB_POOL_SIZE", defaults.db_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", defaults.db_max_overflow),
+            db_pool_timeout=_env_int("DB_POOL_TIMEOUT", defaults.db_pool_timeout),
+            sqlite_journal_mode=_env_choice(
+                "SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode, JOURNAL_MODES
+            ),
+            sqlite_synchronous=_env_choice(
+                "SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous, SYNCHRONOUS_LEVELS
+            ),
+            sqlite_busy_timeout_ms=_env_int(
+                "SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms
+            ),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+            sqlite_cache_size=_env_int("SQLITE_CACHE_SIZE", defaults.sqlite_cache_size),
+            ingestion_chunk_size=_env_int(
+                "INGESTION_CHUNK_SIZE", defaults.ingestion_chunk_size
+            ),
+            bulk_insert_batch_size=_env_int(
+                "BULK_INSERT_BATCH_SIZE", defaults.bulk_insert_batch_size
+            ),
+            bulk_load_pragmas=_env_bool("BULK_LOAD_PRAGMAS", defaults.bulk_load_pragmas),
+            ingestion_workers=_env_int("INGESTION_WORKERS", defaults.ingestion_workers),
+            zip_max_entries=_env_int("ZIP_MAX_ENTRIES", defaults.zip_max_entries),
+            zip_max_uncompressed_bytes=_env_int(
+                "ZIP_MAX_UNCOMPRESSED_BYTES", defaults.zip_max_uncompressed_bytes
+            ),
+            columnar_snapshot=_env_bool("COLUMNAR_SNAPSHOT", defaults.columnar_snapshot),
+            dataframe_cache_max_bytes=_env_int(
+                "DATAFRAME_CACHE_MAX_BYTES", defaults.dataframe_cache_max_bytes
+            ),
+            render_workers=_env_int("RENDER_WORKERS", defaults.render_workers),
+            report_cache_max_bytes=_env_int(
+                "REPORT_CACHE_MAX_BYTES", defaults.report_cache_max_bytes
+            ),
+            report_cache_max_age_seconds=_env_int(
+                "REPORT_CACHE_MAX_AGE_SECONDS", defaults.report_cache_max_age_seconds
+            ),
+            http_cache_max_age=_env_int(
+                "HTTP_CACHE_MAX_AGE", defaults.http_cache_max_age
+            ),
+            version_cache_seconds=_env_int(
+                "VERSION_CACHE_SECONDS", defaults.version_cache_seconds
+            ),
+            export_batch_size=_env_int(
+                "EXPORT_BATCH_SIZE", defaults.export_batch_size
+            ),
+            server_timing=_env_bool("SERVER_TIMING", defaults.server_timing),
+        )
+
+
+settings = Settings.from_env()
@@ -0,0 +1,274 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+# Limites (em segundos) dos histogramas de latência
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricFamily(NamedTuple):
+    """
+    Uma métrica pronta para exposição: nome, tipo, descrição e amostras
+    (nome da série, rótulos, valor).
+    """
+
+    name: str
+    type: str
+    documentation: str
+    samples: list[tuple[str, dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        name = f"{name}{{{pairs}}}"
+
+    if value == float("inf"):
+        return f"{name} +Inf"
+
+    return f"{name} {value}" if isinstance(value, int) else f"{name} {float(value)!r}"
+
+
+def render_prometheus(families: Sequence[MetricFamily]) -> str:
+    """
+    Formato texto de exposição do Prometheus (versão 0.0.4).
+    """
+    lines: list[str] = []
+
+    for family in families:
+        lines.append(f"# HELP {family.name} {_escape(family.documentation)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        lines.extend(_format_sample(*sample) for sample in family.samples)
+
+    return "\n".join(lines) + "\n"
+
+
+class Counter:
+    """
+    Contador monotônico, opcionalmente separado por rótulos.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = sorted(self._values.items())
+
+        return MetricFamily(
+            self.name,
+            "counter",
+            self.documentation,
+            [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values],
+        )
+
+
+class Histogram:
+    """
+    Histograma de durações com limites fixos (`buckets`), separado por
+    rótulos. Guarda apenas contagens por faixa, soma e total.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> (contagem por faixa, com +Inf no fim; soma)
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        position = bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[position] += 1
+            total[0] += value
+
+    def collect(self) -> MetricFamily:
+        samples = []
+
+        with self._lock:
+            values = sorted(
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            )
+
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append((f"{self.name}_bucket", {**labels, "le": le}, cumulative))
+
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+
+        return MetricFamily(self.name, "histogram", self.documentation, samples)
+
+
+class CacheCounter:
+    """
+    Acertos e falhas de um cache sem estado próprio (ex: respostas 304).
+    Mesma interface (hits/misses) de DataFrameCache e ArtifactCache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+
+class MetricsRegistry:
+    """
+    Métricas do processo da API, coletadas por /metrics.
+
+    Os pools de processos (ingestão e renderização) não registram nada
+    aqui; seus tempos são medidos no processo da API.
+    """
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self) -> list[MetricFamily]:
+        return [metric.collect() for metric in self._metrics]
+
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    "hanami_http_request_duration_seconds",
+    "Duração das requisições HTTP, até o último byte da resposta",
+    ["method", "route", "status"],
+)
+
+stage_duration = registry.histogram(
+    "hanami_stage_duration_seconds",
+    "Duração das etapas internas (SQL, pandas, serialização, renderização, ingestão)",
+    ["stage"],
+)
+
+processed_rows = registry.counter(
+    "hanami_rows_total",
+    "Linhas lidas, validadas, gravadas ou devolvidas, por etapa",
+    ["stage"],
+)
+
+# Etapas da requisição em andamento: nome -> [segundos, chamadas]. Fica
+# None fora de requisições (threads de escrita, callbacks dos pools).
+_request_stages: ContextVar[Optional[dict[str, list]]] = ContextVar(
+    "hanami_request_stages", default=None
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """
+    Registra a duração de uma etapa no histograma e, dentro de uma
+    requisição, no seu Server-Timing.
+    """
+    stage_duration.observe(seconds, stage=stage)
+
+    stages = _request_stages.get()
+    if stages is not None:
+        entry = stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Mede o bloco (ou, como decorador, cada chamada da função) como `stage`.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def count_rows(stage: str, rows: int) -> None:
+    processed_rows.inc(rows, stage=stage)
+
+
+@contextmanager
+def request_stages() -> Iterator[dict[str, list]]:
+    """
+    Acumula as etapas registradas durante a requisição atual, inclusive
+    nas threads do threadpool (que herdam o contexto).
+    """
+    stages: dict[str, list] = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+def server_timing(stages: dict[str, list], total_seconds: float) -> str:
+    """
+    Valor do cabeçalho Server-Timing: cada etapa com a soma das suas
+    durações (em ms) e o total da requisição. Etapas podem se sobrepor
+    (ex: sql dentro de fetch_dataframe).
+    """
+    entries = [
+        f"{stage};dur={seconds * 1000:.2f}"
+        for stage, (seconds, _) in list(stages.items())
+    ]
+    entries.append(f"total;dur={total_seconds * 1000:.2f}")
+
+    return ", ".join(entries)
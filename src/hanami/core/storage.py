@@ -1,15 +1,233 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Hashable
+from pathlib import Path
+from threading import Lock
+from typing import Any, Optional
+
 import pandas as pd
-from typing import Optional
+from loguru import logger
+
+from hanami.core.config import settings
+
+
+class DataFrameCache:
+    """
+    Cache em memória de DataFrames associados a uma versão do dataset.
+
+    Cada chave guarda uma única entrada: ao gravar uma versão nova, a
+    anterior é descartada. Entradas menos usadas são removidas quando o
+    total ultrapassa `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[int, pd.DataFrame, int]] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable, version: int) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            cached_version, df, _ = entry
+
+            if cached_version != version:
+                # Versão obsoleta: libera a memória imediatamente
+                self._discard(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Cópia rasa: evita que quem chama altere o frame compartilhado
+        return df.copy(deep=False)
+
+    def put(self, key: Hashable, version: int, df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self._discard(key)
+
+            if nbytes > self.max_bytes:
+                logger.warning(
+                    "DataFrame não armazenado em cache | chave={} | bytes={} | limite={}",
+                    key,
+                    nbytes,
+                    self.max_bytes,
+                )
+                return
+
+            self._entries[key] = (version, df, nbytes)
+            self._size += nbytes
+
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[2]
+
+
+class ArtifactCache:
+    """
+    Cache em disco de arquivos gerados (relatórios, gráficos).
+
+    Cada artefato é identificado pelo hash da versão do dataset e dos
+    parâmetros que o geraram, então um upload novo simplesmente passa a
+    usar outros nomes. A escrita é feita em um arquivo temporário único e
+    publicada com os.replace (temp_path + publish), de modo que requisições
+    concorrentes nunca veem um arquivo pela metade nem sobrescrevem o que
+    outra está servindo.
+
+    Artefatos mais antigos que `max_age_seconds`, ou os menos usados quando
+    o total passa de `max_bytes`, são removidos. Arquivos acessados há menos
+    de `grace_seconds` não são removidos, pois podem estar sendo enviados.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        max_age_seconds: int,
+        grace_seconds: int = 60,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.grace_seconds = grace_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(version: int, **params: Any) -> str:
+        payload = json.dumps(
+            {"version": version, **params}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    def lookup(self, key: str, suffix: str) -> Optional[Path]:
+        """
+        Retorna o artefato se já estiver em cache, marcando-o como usado.
+        """
+        path = self.path(key, suffix)
+
+        if self._touch(path):
+            self.hits += 1
+            return path
+
+        return None
+
+    def exists(self, key: str, suffix: str) -> bool:
+        """
+        Indica se o artefato está em cache, sem marcá-lo como usado nem
+        contar um acerto.
+        """
+        return self.path(key, suffix).exists()
+
+    def count_hit(self) -> None:
+        """
+        Acerto obtido sem lookup (ex: pedido que aguarda uma geração já
+        em andamento).
+        """
+        self.hits += 1
+
+    def count_miss(self) -> None:
+        self.misses += 1
+
+    def temp_path(self, key: str) -> Path:
+        """
+        Caminho temporário exclusivo para gerar um artefato de `key`.
+        """
+        return self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+
+    def publish(self, key: str, suffix: str, tmp_path: Path) -> Path:
+        """
+        Move atomicamente um artefato gerado em temp_path para o cache.
+        """
+        path = self.path(key, suffix)
+
+        try:
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.evict()
+
+        return path
+
+    def evict(self) -> None:
+        now = time.time()
+        entries = []
+
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            if not path.is_file():
+                continue
+
+            age = now - stat.st_mtime
+            is_temporary = path.name.startswith(".")
+
+            if age <= self.grace_seconds:
+                entries.append((stat.st_mtime, stat.st_size, path, False))
+            elif age > self.max_age_seconds or is_temporary:
+                # Temporários antigos são sobras de gerações interrompidas
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path, True))
+
+        total = sum(size for _, size, _, _ in entries)
 
-_DATAFRAME_CACHE: Optional[pd.DataFrame] = None
+        for _, size, path, removable in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if removable:
+                path.unlink(missing_ok=True)
+                total -= size
 
+    def _touch(self, path: Path) -> bool:
+        # O mtime marca o último uso, base da remoção por idade e tamanho
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
 
-def store_dataframe(df: pd.DataFrame) -> None:
-    global _DATAFRAME_CACHE
-    _DATAFRAME_CACHE = df
 
 
-def get_dataframe() -> pd.DataFrame:
-    if _DATAFRAME_CACHE is None:
-        raise RuntimeError("Nenhum dataset carregado")
-    return _DATAFRAME_CACHE
+dataframe_cache = DataFrameCache(max_bytes=settings.dataframe_cache_max_bytes)
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from hanami.core.config import settings
+
+VERSION_TABLE = "dataset_version"
+
+CREATE_VERSION_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+)
+"""
+
+
+def get_dataset_version(conn: Connection) -> int:
+    """
+    Retorna a versão atual do dataset de vendas.
+
+    A versão é incrementada a cada upload concluído; enquanto ela não
+    muda, qualquer resultado derivado de `sales` pode ser reaproveitado.
+    """
+    try:
+        version = conn.execute(
+            text(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")
+        ).scalar()
+    except OperationalError:
+        # Nenhum upload registrado ainda
+        return 0
+
+    return version or 0
+
+
+def bump_dataset_version(conn: Connection) -> int:
+    """
+    Incrementa a versão do dataset.
+
+    Deve ser chamada na mesma transação que altera `sales`.
+    """
+    conn.execute(text(CREATE_VERSION_TABLE))
+    conn.execute(
+        text(
+            f"INSERT INTO {VERSION_TABLE} (id, version) VALUES (1, 1) "
+            "ON CONFLICT (id) DO UPDATE SET version = version + 1"
+        )
+    )
+
+    return conn.execute(
+        text(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")
+    ).scalar_one()
+
+
+class DatasetVersionCache:
+    """
+    Versão do dataset mantida em memória por até `ttl_seconds`.
+
+    Permite responder requisições condicionais sem consultar o banco.
+    Uploads feitos por este processo atualizam o valor na hora (set);
+    alterações feitas por outros processos aparecem após o ttl.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, engine: Engine) -> int:
+        with self._lock:
+            entry = self._entries.get(str(engine.url))
+
+        if entry is not None:
+            version, checked_at = entry
+            if time.monotonic() - checked_at < self.ttl_seconds:
+                self.hits += 1
+                return version
+
+        return self.refresh(engine)
+
+    def refresh(self, engine: Engine) -> int:
+        """
+        Lê a versão do banco e atualiza o valor em memória.
+
+        Toda leitura do banco conta como falha do cache, inclusive as
+        chamadas diretas de quem precisa da versão mais recente.
+        """
+        self.misses += 1
+
+        with engine.connect() as conn:
+            version = get_dataset_version(conn)
+
+        self.set(engine, version)
+
+        return version
+
+    def set(self, engine: Engine, version: int) -> None:
+        with self._lock:
+            self._entries[str(engine.url)] = (version, time.monotonic())
+
+
+dataset_versions = DatasetVersionCache(settings.version_cache_seconds)
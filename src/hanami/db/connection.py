@@ -1,11 +1,78 @@
+import time
 from pathlib import Path
-from sqlalchemy import create_engine
 
-DB_PATH = Path("data/processed/hanami.db")
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+from hanami.core.config import settings
+from hanami.core.metrics import record_stage
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    future=True
-)
+DB_PATH = settings.database_path
+
+
+def _configure_sqlite(dbapi_connection, _connection_record):
+    """
+    Aplica os PRAGMAs de desempenho em cada nova conexão do pool.
+    """
+    # O módulo sqlite3 não abre transação antes de DDL; o controle passa
+    # ao SQLAlchemy, que emite BEGIN explicitamente (ver _begin_transaction)
+    dbapi_connection.isolation_level = None
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA mmap_size = {settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA cache_size = {settings.sqlite_cache_size}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+
+def _begin_transaction(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def _start_query_timer(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _stop_query_timer(conn, _cursor, _statement, _parameters, _context, _executemany):
+    """
+    Registra o tempo de cada consulta como a etapa "sql" (histograma e
+    Server-Timing da requisição).
+    """
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        record_stage("sql", time.perf_counter() - started)
+
+
+def create_sqlite_engine(path: Path) -> Engine:
+    """
+    Cria um engine para o banco SQLite em `path`, com os PRAGMAs, o
+    controle de transação e a medição de consultas da aplicação.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    sqlite_engine = create_engine(
+        f"sqlite:///{path}",
+        future=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args={
+            # Conexões do pool são usadas por threads diferentes do FastAPI
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        },
+    )
+
+    event.listen(sqlite_engine, "connect", _configure_sqlite)
+    event.listen(sqlite_engine, "begin", _begin_transaction)
+    event.listen(sqlite_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(sqlite_engine, "after_cursor_execute", _stop_query_timer)
+
+    return sqlite_engine
+
+
+engine = create_sqlite_engine(DB_PATH)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from hanami.db.snapshot import snapshot_available
+
+# Tipos pandas declarados para cada coluna de `sales` na carga compacta.
+#   category: dimensões de baixa cardinalidade usadas em groupby
+#   integer:  menor inteiro que comporta os valores do frame
+#   float64:  valores monetários e percentuais, sem perda de precisão
+#   datetime: data_venda como datetime64 nativo
+#   string:   texto livre de alta cardinalidade
+SALES_DTYPES = {
+    "id_transacao": "string",
+    "data_venda": "datetime",
+    "cliente_id": "integer",
+    "idade_cliente": "integer",
+    "genero_cliente": "category",
+    "cidade_cliente": "category",
+    "estado_cliente": "category",
+    "regiao": "category",
+    "nome_produto": "category",
+    "categoria": "category",
+    "quantidade": "integer",
+    "subtotal": "float64",
+    "desconto_percent": "float64",
+    "valor_final": "float64",
+    "custo_produto": "float64",
+    "margem_lucro": "float64",
+    "canal_venda": "category",
+    "forma_pagamento": "category",
+    "status_entrega": "category",
+}
+
+CATEGORY_COLUMNS = [
+    column for column, dtype in SALES_DTYPES.items() if dtype == "category"
+]
+
+_INTEGER_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Maior inteiro representado exatamente em float32
+_FLOAT32_EXACT_LIMIT = 2**24
+
+
+def _smallest_integer(values: pd.Series) -> pd.Series:
+    numbers = pd.to_numeric(values, errors="coerce")
+    present = numbers.dropna()
+
+    if not (present % 1 == 0).all():
+        return numbers.astype(np.float64)
+
+    if len(present) < len(numbers):
+        # Com nulos, float32 mantém NaN e a representação "34.0" do
+        # float64 lido do banco, ocupando metade da memória
+        if present.empty or present.abs().max() < _FLOAT32_EXACT_LIMIT:
+            return numbers.astype(np.float32)
+        return numbers.astype(np.float64)
+
+    if present.empty:
+        return numbers.astype(np.int8)
+
+    low, high = present.min(), present.max()
+
+    for dtype in _INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return numbers.astype(dtype)
+
+    return numbers
+
+
+def _string_dtype() -> str:
+    # Strings em buffers Arrow ocupam uma fração dos objetos Python
+    return "string[pyarrow]" if snapshot_available() else "object"
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """
+    Memória ocupada pelo frame, em bytes, incluindo o conteúdo dos textos.
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas de vendas para os tipos declarados em SALES_DTYPES
+    e registra a memória antes e depois da conversão.
+
+    Colunas fora de SALES_DTYPES são mantidas como estão.
+    """
+    before = frame_memory(df)
+    converted = {}
+
+    for column in df.columns:
+        dtype = SALES_DTYPES.get(column)
+        values = df[column]
+
+        if dtype == "category":
+            converted[column] = (
+                values if isinstance(values.dtype, pd.CategoricalDtype)
+                else values.astype("category")
+            )
+        elif dtype == "integer":
+            converted[column] = _smallest_integer(values)
+        elif dtype == "float64":
+            converted[column] = pd.to_numeric(values, errors="coerce").astype(np.float64)
+        elif dtype == "datetime":
+            converted[column] = (
+                values if pd.api.types.is_datetime64_any_dtype(values)
+                else pd.to_datetime(values, errors="coerce", format="ISO8601")
+            )
+        elif dtype == "string":
+            converted[column] = values.astype(_string_dtype())
+        else:
+            converted[column] = values
+
+    compact = pd.DataFrame(converted, index=df.index)
+    after = frame_memory(compact)
+
+    logger.info(
+        "Frame compactado | linhas={} | antes={:.1f} MiB | depois={:.1f} MiB | redução={:.1f}x",
+        len(compact),
+        before / 2**20,
+        after / 2**20,
+        before / after if after else 0,
+    )
+
+    return compact
@@ -1,74 +1,1195 @@
+import re
+import time
+from datetime import date, timedelta
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+import numpy as np
 import pandas as pd
+from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from hanami.core.config import settings
+from hanami.core.metrics import count_rows, timed
+from hanami.core.storage import dataframe_cache
+from hanami.core.versioning import bump_dataset_version, dataset_versions
+from hanami.db.dtypes import compact_frame
+from hanami.db.rollups import (
+    ROLLUP_DIMENSIONS,
+    ROLLUP_MEASURES,
+    ROLLUP_TABLE,
+    TREND_FREQUENCIES,
+    apply_rollup_deltas,
+    compute_rollup_deltas,
+    rebuild_rollups,
+    resample_daily_series,
+)
+from hanami.db.schema import (
+    FTS_TABLE,
+    INGESTED_FILES_TABLE,
+    SALES_COLUMNS,
+    fts_enabled,
+    index_new_sales,
+    init_schema,
+)
+from hanami.db.snapshot import (
+    SNAPSHOT_READ_ERRORS,
+    discard_snapshots,
+    read_snapshot,
+    snapshot_available,
+    snapshot_path,
+    write_snapshot,
+)
+
+# Tamanho do prefixo de data ("YYYY-MM-DD") usado em cada frequência;
+# semanas e trimestres são agrupados a partir dos dias
+PERIOD_PREFIX_LENGTHS = {
+    "D": 10,
+    "M": 7,
+    "Y": 4,
+}
+
+DEMOGRAPHIC_COLUMNS = {
+    "por_genero": "genero_cliente",
+    "por_faixa_etaria": "idade_cliente",
+    "por_cidade": "cidade_cliente",
+    "por_estado": "estado_cliente",
+    "por_regiao": "regiao",
+}
+
+# Linhas enviadas por chamada de executemany na carga em lote
+DEFAULT_BATCH_SIZE = settings.bulk_insert_batch_size
+
+# Blocos menores que isso (ex: muitos arquivos pequenos em um lote) são
+# agrupados antes da gravação, diluindo o custo fixo de cada bloco
+WRITE_BLOCK_ROWS = settings.ingestion_chunk_size
+
+# PRAGMAs aplicados durante cargas grandes. synchronous=OFF troca
+# durabilidade em caso de queda do sistema operacional por velocidade.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": -262144,
+    "temp_store": "MEMORY",
+}
+
+
+def _date_range_clause(
+    start_date: date | None,
+    end_date: date | None,
+    params: dict,
+) -> str:
+    """
+    Monta o filtro de período (inclusivo) sobre o dia do rollup.
+    """
+    if not start_date and not end_date:
+        return ""
+
+    # Vendas sem data ficam no dia "" e só entram nos totais sem filtro
+    clause = " AND dia <> ''"
+
+    if start_date:
+        clause += " AND dia >= :start_date"
+        params["start_date"] = start_date.isoformat()
+
+    if end_date:
+        clause += " AND dia <= :end_date"
+        params["end_date"] = end_date.isoformat()
+
+    return clause
+
+
+def _group_days_by_period(rows: list[dict], freq: str) -> list[dict]:
+    """
+    Agrupa as linhas diárias da pseudo-dimensão "periodo" em semanas ou
+    trimestres, com os mesmos rótulos de resample_daily_series.
+    """
+    if not rows:
+        return rows
+
+    daily = pd.DataFrame(rows)
+    periods = pd.to_datetime(daily.pop("valor"), format="%Y-%m-%d").dt.to_period(freq)
+    # min_count mantém null a soma de períodos sem custo informado
+    grouped = daily.groupby(periods.rename("valor")).sum(numeric_only=True, min_count=1)
+    grouped.index = grouped.index.astype(str)
+    grouped.insert(0, "dimensao", "periodo")
+    grouped = grouped.reset_index()[list(rows[0])]
+
+    return grouped.astype(object).where(grouped.notna(), None).to_dict(orient="records")
+
+
+def _apply_pragmas(conn, pragmas: dict) -> dict:
+    """
+    Aplica PRAGMAs na conexão e devolve os valores anteriores.
+
+    Usa o cursor DBAPI diretamente: alguns PRAGMAs (ex: synchronous) não
+    podem ser alterados dentro da transação que o SQLAlchemy abriria.
+    """
+    previous = {}
+    cursor = conn.connection.cursor()
+
+    try:
+        for name, value in pragmas.items():
+            previous[name] = cursor.execute(f"PRAGMA {name}").fetchone()[0]
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+    return previous
+
+
+def _column_values(series: pd.Series) -> list:
+    """
+    Converte uma coluna em valores nativos do Python, com None para nulos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Mesmo formato textual gravado pelo SQLAlchemy via to_sql
+        series = series.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _bulk_insert(conn, df: pd.DataFrame, batch_size: int, upsert: bool = False) -> int:
+    """
+    Insere o DataFrame em `sales` via executemany, em lotes, e retorna o
+    número de linhas gravadas.
+
+    Vendas cujo id_transacao já existe são ignoradas ou, com `upsert`,
+    têm seus valores substituídos (mantendo o id).
+    """
+    if df.empty:
+        return 0
+
+    columns = [column for column in df.columns if column in SALES_COLUMNS]
+
+    column_list = ", ".join(columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    if upsert:
+        updates = ", ".join(
+            f"{column} = excluded.{column}"
+            for column in columns
+            if column != "id_transacao"
+        )
+        statement = (
+            f"INSERT INTO sales ({column_list}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id_transacao) DO UPDATE SET {updates}"
+        )
+    else:
+        statement = f"INSERT OR IGNORE INTO sales ({column_list}) VALUES ({placeholders})"
+
+    written = 0
+
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        rows = list(zip(*(_column_values(batch[column]) for column in columns)))
+        written += conn.exec_driver_sql(statement, rows).rowcount
+
+    return written
+
+
+def _existing_transactions(conn, ids: pd.Series) -> pd.Series:
+    """
+    Indica, para cada linha, se o id_transacao já está em `sales`.
+
+    Os ids vão para uma tabela temporária, cruzada com o índice único de
+    id_transacao em uma única consulta, em vez de uma busca por linha.
+    """
+    exists = pd.Series(False, index=ids.index)
+    present = ids.notna().to_numpy()
+
+    if not present.any():
+        return exists
+
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {INCOMING_TABLE} "
+        "(posicao INTEGER PRIMARY KEY, id_transacao TEXT)"
+    )
+    conn.exec_driver_sql(f"DELETE FROM {INCOMING_TABLE}")
+    conn.exec_driver_sql(
+        f"INSERT INTO {INCOMING_TABLE} (posicao, id_transacao) VALUES (?, ?)",
+        list(zip(
+            [position for position, flag in enumerate(present) if flag],
+            _column_values(ids[present]),
+        )),
+    )
+
+    found = [
+        row[0]
+        for row in conn.exec_driver_sql(
+            f"SELECT i.posicao FROM {INCOMING_TABLE} i "
+            "JOIN sales s ON s.id_transacao = i.id_transacao"
+        )
+    ]
+    exists.iloc[found] = True
+
+    return exists
+
+
+def _replaced_sales(conn) -> pd.DataFrame:
+    """
+    Valores atuais das vendas encontradas pela última _existing_transactions.
+    """
+    columns = ", ".join(f"s.{column}" for column in SALES_COLUMNS)
+
+    return pd.DataFrame.from_records(
+        conn.exec_driver_sql(
+            f"SELECT {columns} FROM {INCOMING_TABLE} i "
+            "JOIN sales s ON s.id_transacao = i.id_transacao"
+        ).fetchall(),
+        columns=list(SALES_COLUMNS),
+    )
+
+
+def _write_block(
+    conn, block: pd.DataFrame, batch_size: int, replace: bool
+) -> tuple[np.ndarray, int, list[pd.DataFrame]]:
+    """
+    Grava um bloco tratando os id_transacao repetidos (no bloco ou já em
+    `sales`) e retorna a máscara das linhas inseridas, o número de vendas
+    substituídas e os deltas de rollup correspondentes.
+    """
+    inserted = np.zeros(len(block), dtype=bool)
+    positions = pd.RangeIndex(len(block))
+    block = block.set_axis(positions)
+    deltas = []
+    replaced = 0
+
+    if "id_transacao" in block.columns:
+        ids = block["id_transacao"]
+        repeated = ids.notna() & ids.duplicated(keep="last" if replace else "first")
+        block = block[~repeated]
+        exists = _existing_transactions(conn, block["id_transacao"])
+    else:
+        exists = pd.Series(False, index=block.index)
+
+    if replace and exists.any():
+        # Remove do rollup os valores que serão substituídos
+        deltas.append(_negated(compute_rollup_deltas(_replaced_sales(conn))))
+        replaced = _bulk_insert(conn, block[exists], batch_size, upsert=True)
+        deltas.append(compute_rollup_deltas(block[exists]))
+
+    new_rows = block[~exists]
+    _bulk_insert(conn, new_rows, batch_size)
+    inserted[new_rows.index] = True
+
+    if not new_rows.empty:
+        # Agregado enquanto o bloco ainda está em memória, evitando reler as
+        # linhas recém-inseridas
+        deltas.append(compute_rollup_deltas(new_rows))
+
+    return inserted, replaced, deltas
+
+
+def _negated(deltas: pd.DataFrame) -> pd.DataFrame:
+    measures = [*ROLLUP_MEASURES, "numero_transacoes"]
+    deltas = deltas.copy()
+    deltas[measures] = -deltas[measures]
+    return deltas
+
+
+def _warn_ignored_columns(df: pd.DataFrame) -> None:
+    ignored = [column for column in df.columns if column not in SALES_COLUMNS]
+
+    if ignored:
+        logger.warning(
+            "Colunas fora do schema de sales ignoradas: {}",
+            ", ".join(ignored),
+        )
+
+
+# Tratamento de vendas cujo id_transacao já existe em `sales`:
+#   ignore:  mantém a venda gravada e descarta a nova
+#   replace: substitui os valores da venda gravada pelos da nova
+DUPLICATE_MODES = ("ignore", "replace")
+
+# Tabela temporária com os id_transacao do bloco sendo inserido
+INCOMING_TABLE = "incoming_transactions"
+
+
+class DuplicateFileError(Exception):
+    """Arquivo com o mesmo conteúdo já foi ingerido."""
+    pass
+
+
+class IncomingFile(NamedTuple):
+    """
+    Blocos validados de um arquivo, com o hash e o nome registrados em
+    ingested_files.
+    """
+    chunks: Iterable[pd.DataFrame]
+    file_hash: str | None = None
+    filename: str | None = None
+
+
+# Maior rowid possível no SQLite
+MAX_ROW_ID = 2**63 - 1
+
+SALES_SELECT = "SELECT " + ", ".join(SALES_COLUMNS) + " FROM sales"
+
+
+def fts_match_expression(term: str) -> str | None:
+    """
+    Converte o termo digitado em uma consulta FTS5 sobre nome_produto.
+
+    Cada palavra vira um prefixo ("note" encontra "Notebook") e todas
+    precisam aparecer no nome, em qualquer ordem.
+    """
+    tokens = re.findall(r"\w+", term)
+
+    if not tokens:
+        return None
+
+    prefixes = " AND ".join(f'"{token}"*' for token in tokens)
+    return f"nome_produto : ({prefixes})"
+
 
 class SalesRepository:
     def __init__(self, engine: Engine):
         self.engine = engine
+        init_schema(engine)
 
-    def save_dataframe(self, df: pd.DataFrame) -> int:
-        df.to_sql(
-            "sales",
-            self.engine,
-            if_exists="append",
-            index=False,
+    def save_dataframe(
+        self,
+        df: pd.DataFrame,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        load_pragmas: bool = False,
+        on_duplicate: str = "ignore",
+    ) -> int:
+        """
+        Persiste as vendas e atualiza o rollup diário na mesma transação.
+        """
+        return self.save_chunks(
+            [df],
+            batch_size=batch_size,
+            load_pragmas=load_pragmas,
+            on_duplicate=on_duplicate,
         )
-        return len(df)
+
+    def save_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        load_pragmas: bool = False,
+        on_duplicate: str = "ignore",
+        file_hash: str | None = None,
+        filename: str | None = None,
+    ) -> int:
+        """
+        Persiste uma sequência de blocos de vendas em uma única transação e
+        retorna o número de vendas novas.
+
+        As linhas são enviadas via executemany em lotes de `batch_size`.
+        Com `load_pragmas`, aplica BULK_LOAD_PRAGMAS durante a carga e
+        restaura os valores originais ao final.
+
+        Vendas com id_transacao já gravado (ou repetido no próprio arquivo)
+        são tratadas conforme `on_duplicate` (ver DUPLICATE_MODES); o rollup
+        recebe apenas as diferenças efetivamente gravadas.
+
+        Com `file_hash`, o arquivo é registrado em ingested_files na mesma
+        transação, e DuplicateFileError é levantada se ele já constar lá.
+
+        Se o iterável levantar uma exceção no meio do caminho (ex: falha de
+        validação detectada no fim do arquivo), nada é gravado.
+        """
+        [rows_inserted] = self.save_files(
+            [IncomingFile(chunks, file_hash, filename)],
+            batch_size=batch_size,
+            load_pragmas=load_pragmas,
+            on_duplicate=on_duplicate,
+        )
+
+        if rows_inserted is None:
+            raise DuplicateFileError(
+                f"Arquivo já ingerido anteriormente: {filename or file_hash}"
+            )
+
+        return rows_inserted
+
+    @timed("save_files")
+    def save_files(
+        self,
+        files: Sequence[IncomingFile],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        load_pragmas: bool = False,
+        on_duplicate: str = "ignore",
+    ) -> list[int | None]:
+        """
+        Persiste os blocos de vários arquivos em uma única transação, com
+        as mesmas regras de save_chunks, e retorna as vendas novas de cada
+        arquivo.
+
+        Arquivos cujo `file_hash` já consta em ingested_files (inclusive
+        repetidos no próprio lote) são pulados e recebem None.
+
+        Blocos pequenos, de um ou mais arquivos, são agrupados até
+        WRITE_BLOCK_ROWS linhas antes de cada gravação.
+
+        Uma exceção em qualquer arquivo desfaz o lote inteiro.
+        """
+        if on_duplicate not in DUPLICATE_MODES:
+            raise ValueError(f"Modo de duplicatas inválido: {on_duplicate}")
+
+        replace = on_duplicate == "replace"
+        inserted = np.zeros(len(files), dtype=np.int64)
+        skipped: set[int] = set()
+        rows_replaced = 0
+        insert_seconds = 0.0
+        rollup_deltas = []
+        version = None
+
+        # Blocos aguardando gravação e o arquivo (posição em `files`) de cada linha
+        pending: list[pd.DataFrame] = []
+        owners: list[np.ndarray] = []
+
+        def flush() -> None:
+            nonlocal rows_replaced, insert_seconds
+
+            block = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            owner = np.concatenate(owners)
+            pending.clear()
+            owners.clear()
+
+            started = time.perf_counter()
+            written, replaced, deltas = _write_block(conn, block, batch_size, replace)
+            insert_seconds += time.perf_counter() - started
+
+            inserted[:] += np.bincount(owner[written], minlength=len(files))
+            rows_replaced += replaced
+            rollup_deltas.extend(deltas)
+
+        with self.engine.connect() as conn:
+            previous_pragmas = (
+                _apply_pragmas(conn, BULK_LOAD_PRAGMAS) if load_pragmas else {}
+            )
+
+            try:
+                with conn.begin():
+                    last_id = conn.execute(
+                        text("SELECT COALESCE(MAX(id), 0) FROM sales")
+                    ).scalar_one()
+                    hashes: set[str] = set()
+
+                    for position, file in enumerate(files):
+                        if file.file_hash is not None and (
+                            file.file_hash in hashes
+                            or self._file_ingested(conn, file.file_hash)
+                        ):
+                            skipped.add(position)
+                            continue
+
+                        if file.file_hash is not None:
+                            hashes.add(file.file_hash)
+
+                        for index, chunk in enumerate(file.chunks):
+                            if index == 0:
+                                _warn_ignored_columns(chunk)
+
+                            pending.append(chunk)
+                            owners.append(np.full(len(chunk), position))
+
+                            if sum(len(block) for block in pending) >= WRITE_BLOCK_ROWS:
+                                flush()
+
+                    if pending:
+                        flush()
+
+                    for position, file in enumerate(files):
+                        if file.file_hash is not None and position not in skipped:
+                            conn.execute(
+                                text(
+                                    f"INSERT INTO {INGESTED_FILES_TABLE} "
+                                    "(sha256, arquivo, linhas_inseridas, ingerido_em) "
+                                    "VALUES (:sha256, :arquivo, :linhas, datetime('now'))"
+                                ),
+                                {
+                                    "sha256": file.file_hash,
+                                    "arquivo": file.filename,
+                                    "linhas": int(inserted[position]),
+                                },
+                            )
+
+                    rows_inserted = int(inserted.sum())
+
+                    if rows_inserted or rows_replaced:
+                        if fts_enabled(self.engine):
+                            index_new_sales(conn, after_id=last_id)
+
+                        apply_rollup_deltas(conn, pd.concat(rollup_deltas))
+                        version = bump_dataset_version(conn)
+            finally:
+                _apply_pragmas(conn, previous_pragmas)
+
+        if version is not None:
+            # Só depois do commit, para não anunciar uma versão não gravada
+            dataset_versions.set(self.engine, version)
+
+        logger.info(
+            "Inserção em lote concluída | arquivos={} | linhas={} | substituidas={} | segundos={:.2f} | linhas_por_segundo={:.0f}",
+            len(files),
+            rows_inserted,
+            rows_replaced,
+            insert_seconds,
+            rows_inserted / insert_seconds if insert_seconds > 0 else 0,
+        )
+
+        count_rows("save_files", rows_inserted)
+
+        if rows_replaced:
+            # Linhas alteradas no lugar: o snapshot anterior não pode ser
+            # reaproveitado de forma incremental
+            discard_snapshots(self.engine)
+
+        return [
+            None if position in skipped else int(rows)
+            for position, rows in enumerate(inserted)
+        ]
+
+    def _file_ingested(self, conn, file_hash: str) -> bool:
+        return conn.execute(
+            text(f"SELECT 1 FROM {INGESTED_FILES_TABLE} WHERE sha256 = :sha256"),
+            {"sha256": file_hash},
+        ).first() is not None
+
+    def is_file_ingested(self, file_hash: str) -> bool:
+        """
+        Indica se um arquivo com esse SHA-256 já foi ingerido.
+        """
+        with self.engine.connect() as conn:
+            return self._file_ingested(conn, file_hash)
+
+    def refresh_snapshot(self) -> None:
+        """
+        Grava o snapshot colunar da versão atual do dataset, se ainda não
+        existir. Chamado por fetch_dataframe, e não a cada upload.
+
+        O snapshot é apenas um acelerador de leitura: falhas são registradas
+        e fetch_dataframe volta a ler do SQLite.
+        """
+        if not snapshot_available():
+            return
+
+        try:
+            write_snapshot(self.engine)
+        except Exception:
+            logger.exception("Falha ao gravar o snapshot colunar")
+
+    def rebuild_rollups(self) -> int:
+        """
+        Regenera o rollup diário a partir da tabela `sales` e retorna a nova
+        versão do dataset.
+
+        Como a regeneração costuma seguir correções manuais em `sales`, os
+        snapshots colunares também são descartados.
+        """
+        with self.engine.begin() as conn:
+            version = rebuild_rollups(conn)
+
+        dataset_versions.set(self.engine, version)
+        discard_snapshots(self.engine)
+
+        return version
 
     def fetch_all(self) -> pd.DataFrame:
-        query = text("SELECT * FROM sales")
+        query = text(SALES_SELECT)
 
         with self.engine.connect() as conn:
             df = pd.read_sql(query, conn)
 
         return df
 
-    def fetch_dataframe(self) -> pd.DataFrame:
+    def dataset_version(self) -> int:
+        """
+        Versão atual do dataset (incrementada a cada upload).
         """
-        Retorna todas as vendas como DataFrame.
+        return dataset_versions.refresh(self.engine)
+
+    @timed("fetch_dataframe")
+    def fetch_dataframe(
+        self,
+        columns: Sequence[str] | None = None,
+        compact: bool = False,
+    ) -> pd.DataFrame:
         """
-        query = text("SELECT * FROM sales")
-        return pd.read_sql(query, self.engine)
+        Retorna as vendas como DataFrame, opcionalmente só com `columns`.
+
+        Com `compact`, as colunas são convertidas para os tipos declarados
+        em SALES_DTYPES (categorias, menores inteiros, datetime), reduzindo
+        a memória e acelerando os groupby das análises.
 
-    def search(self, filters: dict, limit: int = 100):
-        base_query = "SELECT * FROM sales WHERE 1=1"
+        Com columnar_snapshot, as colunas são lidas via memory-map do
+        snapshot Arrow da versão atual, gravado na primeira leitura após cada
+        upload; caso contrário, do SQLite. Em ambos os casos
+        data_venda vem como datetime. O frame fica em cache até que um novo
+        upload altere a versão do dataset.
+        """
+        if columns is not None:
+            columns = list(columns)
+            unknown = set(columns) - set(SALES_COLUMNS)
+            if unknown:
+                raise ValueError(f"Colunas inválidas: {', '.join(sorted(unknown))}")
+
+        cache_key = (
+            str(self.engine.url),
+            "sales",
+            tuple(columns) if columns is not None else None,
+            compact,
+        )
+
+        # A versão é lida antes dos dados: se um upload ocorrer no meio,
+        # o frame fica associado à versão antiga e é recarregado depois.
+        version = self.dataset_version()
+
+        df = dataframe_cache.get(cache_key, version)
+        if df is not None:
+            count_rows("fetch_dataframe", len(df))
+            return df
+
+        path = (
+            snapshot_path(self.engine, version)
+            if settings.columnar_snapshot and snapshot_available()
+            else None
+        )
+        df = None
+
+        if path is not None and not path.exists():
+            # Gerado sob demanda: uploads não pagam por um snapshot que
+            # talvez nunca seja lido
+            self.refresh_snapshot()
+
+        if path is not None and path.exists():
+            try:
+                df = read_snapshot(path, columns)
+            except SNAPSHOT_READ_ERRORS:
+                # Um upload pode descartar o snapshot entre a verificação e
+                # a leitura; o SQLite continua sendo a fonte de verdade
+                logger.warning("Snapshot colunar indisponível, lendo do SQLite: {}", path)
+
+        if df is None:
+            selected = columns if columns is not None else list(SALES_COLUMNS)
+            query = text(f"SELECT {', '.join(selected)} FROM sales ORDER BY id")
+            df = pd.read_sql(query, self.engine)
+
+            if "data_venda" in df.columns:
+                df["data_venda"] = pd.to_datetime(
+                    df["data_venda"], errors="coerce", format="ISO8601"
+                )
+
+        if compact:
+            df = compact_frame(df)
+
+        dataframe_cache.put(cache_key, version, df)
+        count_rows("fetch_dataframe", len(df))
+
+        return df.copy(deep=False)
+
+    def has_sales(self) -> bool:
+        """
+        Indica se existe ao menos uma venda persistida.
+        """
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT 1 FROM sales LIMIT 1")).first()
+
+        return row is not None
+
+    def sales_summary(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict:
+        """
+        Equivalente SQL de calculate_sales_metrics, com filtro opcional
+        por período. Lê o rollup diário.
+        """
+        params: dict = {}
+        query = (
+            "SELECT COALESCE(SUM(receita_total), 0) AS total_vendas, "
+            "COALESCE(SUM(numero_transacoes), 0) AS numero_transacoes "
+            f"FROM {ROLLUP_TABLE} WHERE dimensao = 'total'"
+        )
+        query += _date_range_clause(start_date, end_date, params)
+
+        with self.engine.connect() as conn:
+            row = conn.execute(text(query), params).mappings().one()
+
+        total_sales = float(row["total_vendas"])
+        transaction_count = int(row["numero_transacoes"])
+
+        return {
+            "total_vendas": total_sales,
+            "numero_transacoes": transaction_count,
+            "media_por_transacao": (
+                total_sales / transaction_count
+                if transaction_count > 0
+                else 0.0
+            ),
+        }
+
+    def product_summary(self) -> list[dict]:
+        """
+        Equivalente SQL de calculate_product_analysis. Lê o rollup diário.
+        """
+        query = text(
+            "SELECT valor AS nome_produto, "
+            "SUM(unidades_vendidas) AS quantidade_vendida, "
+            "SUM(receita_total) AS total_arrecadado "
+            f"FROM {ROLLUP_TABLE} "
+            "WHERE dimensao = 'nome_produto' AND valor <> '' "
+            "GROUP BY valor "
+            "ORDER BY valor"
+        )
+
+        with self.engine.connect() as conn:
+            return [dict(row) for row in conn.execute(query).mappings()]
+
+    def _has_cost(self, conn) -> bool:
+        # A coluna sempre existe no schema; só há custo se alguma venda
+        # gravada o informou
+        return conn.execute(
+            text("SELECT 1 FROM sales WHERE custo_produto IS NOT NULL LIMIT 1")
+        ).first() is not None
+
+    def has_cost_data(self) -> bool:
+        """
+        Indica se alguma venda gravada tem custo_produto preenchido.
+        """
+        with self.engine.connect() as conn:
+            return self._has_cost(conn)
+
+    def financial_summary(self) -> dict:
+        """
+        Equivalente SQL de calculate_financial_metrics. Lê o rollup diário.
+        """
+        with self.engine.connect() as conn:
+            has_cost = self._has_cost(conn)
+
+            row = conn.execute(
+                text(
+                    "SELECT COALESCE(SUM(receita_total), 0) AS receita, "
+                    "COALESCE(SUM(custo_total), 0) AS custo "
+                    f"FROM {ROLLUP_TABLE} WHERE dimensao = 'total'"
+                )
+            ).mappings().one()
+
+        net_revenue = float(row["receita"])
+
+        if has_cost:
+            total_cost = float(row["custo"])
+            gross_profit = net_revenue - total_cost
+        else:
+            total_cost = None
+            gross_profit = None
+
+        return {
+            "receita_liquida": round(net_revenue, 2),
+            "lucro_bruto": round(gross_profit, 2) if gross_profit is not None else None,
+            "custo_total": round(total_cost, 2) if total_cost is not None else None,
+        }
+
+    def metrics_by_group(
+        self,
+        column: str,
+        value: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Equivalente SQL de metrics_by_region / metrics_by_state.
+        Lê o rollup diário.
+
+        Args:
+            column: dimensão de agrupamento (ex: regiao, estado_cliente)
+            value: restringe o resultado a um único valor da dimensão
+        """
+        if column not in ROLLUP_DIMENSIONS or column == "total":
+            raise ValueError(f"Coluna de agrupamento inválida: {column}")
+
+        params: dict = {"column": column}
+        query = (
+            f"SELECT valor AS {column}, "
+            "SUM(receita_total) AS receita_total, "
+            "SUM(unidades_vendidas) AS unidades_vendidas, "
+            "SUM(numero_transacoes) AS numero_transacoes, "
+            "SUM(custo_total) AS custo_total, "
+            "SUM(lucro_total) AS lucro_total, "
+            "SUM(receita_total) / SUM(numero_transacoes) AS ticket_medio "
+            f"FROM {ROLLUP_TABLE} "
+            "WHERE dimensao = :column AND valor <> ''"
+        )
+
+        if value:
+            query += " AND valor = :value"
+            params["value"] = value
+
+        query += " GROUP BY valor ORDER BY valor"
+
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(query), conn, params=params)
+
+    def rollup_report(
+        self,
+        dimensions: Iterable[str],
+        start_date: date | None = None,
+        end_date: date | None = None,
+        freq: str | None = None,
+    ) -> dict[str, list[dict]]:
+        """
+        Lê, em uma única consulta ao rollup, os agregados de várias
+        dimensões, com filtro opcional por período.
+
+        Retorna, para cada dimensão, uma linha por valor, em ordem. Com
+        `freq` (D, W, M, Q ou Y), inclui também a pseudo-dimensão "periodo",
+        com o total de cada período, rotulado como em trends.
+        """
+        dimensions = list(dict.fromkeys(dimensions))
+        invalid = set(dimensions) - set(ROLLUP_DIMENSIONS)
+        if invalid:
+            raise ValueError(f"Dimensões inválidas: {', '.join(sorted(invalid))}")
+        if freq is not None and freq not in TREND_FREQUENCIES:
+            raise ValueError(f"Frequência inválida: {freq}")
+
+        measures = (
+            "SUM(receita_total) AS receita_total, "
+            "SUM(unidades_vendidas) AS unidades_vendidas, "
+            "SUM(custo_total) AS custo_total, "
+            "SUM(lucro_total) AS lucro_total, "
+            "SUM(numero_transacoes) AS numero_transacoes"
+        )
+        params: dict = {}
+        date_clause = _date_range_clause(start_date, end_date, params)
+        selects = []
+
+        if dimensions:
+            names = ", ".join(f":dimension_{index}" for index in range(len(dimensions)))
+            params.update(
+                {f"dimension_{index}": name for index, name in enumerate(dimensions)}
+            )
+            selects.append(
+                f"SELECT dimensao, valor, {measures} FROM {ROLLUP_TABLE} "
+                f"WHERE dimensao IN ({names}) "
+                "AND (dimensao = 'total' OR valor <> '')"
+                f"{date_clause} "
+                "GROUP BY dimensao, valor"
+            )
+
+        if freq is not None:
+            params["length"] = PERIOD_PREFIX_LENGTHS.get(freq, PERIOD_PREFIX_LENGTHS["D"])
+            selects.append(
+                "SELECT 'periodo' AS dimensao, substr(dia, 1, :length) AS valor, "
+                f"{measures} FROM {ROLLUP_TABLE} "
+                f"WHERE dimensao = 'total' AND dia <> ''{date_clause} "
+                "GROUP BY 2"
+            )
+
+        result: dict[str, list[dict]] = {name: [] for name in dimensions}
+
+        if freq is not None:
+            result["periodo"] = []
+
+        if not selects:
+            return result
+
+        query = " UNION ALL ".join(selects) + " ORDER BY dimensao, valor"
+
+        with self.engine.connect() as conn:
+            for row in conn.execute(text(query), params).mappings():
+                result[row["dimensao"]].append(dict(row))
+
+        if freq is not None and freq not in PERIOD_PREFIX_LENGTHS:
+            result["periodo"] = _group_days_by_period(result["periodo"], freq)
+
+        return result
+
+    def customer_distribution(self) -> dict:
+        """
+        Equivalente SQL de demographic_distribution.
+
+        Considera apenas a primeira venda de cada cliente_id, como o
+        drop_duplicates da versão em pandas.
+        """
+        customers_cte = (
+            "WITH customers AS ("
+            "SELECT * FROM sales WHERE rowid IN "
+            "(SELECT MIN(rowid) FROM sales GROUP BY cliente_id)"
+            ") "
+        )
+
+        distribution_query = " UNION ALL ".join(
+            f"SELECT '{key}' AS chave, {column} AS valor, COUNT(*) AS contagem "
+            f"FROM customers GROUP BY {column}"
+            for key, column in DEMOGRAPHIC_COLUMNS.items()
+        )
+
+        with self.engine.connect() as conn:
+            total = conn.execute(
+                text(customers_cte + "SELECT COUNT(*) FROM customers")
+            ).scalar_one()
+            rows = pd.read_sql(text(customers_cte + distribution_query), conn)
+
+        result: dict = {"total_clientes": int(total)}
+
+        for key in DEMOGRAPHIC_COLUMNS:
+            counts = (
+                rows[rows["chave"] == key]
+                .sort_values("contagem", ascending=False, kind="stable")
+            )
+
+            result[key] = pd.DataFrame({
+                "valor": [
+                    "nan" if value is None else str(value)
+                    for value in counts["valor"]
+                ],
+                "contagem": counts["contagem"].astype(int).values,
+                "percentual": (counts["contagem"] / total * 100).round(2).values,
+            })
+
+        return result
+
+    def daily_series(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        dimension: str = "total",
+        value: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Série diária de receita e transações, lida do rollup e indexada
+        por dia. Com `value`, só as vendas em que `dimension` = `value`.
+        """
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Dimensão inválida: {dimension}")
+
+        params: dict = {"dimension": dimension}
+        query = (
+            "SELECT dia, "
+            "SUM(receita_total) AS receita_total, "
+            "SUM(numero_transacoes) AS numero_transacoes "
+            f"FROM {ROLLUP_TABLE} "
+            "WHERE dimensao = :dimension AND dia <> ''"
+        )
+
+        if value is not None:
+            query += " AND valor = :value"
+            params["value"] = value
+
+        query += _date_range_clause(start_date, end_date, params)
+        query += " GROUP BY dia ORDER BY dia"
+
+        with self.engine.connect() as conn:
+            daily = pd.read_sql(text(query), conn, params=params)
+
+        daily.index = pd.DatetimeIndex(
+            pd.to_datetime(daily.pop("dia"), format="%Y-%m-%d"),
+            name="dia",
+        )
+
+        return daily
+
+    def trends(
+        self,
+        freq: str = "M",
+        start_date: date | None = None,
+        end_date: date | None = None,
+        dimension: str = "total",
+        value: str | None = None,
+        window: int | None = None,
+    ) -> list[dict]:
+        """
+        Equivalente SQL de sales_trends. Reamostra a série diária do rollup.
+
+        Args:
+            freq: frequência temporal (D, W, M, Q, Y)
+            start_date, end_date: período (inclusivo)
+            dimension, value: restringe às vendas com dimension = value
+            window: número de períodos das médias móveis
+        """
+        if freq not in TREND_FREQUENCIES:
+            raise ValueError(f"Frequência inválida: {freq}")
+
+        grouped = resample_daily_series(
+            self.daily_series(start_date, end_date, dimension, value),
+            freq,
+            window,
+        ).round(2)
+
+        # Médias ainda sem períodos suficientes saem como null
+        return grouped.astype(object).where(grouped.notna(), None).to_dict(orient="records")
+
+    def _search_conditions(self, filters: dict) -> tuple[str, dict]:
+        conditions = "1=1"
         params = {}
 
         if "estado" in filters:
-            base_query += " AND estado_cliente = :estado"
+            conditions += " AND estado_cliente = :estado"
             params["estado"] = filters["estado"]
 
         if "cidade" in filters:
-            base_query += " AND cidade_cliente = :cidade"
+            conditions += " AND cidade_cliente = :cidade"
             params["cidade"] = filters["cidade"]
 
         if "produto" in filters:
-            base_query += " AND nome_produto LIKE :produto"
-            params["produto"] = f"%{filters['produto']}%"
+            match = (
+                fts_match_expression(filters["produto"])
+                if fts_enabled(self.engine)
+                else None
+            )
+
+            if match:
+                conditions += (
+                    f" AND id IN (SELECT rowid FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH :produto)"
+                )
+                params["produto"] = match
+            else:
+                conditions += " AND nome_produto LIKE :produto"
+                params["produto"] = f"%{filters['produto']}%"
 
         if "categoria" in filters:
-            base_query += " AND categoria = :categoria"
+            conditions += " AND categoria = :categoria"
             params["categoria"] = filters["categoria"]
 
         if "start_date" in filters:
-            base_query += " AND data_venda >= :start_date"
-            params["start_date"] = filters["start_date"]
+            conditions += " AND data_venda >= :start_date"
+            params["start_date"] = filters["start_date"].isoformat()
 
         if "end_date" in filters:
-            base_query += " AND data_venda <= :end_date"
-            params["end_date"] = filters["end_date"]
+            # data_venda é texto "YYYY-MM-DD HH:MM:SS": compara com o dia
+            # seguinte para incluir o próprio dia final
+            conditions += " AND data_venda < :end_date"
+            params["end_date"] = (filters["end_date"] + timedelta(days=1)).isoformat()
 
         if "min_valor" in filters:
-            base_query += " AND valor_final >= :min_valor"
+            conditions += " AND valor_final >= :min_valor"
             params["min_valor"] = filters["min_valor"]
 
         if "max_valor" in filters:
-            base_query += " AND valor_final <= :max_valor"
+            conditions += " AND valor_final <= :max_valor"
             params["max_valor"] = filters["max_valor"]
 
-        base_query += " ORDER BY data_venda DESC LIMIT :limit"
+        return conditions, params
+
+    def _search_query(
+        self,
+        filters: dict,
+        limit: int,
+        after: tuple[str | None, int] | None = None,
+    ) -> tuple[str, dict]:
+        conditions, params = self._search_conditions(filters)
+
+        if after is not None:
+            after_date, after_id = after
+            params["after_id"] = after_id
+
+            if after_date is None:
+                # Vendas sem data vêm por último na ordem decrescente
+                conditions += " AND data_venda IS NULL AND id < :after_id"
+            else:
+                # Comparação de tupla: o SQLite posiciona o índice direto no
+                # cursor, então qualquer página custa o mesmo que a primeira
+                conditions += " AND (data_venda, id) < (:after_date, :after_id)"
+                params["after_date"] = after_date
+
+        query = (
+            f"SELECT * FROM sales WHERE {conditions} "
+            "ORDER BY data_venda DESC, id DESC LIMIT :limit"
+        )
         params["limit"] = limit
 
+        return query, params
+
+    def search(
+        self,
+        filters: dict,
+        limit: int = 100,
+        after: tuple[str | None, int] | None = None,
+    ):
+        """
+        Busca vendas ordenadas da mais recente para a mais antiga.
+
+        Args:
+            filters: filtros gerados por build_search_filters
+            limit: número máximo de linhas
+            after: chave (data_venda, id) da última linha da página anterior
+        """
+        query, params = self._search_query(filters, limit, after)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(query), params).mappings().all()
+
+            if after is not None and after[0] is not None and len(rows) < limit:
+                # Fim das vendas com data: continua nas vendas sem data
+                query, params = self._search_query(
+                    filters,
+                    limit - len(rows),
+                    after=(None, MAX_ROW_ID),
+                )
+                rows += conn.execute(text(query), params).mappings().all()
+
+        count_rows("search", len(rows))
+
+        return rows
+
+    def iter_search(
+        self,
+        filters: dict,
+        batch_size: int = settings.export_batch_size,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Percorre todas as vendas que atendem aos filtros, em blocos de
+        `batch_size` linhas lidos do cursor, em ordem de inserção.
+
+        Sempre gera ao menos um bloco (vazio, com as colunas) e mantém uma
+        única transação de leitura aberta até o fim, de modo que o
+        resultado reflete um único estado do banco.
+        """
+        conditions, params = self._search_conditions(filters)
+        columns = ["id", *SALES_COLUMNS]
+        query = (
+            f"SELECT {', '.join(columns)} FROM sales "
+            f"WHERE {conditions} ORDER BY id"
+        )
+
+        with self.engine.connect() as conn, conn.begin():
+            # Cursor DBAPI direto: tuplas simples, sem o custo de Row por
+            # linha (os parâmetros :nome são os mesmos do sqlite3)
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(query, params)
+
+                rows = cursor.fetchmany(batch_size)
+                count_rows("iter_search", len(rows))
+                yield pd.DataFrame.from_records(rows, columns=columns)
+
+                while len(rows) == batch_size:
+                    rows = cursor.fetchmany(batch_size)
+                    if rows:
+                        count_rows("iter_search", len(rows))
+                        yield pd.DataFrame.from_records(rows, columns=columns)
+            finally:
+                cursor.close()
+
+    def count_search(self, filters: dict) -> int:
+        """
+        Conta todas as vendas que atendem aos filtros.
+        """
+        conditions, params = self._search_conditions(filters)
+
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text(f"SELECT COUNT(*) FROM sales WHERE {conditions}"),
+                params,
+            ).scalar_one()
+
+    def explain_search(
+        self,
+        filters: dict,
+        limit: int = 100,
+        after: tuple[str | None, int] | None = None,
+    ) -> list[str]:
+        """
+        Retorna o EXPLAIN QUERY PLAN da busca, para conferir quais índices
+        o SQLite escolhe para uma combinação de filtros.
+        """
+        query, params = self._search_query(filters, limit, after)
+
         with self.engine.connect() as conn:
-            return conn.execute(text(base_query), params).mappings().all()
\ No newline at end of file
+            rows = conn.execute(text("EXPLAIN QUERY PLAN " + query), params)
+            return [row.detail for row in rows]
@@ -0,0 +1,253 @@
+from typing import Literal, get_args
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from hanami.core.metrics import timed
+from hanami.core.versioning import bump_dataset_version
+
+ROLLUP_TABLE = "sales_rollup_daily"
+
+# Dimensões mantidas no rollup diário ("total" agrega todas as vendas do dia)
+ROLLUP_DIMENSIONS = (
+    "total",
+    "regiao",
+    "estado_cliente",
+    "nome_produto",
+    "canal_venda",
+)
+
+# Métrica do rollup -> expressão de agregação sobre a coluna de origem
+ROLLUP_MEASURES = {
+    "receita_total": ("valor_final", "SUM"),
+    "unidades_vendidas": ("quantidade", "SUM"),
+    "custo_total": ("custo_produto", "SUM"),
+    "lucro_total": ("margem_lucro", "SUM"),
+}
+
+# Frequências aceitas na série temporal (W = semana de segunda a domingo)
+Frequency = Literal["D", "W", "M", "Q", "Y"]
+TREND_FREQUENCIES: tuple[str, ...] = get_args(Frequency)
+
+CREATE_ROLLUP_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    dimensao TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    receita_total REAL NOT NULL DEFAULT 0,
+    unidades_vendidas NUMERIC NOT NULL DEFAULT 0,
+    custo_total REAL NOT NULL DEFAULT 0,
+    lucro_total REAL NOT NULL DEFAULT 0,
+    numero_transacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimensao, dia, valor)
+) WITHOUT ROWID
+"""
+
+
+def _table_exists(conn: Connection, name: str) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name},
+    ).first()
+    return row is not None
+
+
+def _sales_columns(conn: Connection) -> set[str]:
+    rows = conn.execute(text("PRAGMA table_info(sales)")).mappings().all()
+    return {row["name"] for row in rows}
+
+
+def ensure_rollup_table(conn: Connection) -> None:
+    """
+    Cria a tabela de rollup caso não exista.
+
+    Se a tabela for criada sobre uma base que já possui vendas, ela é
+    preenchida a partir de `sales`.
+    """
+    if _table_exists(conn, ROLLUP_TABLE):
+        return
+
+    conn.execute(text(CREATE_ROLLUP_TABLE))
+
+    if _table_exists(conn, "sales"):
+        update_rollups(conn, after_rowid=0)
+
+
+def update_rollups(conn: Connection, after_rowid: int) -> None:
+    """
+    Soma ao rollup as vendas com rowid maior que `after_rowid`.
+
+    Deve ser executada na mesma transação que inseriu as vendas, para que
+    tabela bruta e rollup nunca fiquem divergentes.
+    """
+    columns = _sales_columns(conn)
+
+    measures = ", ".join(
+        f"COALESCE({func}({source}), 0)" if source in columns else "0"
+        for source, func in ROLLUP_MEASURES.values()
+    )
+    measure_names = ", ".join(ROLLUP_MEASURES)
+    updates = ", ".join(
+        f"{name} = {name} + excluded.{name}"
+        for name in (*ROLLUP_MEASURES, "numero_transacoes")
+    )
+
+    for dimension in ROLLUP_DIMENSIONS:
+        if dimension == "total":
+            value_expr = "''"
+        elif dimension in columns:
+            value_expr = f"COALESCE(CAST({dimension} AS TEXT), '')"
+        else:
+            continue
+
+        conn.execute(
+            text(
+                f"INSERT INTO {ROLLUP_TABLE} "
+                f"(dimensao, valor, dia, {measure_names}, numero_transacoes) "
+                f"SELECT :dimension, {value_expr}, "
+                "COALESCE(substr(data_venda, 1, 10), ''), "
+                f"{measures}, COUNT(*) "
+                "FROM sales WHERE rowid > :after_rowid "
+                "GROUP BY 2, 3 "
+                f"ON CONFLICT (dimensao, dia, valor) DO UPDATE SET {updates}"
+            ),
+            {"dimension": dimension, "after_rowid": after_rowid},
+        )
+
+
+def compute_rollup_deltas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula em memória as linhas de rollup de um bloco de vendas.
+
+    Produz o mesmo resultado que update_rollups produziria para as mesmas
+    linhas, sem precisar reler `sales` após a inserção.
+    """
+    if df.empty:
+        return pd.DataFrame(
+            columns=["dimensao", "valor", "dia", *ROLLUP_MEASURES, "numero_transacoes"]
+        )
+
+    dates = df["data_venda"]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        days = dates.dt.strftime("%Y-%m-%d")
+    else:
+        days = dates.astype("string").str.slice(0, 10)
+    days = days.fillna("").astype(object)
+
+    measures = pd.DataFrame(
+        {
+            name: (
+                pd.to_numeric(df[source], errors="coerce")
+                if source in df.columns
+                else 0
+            )
+            for name, (source, _) in ROLLUP_MEASURES.items()
+        },
+        index=df.index,
+    )
+    measures["numero_transacoes"] = 1
+
+    frames = []
+
+    for dimension in ROLLUP_DIMENSIONS:
+        if dimension != "total" and dimension in df.columns:
+            values = df[dimension]
+            values = values.astype(str).where(values.notna(), "").astype(object)
+        else:
+            values = pd.Series("", index=df.index, dtype=object)
+
+        grouped = (
+            measures
+            .groupby([values.rename("valor"), days.rename("dia")], sort=False)
+            .sum(min_count=0)
+            .reset_index()
+        )
+        grouped.insert(0, "dimensao", dimension)
+        frames.append(grouped)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_rollup_deltas(conn: Connection, deltas: pd.DataFrame) -> None:
+    """
+    Soma ao rollup as linhas calculadas por compute_rollup_deltas.
+    """
+    if deltas.empty:
+        return
+
+    deltas = (
+        deltas
+        .groupby(["dimensao", "valor", "dia"], sort=False)
+        .sum()
+        .reset_index()
+    )
+
+    columns = ["dimensao", "valor", "dia", *ROLLUP_MEASURES, "numero_transacoes"]
+    updates = ", ".join(
+        f"{name} = {name} + excluded.{name}"
+        for name in (*ROLLUP_MEASURES, "numero_transacoes")
+    )
+
+    conn.exec_driver_sql(
+        f"INSERT INTO {ROLLUP_TABLE} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT (dimensao, dia, valor) DO UPDATE SET {updates}",
+        list(deltas[columns].astype(object).itertuples(index=False, name=None)),
+    )
+
+    if (deltas["numero_transacoes"] < 0).any():
+        # Vendas substituídas podem zerar um grupo (ex: produto que deixou
+        # de aparecer no dia); grupos vazios não devem aparecer nos relatórios
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE numero_transacoes <= 0"))
+
+
+def rebuild_rollups(conn: Connection) -> int:
+    """
+    Recria o rollup inteiro a partir de `sales` e incrementa a versão do
+    dataset na mesma transação, invalidando os caches derivados.
+
+    Retorna a nova versão.
+    """
+    conn.execute(text(f"DROP TABLE IF EXISTS {ROLLUP_TABLE}"))
+    conn.execute(text(CREATE_ROLLUP_TABLE))
+
+    if _table_exists(conn, "sales"):
+        update_rollups(conn, after_rowid=0)
+
+    return bump_dataset_version(conn)
+
+
+@timed("resample_daily_series")
+def resample_daily_series(
+    daily: pd.DataFrame,
+    freq: str,
+    window: int | None = None,
+) -> pd.DataFrame:
+    """
+    Agrega a série diária do rollup (índice de datas, colunas receita_total
+    e numero_transacoes) em períodos de `freq`.
+
+    Períodos sem vendas não aparecem, como no agrupamento por data_venda.
+    Com `window`, inclui as médias móveis de receita e transações das
+    últimas `window` períodos do calendário (períodos sem vendas contam
+    como zero); os primeiros window - 1 períodos ficam sem média.
+    """
+    if freq not in TREND_FREQUENCIES:
+        raise ValueError(f"Frequência inválida: {freq}")
+
+    grouped = daily.groupby(daily.index.to_period(freq)).sum()
+    grouped["ticket_medio"] = grouped["receita_total"] / grouped["numero_transacoes"]
+
+    if window and not grouped.empty:
+        calendar = grouped[["receita_total", "numero_transacoes"]].reindex(
+            pd.period_range(grouped.index.min(), grouped.index.max(), freq=freq),
+            fill_value=0,
+        )
+        moving = calendar.rolling(window, min_periods=window).mean()
+        grouped["media_movel_receita"] = moving["receita_total"]
+        grouped["media_movel_transacoes"] = moving["numero_transacoes"]
+
+    grouped.index = grouped.index.astype(str).rename("periodo")
+
+    return grouped.reset_index()
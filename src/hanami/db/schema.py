@@ -0,0 +1,300 @@
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from hanami.core.versioning import CREATE_VERSION_TABLE
+from hanami.db.rollups import ensure_rollup_table, rebuild_rollups
+
+# Colunas persistidas em `sales` e seus tipos no SQLite. Colunas do
+# arquivo fora desta lista são ignoradas na ingestão.
+SALES_COLUMNS = {
+    "id_transacao": "TEXT",
+    "data_venda": "TEXT",
+    "cliente_id": "INTEGER",
+    "idade_cliente": "INTEGER",
+    "genero_cliente": "TEXT",
+    "cidade_cliente": "TEXT",
+    "estado_cliente": "TEXT",
+    "regiao": "TEXT",
+    "nome_produto": "TEXT",
+    "categoria": "TEXT",
+    "quantidade": "INTEGER",
+    "subtotal": "REAL",
+    "desconto_percent": "REAL",
+    "valor_final": "REAL",
+    "custo_produto": "REAL",
+    "margem_lucro": "REAL",
+    "canal_venda": "TEXT",
+    "forma_pagamento": "TEXT",
+    "status_entrega": "TEXT",
+}
+
+# Índice de texto completo (FTS5) sobre os campos livres buscados por termo.
+# categoria, cidade e estado são filtros de igualdade e usam índices comuns.
+FTS_TABLE = "sales_fts"
+FTS_COLUMNS = ("nome_produto",)
+
+# Índices secundários. /data/search ordena por (data_venda, id), então cada
+# filtro de igualdade vem seguido de data_venda; o id (rowid) é incluído
+# implicitamente ao final de todo índice, o que permite paginar por cursor
+# sem ordenação adicional. valor_final fica sem índice de propósito: faixas
+# de valor percorrem idx_sales_data_venda (ver scripts/check_query_plan.py).
+SALES_INDEXES = {
+    "idx_sales_data_venda": ("data_venda",),
+    "idx_sales_estado_data": ("estado_cliente", "data_venda"),
+    "idx_sales_cidade_data": ("cidade_cliente", "data_venda"),
+    "idx_sales_categoria_data": ("categoria", "data_venda"),
+    "idx_sales_cliente": ("cliente_id",),
+}
+
+
+# Garante uma única venda por id_transacao (nulos não conflitam)
+TRANSACTION_INDEX = "idx_sales_id_transacao"
+
+# Arquivos já ingeridos, pelo SHA-256 do conteúdo
+INGESTED_FILES_TABLE = "ingested_files"
+
+CREATE_INGESTED_FILES_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {INGESTED_FILES_TABLE} (
+    sha256 TEXT PRIMARY KEY,
+    arquivo TEXT,
+    linhas_inseridas INTEGER NOT NULL,
+    ingerido_em TEXT NOT NULL
+)
+"""
+
+
+def _create_sales_table_sql() -> str:
+    columns = ",\n    ".join(
+        f"{column} {sql_type}" for column, sql_type in SALES_COLUMNS.items()
+    )
+    return (
+        "CREATE TABLE IF NOT EXISTS sales (\n"
+        "    id INTEGER PRIMARY KEY,\n"
+        f"    {columns}\n"
+        ")"
+    )
+
+
+def _table_columns(conn: Connection, name: str) -> list[str]:
+    rows = conn.execute(text(f"PRAGMA table_info({name})")).mappings().all()
+    return [row["name"] for row in rows]
+
+
+def _migration_sales_table(conn: Connection) -> None:
+    """
+    Cria `sales` com colunas tipadas e chave primária.
+
+    Bases antigas, em que a tabela foi criada implicitamente pelo to_sql,
+    são convertidas preservando a ordem de inserção das linhas.
+    """
+    legacy_columns = _table_columns(conn, "sales")
+
+    if not legacy_columns:
+        conn.execute(text(_create_sales_table_sql()))
+        return
+
+    if "id" in legacy_columns:
+        return
+
+    logger.info("Migrando tabela sales para o schema gerenciado")
+
+    conn.execute(text("ALTER TABLE sales RENAME TO sales_legacy"))
+    conn.execute(text(_create_sales_table_sql()))
+
+    shared = [column for column in SALES_COLUMNS if column in legacy_columns]
+    column_list = ", ".join(shared)
+
+    conn.execute(
+        text(
+            f"INSERT INTO sales ({column_list}) "
+            f"SELECT {column_list} FROM sales_legacy ORDER BY rowid"
+        )
+    )
+    conn.execute(text("DROP TABLE sales_legacy"))
+
+
+def _migration_sales_indexes(conn: Connection) -> None:
+    for name, columns in SALES_INDEXES.items():
+        conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS {name} ON sales ({', '.join(columns)})")
+        )
+
+
+def _migration_keyset_indexes(conn: Connection) -> None:
+    """
+    Recria os índices de busca sem valor_final após data_venda, para que a
+    ordem do índice coincida com a ordenação (data_venda, id) do cursor.
+    """
+    for name in SALES_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    _migration_sales_indexes(conn)
+
+
+def _migration_support_tables(conn: Connection) -> None:
+    conn.execute(text(CREATE_VERSION_TABLE))
+    ensure_rollup_table(conn)
+
+
+def _migration_fts(conn: Connection) -> None:
+    """
+    Cria o índice FTS5 de nome_produto.
+
+    Exclusões e atualizações em `sales` são refletidas por triggers. Novas
+    linhas são indexadas em bloco por index_new_sales, na transação do
+    upload: um trigger AFTER INSERT deixaria a carga várias vezes mais lenta.
+
+    Se o SQLite não tiver suporte a FTS5, a busca continua usando LIKE.
+    """
+    try:
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(FTS_COLUMNS)}, "
+                "content='sales', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+        )
+    except OperationalError:
+        logger.warning("SQLite sem suporte a FTS5: busca por produto usará LIKE")
+        return
+
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON sales BEGIN "
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            "END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+            f"AFTER UPDATE OF {columns} ON sales BEGIN "
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values}); "
+            "END"
+        )
+    )
+
+    # Indexa as vendas já existentes
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def _migration_unique_transactions(conn: Connection) -> None:
+    """
+    Remove vendas repetidas (mesmo id_transacao, mantendo a primeira
+    inserida) e cria o índice único de id_transacao.
+
+    Se alguma linha for removida, o rollup é regenerado, o que também
+    incrementa a versão do dataset.
+    """
+    removed = conn.execute(
+        text(
+            "DELETE FROM sales WHERE id_transacao IS NOT NULL AND id NOT IN ("
+            "SELECT MIN(id) FROM sales WHERE id_transacao IS NOT NULL "
+            "GROUP BY id_transacao)"
+        )
+    ).rowcount
+
+    conn.execute(
+        text(f"CREATE UNIQUE INDEX IF NOT EXISTS {TRANSACTION_INDEX} ON sales (id_transacao)")
+    )
+
+    if removed:
+        logger.warning("Vendas duplicadas removidas | linhas={}", removed)
+        rebuild_rollups(conn)
+
+
+def _migration_ingested_files(conn: Connection) -> None:
+    conn.execute(text(CREATE_INGESTED_FILES_TABLE))
+
+
+# Migrações aplicadas em ordem; a posição (1, 2, ...) é gravada em
+# PRAGMA user_version. Novas migrações devem ser sempre adicionadas ao final.
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _migration_sales_table,
+    _migration_sales_indexes,
+    _migration_support_tables,
+    _migration_fts,
+    _migration_keyset_indexes,
+    _migration_unique_transactions,
+    _migration_ingested_files,
+]
+
+# Bancos cujo schema já foi verificado neste processo, e se têm FTS5
+_SCHEMA_READY: dict[str, bool] = {}
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar_one()
+
+
+def migrate(conn: Connection) -> int:
+    """
+    Aplica as migrações pendentes e retorna a versão final do schema.
+    """
+    current = schema_version(conn)
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+
+        logger.info("Aplicando migração de schema {} ({})", version, migration.__name__)
+        migration(conn)
+        conn.execute(text(f"PRAGMA user_version = {version}"))
+
+    return max(current, len(MIGRATIONS))
+
+
+def init_schema(engine: Engine) -> None:
+    """
+    Garante que o banco está na versão de schema mais recente.
+
+    A verificação é feita uma única vez por processo para cada banco.
+    """
+    key = str(engine.url)
+
+    if key in _SCHEMA_READY:
+        return
+
+    with engine.begin() as conn:
+        migrate(conn)
+        has_fts = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": FTS_TABLE},
+        ).first() is not None
+
+    _SCHEMA_READY[key] = has_fts
+
+
+def index_new_sales(conn: Connection, after_id: int) -> None:
+    """
+    Adiciona ao índice FTS5 as vendas com id maior que `after_id`.
+    """
+    columns = ", ".join(FTS_COLUMNS)
+
+    conn.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM sales WHERE id > :after_id"
+        ),
+        {"after_id": after_id},
+    )
+
+
+def fts_enabled(engine: Engine) -> bool:
+    """
+    Indica se o banco possui o índice FTS5 de produtos.
+    """
+    init_schema(engine)
+    return _SCHEMA_READY[str(engine.url)]
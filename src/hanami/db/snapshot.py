@@ -0,0 +1,250 @@
+import os
+import uuid
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from hanami.core.versioning import get_dataset_version
+from hanami.db.schema import SALES_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow é opcional (extra "columnar")
+    pa = None
+    ipc = None
+
+# Falhas ao ler um snapshot apagado ou truncado por um upload concorrente
+SNAPSHOT_READ_ERRORS = (OSError, pa.ArrowInvalid) if pa is not None else (OSError,)
+
+# Linhas lidas do SQLite por record batch ao gerar o snapshot
+SNAPSHOT_BATCH_SIZE = 100_000
+
+# Vendas em ordem de inserção, no intervalo (id inicial, id final]
+SNAPSHOT_SELECT = (
+    "SELECT " + ", ".join(SALES_COLUMNS) + " FROM sales "
+    "WHERE id > ? AND id <= ? ORDER BY id"
+)
+
+
+def snapshot_available() -> bool:
+    """
+    Indica se o pyarrow está instalado.
+    """
+    return pa is not None
+
+
+def arrow_schema() -> "pa.Schema":
+    """
+    Schema Arrow de `sales`, derivado de SALES_COLUMNS. data_venda é
+    gravada como timestamp para ser lida sem conversão de texto.
+    """
+    types = {
+        "TEXT": pa.string(),
+        "INTEGER": pa.int64(),
+        "REAL": pa.float64(),
+    }
+
+    return pa.schema(
+        [
+            pa.field(column, pa.timestamp("us") if column == "data_venda" else types[sql_type])
+            for column, sql_type in SALES_COLUMNS.items()
+        ]
+    )
+
+
+def snapshot_path(engine: Engine, version: int) -> Optional[Path]:
+    """
+    Caminho do snapshot de uma versão do dataset, ao lado do arquivo do
+    banco (ex: data/processed/hanami.sales.v3.arrow).
+    """
+    database = engine.url.database
+
+    if not database or database == ":memory:":
+        return None
+
+    db_path = Path(database)
+    return db_path.with_name(f"{db_path.stem}.sales.v{version}.arrow")
+
+
+def _timestamps(values: tuple) -> "pa.Array":
+    strings = pa.array(values, type=pa.string())
+
+    try:
+        return strings.cast(pa.timestamp("us"))
+    except pa.ArrowInvalid:
+        # Datas fora do padrão ISO gravado pela ingestão (bases antigas)
+        parsed = pd.to_datetime(pd.Series(values), errors="coerce", format="ISO8601")
+        return pa.array(parsed, type=pa.timestamp("us"), from_pandas=True)
+
+
+def _record_batch(rows: list[tuple], schema: "pa.Schema") -> "pa.RecordBatch":
+    columns = list(zip(*rows))
+
+    try:
+        arrays = [
+            _timestamps(values)
+            if field.name == "data_venda"
+            else pa.array(values, type=field.type)
+            for field, values in zip(schema, columns)
+        ]
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # Valores que o SQLite guardou com outro tipo (ex: REAL em coluna
+        # INTEGER): converte coluna a coluna pelo pandas, como na leitura
+        df = pd.DataFrame.from_records(rows, columns=schema.names)
+        arrays = []
+        for field in schema:
+            values = df[field.name]
+            if field.name == "data_venda":
+                values = pd.to_datetime(values, errors="coerce", format="ISO8601")
+            elif pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+                values = pd.to_numeric(values, errors="coerce")
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _snapshot_metadata(path: Path) -> dict[bytes, bytes]:
+    with pa.memory_map(str(path), "r") as source:
+        return ipc.open_file(source).schema.metadata or {}
+
+
+def _reusable_snapshot(conn: Connection, current: Path) -> Optional[tuple[Path, int]]:
+    """
+    Procura um snapshot anterior cujas linhas continuam intactas em `sales`.
+
+    Como uploads apenas acrescentam linhas, basta que a quantidade de vendas
+    com id até o maior id do snapshot seja a mesma gravada nele.
+    """
+    prefix = current.name.rsplit(".v", 1)[0] + ".v"
+
+    for path in current.parent.glob(prefix + "*.arrow"):
+        try:
+            metadata = _snapshot_metadata(path)
+            max_id = int(metadata[b"max_id"])
+            rows = int(metadata[b"rows"])
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+            continue
+
+        count = conn.execute(
+            text("SELECT COUNT(*) FROM sales WHERE id <= :max_id"),
+            {"max_id": max_id},
+        ).scalar_one()
+
+        if count == rows:
+            return path, max_id
+
+    return None
+
+
+def write_snapshot(engine: Engine) -> Optional[Path]:
+    """
+    Grava `sales` em um arquivo Arrow IPC associado à versão atual.
+
+    A leitura acontece em uma única transação, então versão e linhas são
+    consistentes entre si. Se um snapshot anterior ainda for válido, seus
+    record batches são copiados e só as vendas novas são lidas do SQLite.
+    O arquivo é escrito em um temporário e renomeado ao final; snapshots
+    de versões anteriores são removidos.
+    """
+    if not snapshot_available():
+        return None
+
+    with engine.connect() as conn, conn.begin():
+        version = get_dataset_version(conn)
+        path = snapshot_path(engine, version)
+
+        if path is None or path.exists():
+            return path
+
+        base = _reusable_snapshot(conn, path)
+        after_id = base[1] if base is not None else 0
+
+        max_id, rows = conn.execute(
+            text("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM sales")
+        ).one()
+
+        schema = arrow_schema().with_metadata(
+            {"max_id": str(max_id), "rows": str(rows)}
+        )
+        # Nome exclusivo: leitores concorrentes podem gravar a mesma versão
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+
+        try:
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with ipc.new_file(sink, schema) as writer:
+                    if base is not None:
+                        with pa.memory_map(str(base[0]), "r") as source:
+                            reader = ipc.open_file(source)
+                            for index in range(reader.num_record_batches):
+                                batch = reader.get_batch(index)
+                                writer.write_batch(
+                                    pa.RecordBatch.from_arrays(batch.columns, schema=schema)
+                                )
+
+                    cursor = conn.connection.cursor()
+                    try:
+                        cursor.execute(SNAPSHOT_SELECT, (after_id, max_id))
+                        while batch_rows := cursor.fetchmany(SNAPSHOT_BATCH_SIZE):
+                            writer.write_batch(_record_batch(batch_rows, schema))
+                    finally:
+                        cursor.close()
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    os.replace(tmp_path, path)
+    _remove_stale_snapshots(path)
+
+    logger.info(
+        "Snapshot colunar atualizado | arquivo={} | linhas={} | incremental={}",
+        path.name,
+        rows,
+        base is not None,
+    )
+
+    return path
+
+
+def _remove_stale_snapshots(current: Path) -> None:
+    prefix = current.name.rsplit(".v", 1)[0] + ".v"
+
+    for path in current.parent.glob(prefix + "*.arrow"):
+        if path == current:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            # Ainda mapeado por um leitor (Windows); removido na próxima vez
+            pass
+
+
+def discard_snapshots(engine: Engine) -> None:
+    """
+    Remove todos os snapshots do banco, forçando a próxima gravação a ler
+    `sales` por inteiro (necessário quando vendas são alteradas no lugar).
+    """
+    # A versão 0 (sem uploads) nunca tem snapshot: todos os arquivos saem
+    path = snapshot_path(engine, 0)
+
+    if path is None:
+        return
+
+    _remove_stale_snapshots(path)
+
+
+def read_snapshot(path: Path, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    """
+    Lê o snapshot via memory-map, convertendo apenas as colunas pedidas.
+    """
+    with pa.memory_map(str(path), "r") as source:
+        table = ipc.open_file(source).read_all()
+
+        if columns is not None:
+            table = table.select(list(columns))
+
+        return table.to_pandas()
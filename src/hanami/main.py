@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from hanami.api.metrics import TimedJSONResponse, TimingMiddleware
 from hanami.api.router import router as api_router
+from hanami.core.config import settings
 from hanami.core.logging import setup_logging
+from hanami.services.jobs import ingestion_jobs
+from hanami.services.rendering import render_service
 
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    # Conclui os uploads e renderizações em andamento antes de encerrar
+    ingestion_jobs.shutdown()
+    render_service.shutdown()
+
+
 app = FastAPI(
     title="Hanami API",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
-app.include_router(api_router)
\ No newline at end of file
+app.add_middleware(TimingMiddleware, server_timing=settings.server_timing)
+
+app.include_router(api_router)
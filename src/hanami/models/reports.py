@@ -1,5 +1,5 @@
 from pydantic import BaseModel, RootModel, ConfigDict
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class SalesSummaryResponse(BaseModel):
@@ -88,3 +88,36 @@ class CustomerProfileResponse(BaseModel):
             }
         }
     )
+
+
+class DashboardResponse(BaseModel):
+    vendas: Optional[SalesSummaryResponse] = None
+    financeiro: Optional[FinancialMetricsResponse] = None
+    produtos: Optional[List[ProductAnalysisItem]] = None
+    regional: Optional[List[Dict[str, Any]]] = None
+    estados: Optional[List[Dict[str, Any]]] = None
+    tendencias: Optional[List[Dict[str, Any]]] = None
+    clientes: Optional[CustomerProfileResponse] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "vendas": {
+                    "total_vendas": 250000.0,
+                    "numero_transacoes": 1240,
+                    "media_por_transacao": 201.61
+                },
+                "regional": [
+                    {
+                        "regiao": "Sudeste",
+                        "receita_total": 100000.0,
+                        "unidades_vendidas": 350,
+                        "numero_transacoes": 200,
+                        "custo_total": 60000.0,
+                        "lucro_total": 40000.0,
+                        "ticket_medio": 500.0
+                    }
+                ]
+            }
+        }
+    )
@@ -0,0 +1,84 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class UploadJobResponse(BaseModel):
+    job_id: str
+    arquivo: str
+    status: str
+    linhas_lidas: int
+    linhas_validadas: int
+    linhas_inseridas: int
+    linhas_duplicadas: int = 0
+    erro: Optional[str] = None
+    criado_em: str
+    finalizado_em: Optional[str] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "3f2b9c0d4e5a4b6c8d7e9f0a1b2c3d4e",
+                "arquivo": "vendas.csv",
+                "status": "concluido",
+                "linhas_lidas": 10000,
+                "linhas_validadas": 9980,
+                "linhas_inseridas": 9950,
+                "linhas_duplicadas": 30,
+                "erro": None,
+                "criado_em": "2024-01-31T12:00:00+00:00",
+                "finalizado_em": "2024-01-31T12:00:04+00:00"
+            }
+        }
+    )
+
+
+class UploadBatchResponse(BaseModel):
+    job_id: str
+    status: str
+    arquivos: list[UploadJobResponse]
+    linhas_inseridas: int
+    linhas_duplicadas: int
+    erro: Optional[str] = None
+    criado_em: str
+    finalizado_em: Optional[str] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "9a8b7c6d5e4f4a3b2c1d0e9f8a7b6c5d",
+                "status": "concluido",
+                "arquivos": [
+                    {
+                        "job_id": "3f2b9c0d4e5a4b6c8d7e9f0a1b2c3d4e",
+                        "arquivo": "loja_001_2024-01-31.csv",
+                        "status": "concluido",
+                        "linhas_lidas": 1200,
+                        "linhas_validadas": 1200,
+                        "linhas_inseridas": 1200,
+                        "linhas_duplicadas": 0,
+                        "erro": None,
+                        "criado_em": "2024-01-31T12:00:00+00:00",
+                        "finalizado_em": "2024-01-31T12:00:03+00:00"
+                    },
+                    {
+                        "job_id": "5c4d3e2f1a0b4c9d8e7f6a5b4c3d2e1f",
+                        "arquivo": "loja_002_2024-01-31.csv",
+                        "status": "invalido",
+                        "linhas_lidas": 950,
+                        "linhas_validadas": 950,
+                        "linhas_inseridas": 0,
+                        "linhas_duplicadas": 0,
+                        "erro": "Falhas de validação semântica: valores inválidos em canal_venda",
+                        "criado_em": "2024-01-31T12:00:00+00:00",
+                        "finalizado_em": "2024-01-31T12:00:02+00:00"
+                    }
+                ],
+                "linhas_inseridas": 1200,
+                "linhas_duplicadas": 0,
+                "erro": None,
+                "criado_em": "2024-01-31T12:00:00+00:00",
+                "finalizado_em": "2024-01-31T12:00:03+00:00"
+            }
+        }
+    )
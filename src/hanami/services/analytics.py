@@ -1,6 +1,9 @@
 import pandas as pd
 
+from hanami.core.metrics import timed
 
+
+@timed("calculate_financial_metrics")
 def calculate_financial_metrics(df: pd.DataFrame) -> dict:
     """
     Calcula métricas financeiras básicas.
@@ -22,6 +25,7 @@ def calculate_financial_metrics(df: pd.DataFrame) -> dict:
     }
 
 
+@timed("calculate_sales_metrics")
 def calculate_sales_metrics(df: pd.DataFrame) -> dict:
     """
     Calcula métricas agregadas de vendas.
@@ -41,6 +45,7 @@ def calculate_sales_metrics(df: pd.DataFrame) -> dict:
         "media_por_transacao": float(average_per_transaction),
     }
 
+@timed("calculate_product_analysis")
 def calculate_product_analysis(df: pd.DataFrame) -> list[dict]:
     """
     Gera análise agregada por produto.
@@ -61,7 +66,7 @@ def calculate_product_analysis(df: pd.DataFrame) -> list[dict]:
 
     grouped_df = (
         df
-        .groupby("nome_produto", as_index=False)
+        .groupby("nome_produto", as_index=False, observed=True)
         .agg(
             sold_quantity=("quantidade", "sum"),
             total_revenue=("valor_final", "sum"),
@@ -77,6 +82,7 @@ def calculate_product_analysis(df: pd.DataFrame) -> list[dict]:
 
     return grouped_df.to_dict(orient="records")
 
+@timed("calculate_financial_metrics")
 def calculate_financial_metrics(df: pd.DataFrame) -> dict:
     net_revenue = df["valor_final"].sum()
 
@@ -93,6 +99,7 @@ def calculate_financial_metrics(df: pd.DataFrame) -> dict:
         "custo_total": round(float(total_cost), 2) if total_cost is not None else None,
     }
 
+@timed("metrics_by_region")
 def metrics_by_region(df: pd.DataFrame) -> pd.DataFrame:
     required = {
         "regiao",
@@ -107,7 +114,7 @@ def metrics_by_region(df: pd.DataFrame) -> pd.DataFrame:
         raise ValueError(f"Colunas ausentes: {missing}")
 
     grouped = (
-        df.groupby("regiao")
+        df.groupby("regiao", observed=True)
         .agg(
             receita_total=("valor_final", "sum"),
             unidades_vendidas=("quantidade", "sum"),
@@ -121,6 +128,7 @@ def metrics_by_region(df: pd.DataFrame) -> pd.DataFrame:
 
     return grouped
 
+@timed("demographic_distribution")
 def demographic_distribution(df: pd.DataFrame) -> dict:
     required = {
         "cliente_id",
@@ -144,6 +152,8 @@ def demographic_distribution(df: pd.DataFrame) -> dict:
 
     def build(col):
         counts = customers[col].value_counts(dropna=False)
+        # Em colunas categóricas, categorias sem clientes aparecem com zero
+        counts = counts[counts > 0]
         perc = (counts / total * 100).round(2)
 
         return pd.DataFrame({
@@ -161,6 +171,7 @@ def demographic_distribution(df: pd.DataFrame) -> dict:
         "por_regiao": build("regiao"),
     }
 
+@timed("metrics_by_state")
 def metrics_by_state(df: pd.DataFrame) -> pd.DataFrame:
     required = {
         "estado_cliente",
@@ -177,7 +188,7 @@ def metrics_by_state(df: pd.DataFrame) -> pd.DataFrame:
 
     grouped = (
         df
-        .groupby("estado_cliente")
+        .groupby("estado_cliente", observed=True)
         .agg(
             receita_total=("valor_final", "sum"),
             unidades_vendidas=("quantidade", "sum"),
@@ -191,6 +202,18 @@ def metrics_by_state(df: pd.DataFrame) -> pd.DataFrame:
 
     return grouped
 
+def _sale_dates(df: pd.DataFrame) -> pd.Series:
+    # Converte data_venda sem alterar o DataFrame recebido; frames lidos do
+    # snapshot ou na carga compacta já chegam como datetime
+    dates = df["data_venda"]
+
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+
+    return pd.to_datetime(dates)
+
+
+@timed("calculate_trends")
 def calculate_trends(
     df: pd.DataFrame,
     group_by: str = "day",
@@ -200,26 +223,28 @@ def calculate_trends(
     if "data_venda" not in df.columns:
         raise ValueError("Coluna 'data_venda' não encontrada")
 
-    df["data_venda"] = pd.to_datetime(df["data_venda"])
+    dates = _sale_dates(df)
 
     if group_by == "day":
-        df["period"] = df["data_venda"].dt.date
+        period = dates.dt.date
     elif group_by == "month":
-        df["period"] = df["data_venda"].dt.to_period("M").astype(str)
+        period = dates.dt.to_period("M").astype(str)
     elif group_by == "quarter":
-        df["period"] = df["data_venda"].dt.to_period("Q").astype(str)
+        period = dates.dt.to_period("Q").astype(str)
     else:
         raise ValueError("group_by inválido")
 
+    period = period.rename("period")
+
     if metric == "count":
         grouped = (
-            df.groupby("period")
+            df.groupby(period)
             .size()
             .reset_index(name="value")
         )
     elif metric == "revenue":
         grouped = (
-            df.groupby("period")["valor_final"]
+            df.groupby(period)["valor_final"]
             .sum()
             .reset_index(name="value")
         )
@@ -230,6 +255,7 @@ def calculate_trends(
 
     return grouped.to_dict(orient="records")
 
+@timed("sales_trends")
 def sales_trends(
     df: pd.DataFrame,
     freq: str = "M"  # M = mensal
@@ -238,8 +264,8 @@ def sales_trends(
     Gera análise temporal de vendas.
 
     Args:
-        df: DataFrame de vendas
-        freq: frequência temporal (D, M, Y)
+        df: DataFrame de vendas (não é modificado)
+        freq: frequência temporal (D, W, M, Q, Y)
 
     Returns:
         Lista de dicionários com período e métricas
@@ -250,13 +276,10 @@ def sales_trends(
     if missing:
         raise ValueError(f"Colunas ausentes: {missing}")
 
-    # Garantia crítica
-    df["data_venda"] = pd.to_datetime(df["data_venda"])
-
-    df["periodo"] = df["data_venda"].dt.to_period(freq)
+    periods = _sale_dates(df).dt.to_period(freq).rename("periodo")
 
     grouped = (
-        df.groupby("periodo")
+        df.groupby(periods)
         .agg(
             receita_total=("valor_final", "sum"),
             numero_transacoes=("valor_final", "count"),
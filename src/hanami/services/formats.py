@@ -0,0 +1,286 @@
+import json
+import zlib
+from typing import Iterable, Iterator, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional (extra "columnar")
+    pa = None
+    ipc = None
+    pq = None
+
+# Formatos tabulares aceitos em `format=` e seus media types (Accept)
+MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+STREAM_FORMATS = ("csv", "ndjson", "arrow", "parquet")
+
+ARROW_FORMATS = {"arrow", "parquet"}
+
+_ACCEPT_ALIASES = {
+    "application/jsonl": "ndjson",
+    "application/x-parquet": "parquet",
+}
+
+_SQL_TYPES = {
+    "TEXT": "string",
+    "INTEGER": "int64",
+    "REAL": "float64",
+}
+
+
+def _accepted_format(accept: Optional[str], default: str) -> str:
+    # Tipos do cabeçalho em ordem de preferência (q), estável na ordem original
+    candidates = []
+
+    for position, item in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+
+        candidates.append((-quality, position, media_type.lower()))
+
+    for quality, _, media_type in sorted(candidates):
+        if quality == 0:
+            continue
+
+        for format, format_type in MEDIA_TYPES.items():
+            if media_type == format_type:
+                return format
+
+        if media_type in _ACCEPT_ALIASES:
+            return _ACCEPT_ALIASES[media_type]
+
+    return default
+
+
+def negotiate_format(
+    format: Optional[str],
+    accept: Optional[str],
+    default: str = "json",
+) -> str:
+    """
+    Escolhe o formato da resposta: `format` tem precedência sobre o
+    cabeçalho Accept; sem nenhum dos dois, `default`.
+
+    Raises:
+        ValueError: formato desconhecido ou que requer o pyarrow ausente
+    """
+    if format:
+        format = format.strip().lower()
+
+        if format not in MEDIA_TYPES:
+            raise ValueError(
+                f"Formato inválido: {format}. Use {', '.join(MEDIA_TYPES)}."
+            )
+    else:
+        format = _accepted_format(accept, default)
+
+    if format in ARROW_FORMATS and pa is None:
+        raise ValueError(
+            f"O formato {format} requer o pyarrow (pip install -e .[columnar])"
+        )
+
+    return format
+
+
+def sql_schema(columns: Sequence[str], sql_types: dict[str, str]) -> "pa.Schema":
+    """
+    Schema Arrow para colunas com tipo SQL conhecido (demais como texto).
+    """
+    return pa.schema(
+        [
+            pa.field(column, getattr(pa, _SQL_TYPES.get(sql_types.get(column), "string"))())
+            for column in columns
+        ]
+    )
+
+
+def _record_batch(frame: pd.DataFrame, schema: Optional["pa.Schema"]) -> "pa.RecordBatch":
+    try:
+        return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if schema is None:
+            raise
+
+    # Valores que o SQLite guardou com outro tipo (ex: texto em coluna REAL)
+    frame = frame.copy()
+    for field in schema:
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            frame[field.name] = pd.to_numeric(frame[field.name], errors="coerce")
+        else:
+            frame[field.name] = frame[field.name].astype("string")
+
+    return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+class _ChunkSink:
+    """
+    Arquivo somente-escrita que acumula os bytes gravados até drain().
+
+    Permite repassar a saída dos writers do pyarrow a uma resposta em
+    streaming sem montar o arquivo inteiro em memória.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_csv(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """
+    CSV com cabeçalho, serializado bloco a bloco.
+    """
+    header = True
+
+    for frame in frames:
+        if frame.empty and not header:
+            continue
+
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def iter_ndjson(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """
+    Um objeto JSON por linha, serializado bloco a bloco.
+
+    Usa json.dumps (e não DataFrame.to_json) para que os números saiam
+    iguais aos da resposta JSON.
+    """
+    for frame in frames:
+        if frame.empty:
+            continue
+
+        columns = list(frame.columns)
+        values = frame.astype(object).where(frame.notna(), None)
+
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+            for row in values.itertuples(index=False, name=None)
+        ).encode("utf-8")
+
+
+def _iter_arrow_writer(
+    frames: Iterable[pd.DataFrame],
+    schema: Optional["pa.Schema"],
+    open_writer,
+) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer = None
+
+    for frame in frames:
+        batch = _record_batch(frame, schema)
+
+        if writer is None:
+            # Sem schema explícito, o primeiro bloco define os tipos
+            schema = batch.schema
+            writer = open_writer(sink, schema)
+
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    if writer is None:
+        writer = open_writer(sink, schema or pa.schema([]))
+
+    writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(
+    frames: Iterable[pd.DataFrame],
+    schema: Optional["pa.Schema"] = None,
+) -> Iterator[bytes]:
+    """
+    Stream Arrow IPC com um record batch por bloco.
+    """
+    return _iter_arrow_writer(frames, schema, ipc.new_stream)
+
+
+def iter_parquet(
+    frames: Iterable[pd.DataFrame],
+    schema: Optional["pa.Schema"] = None,
+) -> Iterator[bytes]:
+    """
+    Arquivo Parquet com um row group por bloco.
+    """
+    return _iter_arrow_writer(frames, schema, pq.ParquetWriter)
+
+
+def encode_frames(
+    frames: Iterable[pd.DataFrame],
+    format: str,
+    schema: Optional["pa.Schema"] = None,
+) -> Iterator[bytes]:
+    """
+    Serializa os blocos em um dos STREAM_FORMATS, sob demanda.
+
+    `schema` fixa os tipos Arrow/Parquet; sem ele, são inferidos do
+    primeiro bloco.
+    """
+    if format == "csv":
+        return iter_csv(frames)
+
+    if format == "ndjson":
+        return iter_ndjson(frames)
+
+    if format == "arrow":
+        return iter_arrow(frames, schema)
+
+    if format == "parquet":
+        return iter_parquet(frames, schema)
+
+    raise ValueError(f"Formato sem suporte a streaming: {format}")
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Comprime uma sequência de bytes em gzip, sem acumular a saída.
+    """
+    # wbits 16 + 15: cabeçalho e rodapé gzip em vez de zlib
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
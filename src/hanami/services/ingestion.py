@@ -1,5 +1,25 @@
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterator
+import numpy as np
+import openpyxl
 import pandas as pd
+from loguru import logger
+
+from hanami.core.config import settings
+from hanami.core.metrics import count_rows, timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow é opcional (extra "columnar")
+    pa = None
+    pa_csv = None
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # python-calamine é opcional (extra "excel")
+    CalamineWorkbook = None
 
 
 class InvalidDataError(ValueError):
@@ -40,54 +60,97 @@ VALID_PAYMENT_METHODS = {
 }
 
 
-def load_and_validate_file(file_path: str | Path) -> pd.DataFrame:
-    """
-    Lê arquivos CSV ou XLSX, valida estrutura, tipos e regras semânticas,
-    retornando um DataFrame Pandas confiável.
-    """
+# Quantidade de linhas processadas por vez na ingestão em streaming
+DEFAULT_CHUNK_SIZE = settings.ingestion_chunk_size
 
-    file_path = Path(file_path)
+NUMERIC_COLUMNS = [
+    "valor_final",
+    "subtotal",
+    "desconto_percent",
+    "idade_cliente",
+]
 
-    # Leitura do arquivo conforme extensão
-    if file_path.suffix.lower() == ".csv":
-        df = pd.read_csv(file_path)
-    elif file_path.suffix.lower() in {".xlsx", ".xls"}:
-        df = pd.read_excel(file_path)
-    else:
-        raise InvalidDataError(
-            f"Formato de arquivo não suportado: {file_path.suffix}"
-        )
+CRITICAL_COLUMNS = ["valor_final", "data_venda"]
 
-    # Validação de colunas obrigatórias
-    missing_columns = REQUIRED_COLUMNS - set(df.columns)
+# Tipos declarados das colunas lidas dos arquivos, aplicados já na leitura
+# (as mesmas colunas de SALES_COLUMNS). Colunas fora desta lista não são
+# lidas, já que não seriam persistidas.
+COLUMN_DTYPES = {
+    "id_transacao": "string",
+    "data_venda": "datetime64[ns]",
+    "cliente_id": "Int64",
+    "idade_cliente": "Int64",
+    "genero_cliente": "category",
+    "cidade_cliente": "category",
+    "estado_cliente": "category",
+    "regiao": "category",
+    "nome_produto": "category",
+    "categoria": "category",
+    "quantidade": "Int64",
+    "subtotal": "float64",
+    "desconto_percent": "float64",
+    "valor_final": "float64",
+    "custo_produto": "float64",
+    "margem_lucro": "float64",
+    "canal_venda": "category",
+    "forma_pagamento": "category",
+    "status_entrega": "category",
+}
+
+# Colunas de texto, que nunca falham na conversão
+TEXT_DTYPES = {
+    column: dtype
+    for column, dtype in COLUMN_DTYPES.items()
+    if dtype in ("string", "category")
+}
+
+# Formato de data_venda nos arquivos (AAAA-MM-DD, com hora opcional)
+DATE_FORMAT = "ISO8601"
+
+MAX_REMOVED_ROWS_RATIO = 0.05
+
+
+def _check_required_columns(columns) -> None:
+    missing_columns = REQUIRED_COLUMNS - set(columns)
     if missing_columns:
         raise InvalidDataError(
             f"Colunas obrigatórias ausentes: {', '.join(sorted(missing_columns))}"
         )
 
+
+def _normalize_text(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Padroniza apenas os valores distintos, se continuarem distintos
+        categories = values.cat.categories.astype(str).str.strip().str.lower()
+        if categories.is_unique:
+            return values.cat.rename_categories(categories)
+
+    return values.astype(str).str.strip().str.lower()
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte tipos e padroniza os textos usados nas validações.
+
+    Colunas já lidas com o tipo declarado em COLUMN_DTYPES passam direto.
+    """
     # Conversão de colunas numéricas
-    numeric_columns = [
-        "valor_final",
-        "subtotal",
-        "desconto_percent",
-        "idade_cliente",
-    ]
-
-    for column in numeric_columns:
+    for column in NUMERIC_COLUMNS:
         df[column] = pd.to_numeric(df[column], errors="coerce")
 
     # Conversão de datas
-    df["data_venda"] = pd.to_datetime(df["data_venda"], errors="coerce")
+    df["data_venda"] = pd.to_datetime(
+        df["data_venda"], errors="coerce", format=DATE_FORMAT
+    )
 
     # Padronização de texto
-    df["canal_venda"] = (
-        df["canal_venda"].astype(str).str.strip().str.lower()
-    )
-    df["forma_pagamento"] = (
-        df["forma_pagamento"].astype(str).str.strip().str.lower()
-    )
+    df["canal_venda"] = _normalize_text(df["canal_venda"])
+    df["forma_pagamento"] = _normalize_text(df["forma_pagamento"])
 
-    # Validações semânticas
+    return df
+
+
+def _semantic_errors(df: pd.DataFrame) -> list[str]:
     semantic_errors: list[str] = []
 
     invalid_sales_channel = ~df["canal_venda"].isin(VALID_SALES_CHANNELS)
@@ -108,21 +171,369 @@ def load_and_validate_file(file_path: str | Path) -> pd.DataFrame:
     if invalid_final_value.any():
         semantic_errors.append("valor_final maior que subtotal")
 
+    return semantic_errors
+
+
+def _raise_semantic_errors(semantic_errors: list[str]) -> None:
     if semantic_errors:
         raise InvalidDataError(
             "Falhas de validação semântica: " + "; ".join(semantic_errors)
         )
 
-    # Remoção controlada de linhas críticas nulas
-    total_rows_before = len(df)
-    df = df.dropna(subset=["valor_final", "data_venda"])
-    removed_rows = total_rows_before - len(df)
 
+def _check_removed_rows(removed_rows: int, total_rows: int) -> None:
     if removed_rows > 0:
-        if removed_rows / total_rows_before > 0.05:
+        if removed_rows / total_rows > MAX_REMOVED_ROWS_RATIO:
             raise InvalidDataError(
                 f"{removed_rows} linhas removidas por dados críticos nulos "
-                f"({removed_rows / total_rows_before:.1%} do total)"
+                f"({removed_rows / total_rows:.1%} do total)"
+            )
+
+
+def _used_columns(header: list[str]) -> list[str]:
+    """
+    Colunas do cabeçalho que fazem parte de COLUMN_DTYPES, na ordem do
+    arquivo. Falha logo se faltar alguma coluna obrigatória.
+    """
+    _check_required_columns(header)
+
+    ignored = [column for column in header if column not in COLUMN_DTYPES]
+    if ignored:
+        logger.warning(
+            "Colunas fora do schema de sales ignoradas: {}",
+            ", ".join(ignored),
+        )
+
+    return [column for column in header if column in COLUMN_DTYPES]
+
+
+def _csv_columns(file_path: Path) -> list[str]:
+    return _used_columns(list(pd.read_csv(file_path, nrows=0).columns))
+
+
+def _arrow_convert_options(columns: list[str]) -> "pa_csv.ConvertOptions":
+    arrow_types = {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        # Arquivos exportados com nulos trazem inteiros como "34.0"
+        "Int64": pa.float64(),
+        "float64": pa.float64(),
+        "datetime64[ns]": pa.timestamp("ns"),
+    }
+
+    return pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={column: arrow_types[COLUMN_DTYPES[column]] for column in columns},
+        timestamp_parsers=[pa_csv.ISO8601],
+        strings_can_be_null=True,
+    )
+
+
+def _arrow_parse_options() -> "pa_csv.ParseOptions":
+    # Campos entre aspas podem conter quebras de linha, como no pandas
+    return pa_csv.ParseOptions(newlines_in_values=True)
+
+
+def _declared_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas inteiras lidas como float64 viram Int64 quando todos os
+    valores são inteiros.
+    """
+    for column in df.columns:
+        if COLUMN_DTYPES.get(column) != "Int64" or df[column].dtype != np.float64:
+            continue
+
+        values = df[column].to_numpy()
+        missing = np.isnan(values)
+
+        # Montado direto dos arrays: astype("Int64") é bem mais lento
+        if (values[~missing] % 1 == 0).all():
+            df[column] = pd.arrays.IntegerArray(
+                np.where(missing, 0, values).astype(np.int64), missing
             )
 
     return df
+
+
+def _arrow_to_frame(data: "pa.Table") -> pd.DataFrame:
+    return _declared_integers(data.to_pandas())
+
+
+def _read_csv_pandas(file_path: Path, columns: list[str], chunk_size: int | None = None):
+    # Caminho tolerante: só os textos têm tipo na leitura; números e datas
+    # inválidos viram nulos em _normalize
+    return pd.read_csv(
+        file_path,
+        usecols=columns,
+        dtype={column: TEXT_DTYPES[column] for column in columns if column in TEXT_DTYPES},
+        chunksize=chunk_size,
+    )
+
+
+def _read_csv(file_path: Path) -> pd.DataFrame:
+    """
+    Lê o CSV inteiro com o leitor do pyarrow e os tipos de COLUMN_DTYPES.
+
+    Se algum valor não puder ser convertido (ex: texto em valor_final), ou
+    sem pyarrow, lê com o pandas e deixa a conversão para _normalize.
+    """
+    columns = _csv_columns(file_path)
+
+    if pa_csv is not None:
+        try:
+            return _arrow_to_frame(
+                pa_csv.read_csv(
+                    file_path,
+                    parse_options=_arrow_parse_options(),
+                    convert_options=_arrow_convert_options(columns),
+                )
+            )
+        except pa.ArrowInvalid as exc:
+            logger.info("Leitura tipada falhou, usando leitura tolerante | erro={}", exc)
+
+    return _read_csv_pandas(file_path, columns)
+
+
+@timed("load_and_validate_file")
+def load_and_validate_file(file_path: str | Path) -> pd.DataFrame:
+    """
+    Lê arquivos CSV ou XLSX, valida estrutura, tipos e regras semânticas,
+    retornando um DataFrame Pandas confiável.
+    """
+
+    file_path = Path(file_path)
+
+    # Leitura do arquivo conforme extensão
+    if file_path.suffix.lower() == ".csv":
+        df = _read_csv(file_path)
+    elif file_path.suffix.lower() in {".xlsx", ".xls"}:
+        df = pd.concat(
+            _read_excel_in_chunks(file_path, DEFAULT_CHUNK_SIZE), ignore_index=True
+        )
+    else:
+        raise InvalidDataError(
+            f"Formato de arquivo não suportado: {file_path.suffix}"
+        )
+
+    # Validação de colunas obrigatórias
+    _check_required_columns(df.columns)
+
+    df = _normalize(df)
+
+    # Validações semânticas
+    _raise_semantic_errors(_semantic_errors(df))
+
+    # Remoção controlada de linhas críticas nulas
+    total_rows_before = len(df)
+    df = df.dropna(subset=CRITICAL_COLUMNS)
+    removed_rows = total_rows_before - len(df)
+
+    _check_removed_rows(removed_rows, total_rows_before)
+    count_rows("load_and_validate_file", len(df))
+
+    return df
+
+
+def _read_csv_in_chunks(file_path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Versão em blocos de _read_csv.
+
+    Se a leitura tipada falhar no meio do arquivo, a leitura tolerante
+    recomeça do início e descarta os registros já entregues. Os dois
+    leitores contam registros da mesma forma (linhas em branco ignoradas,
+    quebras de linha entre aspas dentro do campo), ao contrário de pular
+    linhas físicas do arquivo.
+    """
+    columns = _csv_columns(file_path)
+    delivered = 0
+
+    if pa_csv is not None:
+        pending: list["pa.RecordBatch"] = []
+        pending_rows = 0
+
+        try:
+            reader = pa_csv.open_csv(
+                file_path,
+                parse_options=_arrow_parse_options(),
+                convert_options=_arrow_convert_options(columns),
+            )
+
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+
+                if pending_rows >= chunk_size:
+                    yield _arrow_to_frame(pa.Table.from_batches(pending))
+                    delivered += pending_rows
+                    pending, pending_rows = [], 0
+
+            if pending_rows:
+                yield _arrow_to_frame(pa.Table.from_batches(pending))
+            return
+        except pa.ArrowInvalid as exc:
+            logger.info(
+                "Leitura tipada falhou, usando leitura tolerante | linha={} | erro={}",
+                delivered + 1,
+                exc,
+            )
+
+    for chunk in _read_csv_pandas(file_path, columns, chunk_size):
+        if delivered:
+            skipped = min(delivered, len(chunk))
+            chunk = chunk.iloc[skipped:]
+            delivered -= skipped
+
+            if chunk.empty:
+                continue
+
+        yield chunk
+
+
+@contextmanager
+def _excel_rows(file_path: Path) -> Iterator[Iterator[tuple]]:
+    """
+    Linhas da primeira planilha, como sequências de valores, sem montar a
+    planilha inteira como objetos Python.
+
+    Usa o python-calamine, se instalado; senão o openpyxl em modo somente
+    leitura (apenas .xlsx).
+    """
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(str(file_path))
+        yield workbook.get_sheet_by_index(0).iter_rows()
+        return
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _rows_to_frame(rows: list, header: list[str], columns: list[str]) -> pd.DataFrame:
+    width = max(map(len, rows))
+    if width > len(header):
+        # Células preenchidas à direita do cabeçalho
+        header = header + [f"Unnamed: {index}" for index in range(len(header), width)]
+
+    df = pd.DataFrame.from_records(rows, columns=header[:width])
+
+    for column in columns:
+        if column not in df.columns:
+            df[column] = None
+
+    df = df[columns]
+
+    # O calamine devolve células vazias como ""
+    text = df.select_dtypes(include="object").columns
+    df[text] = df[text].replace("", None)
+
+    # Linhas em branco são ignoradas, como nos CSVs
+    df = df[df.notna().any(axis=1)]
+
+    for column in columns:
+        if column in TEXT_DTYPES:
+            values = df[column]
+            if values.dtype == np.float64 and (values.dropna() % 1 == 0).all():
+                # O calamine lê números inteiros como float ("123.0")
+                values = values.astype("Int64")
+            df[column] = values.astype(TEXT_DTYPES[column])
+
+    return _declared_integers(df)
+
+
+def _read_excel_in_chunks(file_path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê a planilha linha a linha, convertendo blocos de `chunk_size` linhas
+    com as colunas de COLUMN_DTYPES, como a leitura em blocos dos CSVs.
+    """
+    if CalamineWorkbook is None and file_path.suffix.lower() == ".xls":
+        # O openpyxl não lê .xls: sem o calamine, o arquivo é lido de uma vez
+        df = pd.read_excel(file_path)
+        columns = _used_columns(list(df.columns))
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size][columns].copy()
+        return
+
+    with _excel_rows(file_path) as rows:
+        first = next(rows, ())
+        header = [
+            str(value) if value not in (None, "") else f"Unnamed: {index}"
+            for index, value in enumerate(first)
+        ]
+        columns = _used_columns(header)
+
+        batch = []
+        delivered = False
+
+        for row in rows:
+            batch.append(row)
+
+            if len(batch) >= chunk_size:
+                yield _rows_to_frame(batch, header, columns)
+                batch = []
+                delivered = True
+
+        if batch or not delivered:
+            yield _rows_to_frame(batch or [()], header, columns)
+
+
+def _read_in_chunks(file_path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if file_path.suffix.lower() == ".csv":
+        yield from _read_csv_in_chunks(file_path, chunk_size)
+    elif file_path.suffix.lower() in {".xlsx", ".xls"}:
+        yield from _read_excel_in_chunks(file_path, chunk_size)
+    else:
+        raise InvalidDataError(
+            f"Formato de arquivo não suportado: {file_path.suffix}"
+        )
+
+
+def iter_validated_chunks(
+    file_path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_chunk: Callable[[int, int], None] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Versão em streaming de load_and_validate_file.
+
+    Lê o arquivo em blocos de `chunk_size` linhas e entrega cada bloco já
+    validado e limpo, mantendo o uso de memória limitado ao tamanho do
+    bloco. As regras continuam valendo para o arquivo inteiro: falhas
+    semânticas e o limite de linhas nulas só são avaliados ao final, e a
+    exceção é levantada pelo próprio gerador. Quem consome deve, portanto,
+    gravar os blocos em uma única transação e desfazê-la em caso de erro.
+
+    `on_chunk`, se informado, recebe (linhas lidas, linhas válidas) de cada
+    bloco, para acompanhamento de progresso.
+    """
+    file_path = Path(file_path)
+
+    semantic_errors: list[str] = []
+    total_rows = 0
+    removed_rows = 0
+
+    for index, chunk in enumerate(_read_in_chunks(file_path, chunk_size)):
+        if index == 0:
+            _check_required_columns(chunk.columns)
+
+        chunk = _normalize(chunk)
+
+        for error in _semantic_errors(chunk):
+            if error not in semantic_errors:
+                semantic_errors.append(error)
+
+        total_rows += len(chunk)
+        clean = chunk.dropna(subset=CRITICAL_COLUMNS)
+        removed_rows += len(chunk) - len(clean)
+
+        if on_chunk is not None:
+            on_chunk(len(chunk), len(clean))
+
+        # Após a primeira falha o arquivo já é inválido: segue apenas
+        # validando para reportar todos os problemas encontrados.
+        if not semantic_errors:
+            yield clean
+
+    _raise_semantic_errors(semantic_errors)
+    _check_removed_rows(removed_rows, total_rows)
@@ -0,0 +1,562 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+import pandas as pd
+from loguru import logger
+
+from hanami.core.config import settings
+from hanami.core.metrics import count_rows, record_stage
+from hanami.db.repository import DuplicateFileError, IncomingFile
+from hanami.services.ingestion import (
+    DEFAULT_CHUNK_SIZE,
+    InvalidDataError,
+    iter_validated_chunks,
+)
+
+# Blocos validados aguardando inserção, gravados pelos processos de leitura
+SPOOL_DIR = Path("data/processed/spool")
+
+# Quantidade de jobs finalizados mantidos em memória para consulta
+MAX_FINISHED_JOBS = 1000
+
+JOB_PENDING = "pendente"
+JOB_PARSING = "validando"
+JOB_INSERTING = "inserindo"
+JOB_DONE = "concluido"
+JOB_INVALID = "invalido"
+JOB_ERROR = "erro"
+JOB_DUPLICATE = "duplicado"
+
+FINISHED_STATUSES = {JOB_DONE, JOB_INVALID, JOB_ERROR, JOB_DUPLICATE}
+
+# Fila de progresso do processo de leitura atual (definida em _init_worker)
+_progress_queue: Optional[multiprocessing.Queue] = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _init_worker(progress_queue: multiprocessing.Queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _parse_to_spool(
+    job_id: str, file_path: str, chunk_size: int
+) -> tuple[list[str], int, int, float]:
+    """
+    Executada em um processo do pool: lê e valida o arquivo bloco a bloco,
+    gravando cada bloco limpo em SPOOL_DIR.
+
+    Retorna os caminhos dos blocos na ordem do arquivo, os totais de linhas
+    lidas e validadas e os segundos gastos (as métricas ficam no processo
+    da API). Em caso de erro os blocos já gravados são removidos e a
+    exceção é repassada.
+    """
+    started = time.perf_counter()
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    paths: list[str] = []
+    totals = [0, 0]
+
+    def report(parsed: int, validated: int) -> None:
+        totals[0] += parsed
+        totals[1] += validated
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, parsed, validated))
+
+    # Sinaliza que o job saiu da fila do pool
+    report(0, 0)
+
+    try:
+        chunks = iter_validated_chunks(file_path, chunk_size, on_chunk=report)
+
+        for index, chunk in enumerate(chunks):
+            path = SPOOL_DIR / f"{job_id}_{index:06d}.pkl"
+            chunk.to_pickle(path)
+            paths.append(str(path))
+    except BaseException:
+        _remove_files(paths)
+        raise
+
+    return paths, totals[0], totals[1], time.perf_counter() - started
+
+
+def _remove_files(paths: list[str]) -> None:
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
+
+class JobRegistry:
+    """
+    Estado em memória de jobs em segundo plano, consultado pelos endpoints
+    de status. Mantém os `max_finished` jobs finalizados mais recentes.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, **fields: Any) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": JOB_PENDING,
+            **fields,
+            "erro": None,
+            "criado_em": _now(),
+            "finalizado_em": None,
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def apply(self, job_id: str, change: Callable[[dict[str, Any]], None]) -> None:
+        """
+        Aplica `change` ao job sob o lock do registro (ex: somar contadores).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                change(job)
+
+    def finish(self, job_id: str, status: str, **fields: Any) -> None:
+        self.update(job_id, status=status, finalizado_em=_now(), **fields)
+
+    def _prune(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED_STATUSES
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+class IngestionJobManager:
+    """
+    Executa uploads em segundo plano.
+
+    A leitura e a validação rodam em um pool de processos, fora do event
+    loop e sem disputar o GIL com a API. As inserções rodam em uma única
+    thread de escrita, já que o SQLite aceita apenas um escritor por vez.
+    O estado de cada job fica em um JobRegistry e é consultado por get().
+    """
+
+    def __init__(self, max_workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.jobs = JobRegistry()
+        self._lock = threading.Lock()
+        self._parsers: Optional[ProcessPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._progress: Optional[multiprocessing.Queue] = None
+        self._listener: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        file_path: Path,
+        filename: str,
+        repository,
+        file_hash: Optional[str] = None,
+        on_duplicate: str = "ignore",
+    ) -> dict[str, Any]:
+        """
+        Registra um job para o arquivo já salvo em `file_path` e agenda sua
+        leitura. `repository` é o SalesRepository usado na inserção.
+
+        Se `file_hash` pertencer a um arquivo já ingerido, o job termina na
+        hora com status "duplicado", sem ler o arquivo.
+        """
+        job = self.jobs.create(
+            arquivo=filename,
+            linhas_lidas=0,
+            linhas_validadas=0,
+            linhas_inseridas=0,
+            linhas_duplicadas=0,
+        )
+        job_id = job["job_id"]
+
+        if file_hash is not None and repository.is_file_ingested(file_hash):
+            self._skip_duplicate(job_id, file_path)
+            return self.get(job_id)
+
+        self._start()
+
+        future = self._parsers.submit(
+            _parse_to_spool, job_id, str(file_path), self.chunk_size
+        )
+        future.add_done_callback(
+            lambda done: self._on_parsed(
+                job_id, file_path, repository, file_hash, on_duplicate, done
+            )
+        )
+
+        return self.get(job_id)
+
+    def submit_batch(
+        self,
+        files: list[tuple[Path, str, Optional[str]]],
+        repository,
+        on_duplicate: str = "ignore",
+    ) -> dict[str, Any]:
+        """
+        Registra um lote de arquivos já salvos em disco, dados como
+        (caminho, nome, hash).
+
+        Cada arquivo tem seu próprio job e é lido e validado em paralelo no
+        pool de processos. Quando todos terminam, os válidos são gravados
+        juntos em uma única transação (SalesRepository.save_files).
+        """
+        file_jobs: list[str] = []
+        pending: list[tuple[str, Path, Optional[str]]] = []
+        hashes: set[str] = set()
+
+        for file_path, filename, file_hash in files:
+            job = self.jobs.create(
+                arquivo=filename,
+                linhas_lidas=0,
+                linhas_validadas=0,
+                linhas_inseridas=0,
+                linhas_duplicadas=0,
+            )
+            file_jobs.append(job["job_id"])
+
+            if file_hash is not None and (
+                file_hash in hashes or repository.is_file_ingested(file_hash)
+            ):
+                self._skip_duplicate(job["job_id"], file_path)
+                continue
+
+            if file_hash is not None:
+                hashes.add(file_hash)
+            pending.append((job["job_id"], file_path, file_hash))
+
+        batch_id = self.jobs.create(arquivos=file_jobs)["job_id"]
+
+        if not pending:
+            self.jobs.finish(batch_id, JOB_DONE)
+            return self.get_batch(batch_id)
+
+        self._start()
+
+        # Arquivos válidos, na ordem do envio, e quantos ainda estão sendo lidos
+        parsed: list[Optional[tuple[str, Path, Optional[str], list[str]]]] = [None] * len(pending)
+        remaining = [len(pending)]
+
+        def on_parsed(position: int, future: Future) -> None:
+            job_id, file_path, file_hash = pending[position]
+            spool_paths = self._parsed_spool(job_id, file_path, future)
+
+            with self._lock:
+                if spool_paths is not None:
+                    parsed[position] = (job_id, file_path, file_hash, spool_paths)
+                remaining[0] -= 1
+                last = remaining[0] == 0
+
+            if last:
+                self._writer.submit(
+                    self._insert_batch,
+                    batch_id,
+                    [item for item in parsed if item is not None],
+                    repository,
+                    on_duplicate,
+                )
+
+        for position, (job_id, file_path, _) in enumerate(pending):
+            future = self._parsers.submit(
+                _parse_to_spool, job_id, str(file_path), self.chunk_size
+            )
+            future.add_done_callback(
+                lambda done, position=position: on_parsed(position, done)
+            )
+
+        return self.get_batch(batch_id)
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        job = self.jobs.get(job_id)
+
+        # Lotes compartilham o registro, mas são consultados via get_batch
+        if job is None or "arquivos" in job:
+            return None
+
+        return job
+
+    def get_batch(self, batch_id: str) -> Optional[dict[str, Any]]:
+        """
+        Estado do lote com o job de cada arquivo e os totais inseridos.
+        """
+        batch = self.jobs.get(batch_id)
+
+        if batch is None or "arquivos" not in batch:
+            return None
+
+        files = [
+            job
+            for job_id in batch["arquivos"]
+            if (job := self.jobs.get(job_id)) is not None
+        ]
+
+        return {
+            **batch,
+            "arquivos": files,
+            "linhas_inseridas": sum(job["linhas_inseridas"] for job in files),
+            "linhas_duplicadas": sum(job["linhas_duplicadas"] for job in files),
+        }
+
+    def shutdown(self) -> None:
+        """
+        Aguarda os jobs em andamento e encerra os pools.
+        """
+        if self._parsers is None:
+            return
+
+        self._parsers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self._progress.put(None)
+        self._listener.join()
+
+        self._parsers = None
+        self._writer = None
+        self._progress = None
+        self._listener = None
+
+    def _start(self) -> None:
+        # Os pools são criados no primeiro upload, e não na importação,
+        # para que scripts e testes não iniciem processos sem necessidade.
+        with self._lock:
+            if self._parsers is not None:
+                return
+
+            # "spawn" evita herdar, via fork, locks de threads da API
+            # (pool de conexões, logger) em estado inconsistente
+            context = multiprocessing.get_context("spawn")
+            self._progress = context.Queue()
+            self._parsers = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._progress,),
+            )
+            self._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="hanami-writer"
+            )
+            self._listener = threading.Thread(
+                target=self._consume_progress,
+                name="hanami-ingestion-progress",
+                daemon=True,
+            )
+            self._listener.start()
+
+    def _consume_progress(self) -> None:
+        while (message := self._progress.get()) is not None:
+            job_id, parsed, validated = message
+
+            def add_progress(job: dict[str, Any]) -> None:
+                if job["status"] in {JOB_PENDING, JOB_PARSING}:
+                    job["status"] = JOB_PARSING
+                    job["linhas_lidas"] += parsed
+                    job["linhas_validadas"] += validated
+
+            self.jobs.apply(job_id, add_progress)
+
+    def _on_parsed(
+        self,
+        job_id: str,
+        file_path: Path,
+        repository,
+        file_hash: Optional[str],
+        on_duplicate: str,
+        future: Future,
+    ) -> None:
+        spool_paths = self._parsed_spool(job_id, file_path, future)
+
+        if spool_paths is None:
+            return
+
+        self._writer.submit(
+            self._insert,
+            job_id,
+            file_path,
+            repository,
+            spool_paths,
+            file_hash,
+            on_duplicate,
+        )
+
+    def _parsed_spool(
+        self, job_id: str, file_path: Path, future: Future
+    ) -> Optional[list[str]]:
+        """
+        Resultado da leitura de um arquivo: os blocos validados, ou None se
+        o arquivo falhou (e o job já foi finalizado).
+        """
+        try:
+            spool_paths, parsed, validated, seconds = future.result()
+        except Exception as exc:
+            self._fail(job_id, file_path, exc)
+            return None
+
+        record_stage("parse_file", seconds)
+        count_rows("parse_file", validated)
+
+        # Os totais do processo prevalecem sobre mensagens de progresso que
+        # ainda estejam na fila
+        self.jobs.update(
+            job_id,
+            status=JOB_INSERTING,
+            linhas_lidas=parsed,
+            linhas_validadas=validated,
+        )
+
+        return spool_paths
+
+    def _insert(
+        self,
+        job_id: str,
+        file_path: Path,
+        repository,
+        spool_paths: list[str],
+        file_hash: Optional[str],
+        on_duplicate: str,
+    ) -> None:
+        try:
+            rows_inserted = repository.save_chunks(
+                self._read_spool(job_id, spool_paths),
+                load_pragmas=settings.bulk_load_pragmas,
+                on_duplicate=on_duplicate,
+                file_hash=file_hash,
+                filename=file_path.name,
+            )
+        except DuplicateFileError:
+            # Outro upload do mesmo arquivo foi gravado enquanto este era lido
+            self._skip_duplicate(job_id, file_path)
+            return
+        except Exception as exc:
+            self._fail(job_id, file_path, exc)
+            return
+        finally:
+            _remove_files(spool_paths)
+
+        self._finish_inserted(job_id, file_path, rows_inserted)
+
+    def _insert_batch(
+        self,
+        batch_id: str,
+        files: list[tuple[str, Path, Optional[str], list[str]]],
+        repository,
+        on_duplicate: str,
+    ) -> None:
+        try:
+            results = repository.save_files(
+                [
+                    IncomingFile(
+                        self._read_spool(job_id, spool_paths),
+                        file_hash,
+                        file_path.name,
+                    )
+                    for job_id, file_path, file_hash, spool_paths in files
+                ],
+                load_pragmas=settings.bulk_load_pragmas,
+                on_duplicate=on_duplicate,
+            )
+        except Exception:
+            logger.exception("Erro inesperado ao gravar lote | arquivos={}", len(files))
+
+            for job_id, file_path, _, _ in files:
+                file_path.unlink(missing_ok=True)
+                self.jobs.finish(
+                    job_id, JOB_ERROR, erro="Erro interno no servidor", linhas_inseridas=0
+                )
+
+            self.jobs.finish(batch_id, JOB_ERROR, erro="Erro interno no servidor")
+            return
+        finally:
+            for _, _, _, spool_paths in files:
+                _remove_files(spool_paths)
+
+        for (job_id, file_path, _, _), rows_inserted in zip(files, results):
+            if rows_inserted is None:
+                self._skip_duplicate(job_id, file_path)
+            else:
+                self._finish_inserted(job_id, file_path, rows_inserted)
+
+        self.jobs.finish(batch_id, JOB_DONE)
+
+    def _finish_inserted(self, job_id: str, file_path: Path, rows_inserted: int) -> None:
+        duplicated = self.jobs.get(job_id)["linhas_validadas"] - rows_inserted
+        self.jobs.finish(
+            job_id,
+            JOB_DONE,
+            linhas_inseridas=rows_inserted,
+            linhas_duplicadas=duplicated,
+        )
+
+        logger.info(
+            "Upload concluído com sucesso | arquivo={} | linhas_processadas={} | linhas_duplicadas={}",
+            file_path.name,
+            rows_inserted,
+            duplicated,
+        )
+
+    def _skip_duplicate(self, job_id: str, file_path: Path) -> None:
+        logger.info("Upload ignorado, arquivo já ingerido | arquivo={}", file_path.name)
+
+        file_path.unlink(missing_ok=True)
+        self.jobs.finish(job_id, JOB_DUPLICATE, linhas_inseridas=0)
+
+    def _read_spool(self, job_id: str, spool_paths: list[str]) -> Iterator[pd.DataFrame]:
+        for path in spool_paths:
+            chunk = pd.read_pickle(path)
+            Path(path).unlink(missing_ok=True)
+
+            yield chunk
+
+            rows = len(chunk)
+            self.jobs.apply(
+                job_id,
+                lambda job: job.update(linhas_inseridas=job["linhas_inseridas"] + rows),
+            )
+
+    def _fail(self, job_id: str, file_path: Path, exc: Exception) -> None:
+        if isinstance(exc, InvalidDataError):
+            logger.error(
+                "Erro de validação no upload | arquivo={} | erro={}",
+                file_path.name,
+                exc,
+            )
+            status, message = JOB_INVALID, str(exc)
+        else:
+            logger.opt(exception=exc).error(
+                "Erro inesperado durante upload | arquivo={}",
+                file_path.name,
+            )
+            status, message = JOB_ERROR, "Erro interno no servidor"
+
+        file_path.unlink(missing_ok=True)
+        self.jobs.finish(job_id, status, erro=message, linhas_inseridas=0)
+
+
+ingestion_jobs = IngestionJobManager(max_workers=settings.ingestion_workers)
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Table
+
+from hanami.core.config import settings
+from hanami.core.metrics import timed
+from hanami.core.storage import ArtifactCache
+from hanami.services.jobs import JOB_DONE, JOB_ERROR, JobRegistry
+
+REPORTS_DIR = Path("data/processed/reports")
+
+JOB_RENDERING = "renderizando"
+
+REPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "pdf": "application/pdf",
+}
+
+
+def write_json_report(path: str, report: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def write_pdf_report(path: str, report: dict) -> None:
+    """
+    Gera o PDF com a tabela e o gráfico de receita por região.
+
+    Usa a API orientada a objetos do matplotlib (Figure + canvas Agg), sem
+    o estado global do pyplot.
+    """
+    regional = report["regional"]
+
+    doc = SimpleDocTemplate(path, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    elements.append(
+        Paragraph("Relatório Analítico - Hanami API", styles["Title"])
+    )
+
+    # ----- TABELA -----
+    table_data = [
+        ["Região", "Receita Total", "Unidades Vendidas", "Ticket Médio"]
+    ]
+
+    for row in regional:
+        table_data.append([
+            row["regiao"],
+            f"{row['receita_total']:.2f}",
+            int(row["unidades_vendidas"]),
+            f"{row['ticket_medio']:.2f}",
+        ])
+
+    elements.append(Table(table_data))
+
+    # ----- GRÁFICO -----
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.subplots()
+    axes.bar(
+        [row["regiao"] for row in regional],
+        [row["receita_total"] for row in regional],
+    )
+    axes.set_title("Receita por Região")
+    figure.tight_layout()
+
+    chart = BytesIO()
+    figure.savefig(chart, format="png")
+    chart.seek(0)
+
+    elements.append(
+        Image(chart, width=400, height=250)
+    )
+
+    doc.build(elements)
+
+
+RENDERERS = {
+    "json": write_json_report,
+    "pdf": write_pdf_report,
+}
+
+
+class ReportRequiredError(ValueError):
+    """
+    O artefato não está em cache (ex: removido por tamanho ou idade) e
+    nenhum relatório foi informado para renderizá-lo.
+    """
+    pass
+
+
+class RenderService:
+    """
+    Renderiza relatórios em um pool de processos dedicado.
+
+    A geração de gráficos e PDFs é CPU-bound; fora do processo da API ela
+    não disputa o GIL com as requisições. Os arquivos vão para um
+    ArtifactCache, e pedidos simultâneos da mesma chave compartilham a
+    mesma renderização.
+    """
+
+    def __init__(self, cache: ArtifactCache, max_workers: int):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.jobs = JobRegistry()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, format: str, report: Optional[dict]) -> Future:
+        """
+        Retorna um Future com o caminho do artefato de `key`.
+
+        Se o artefato já estiver em cache o Future volta resolvido e
+        `report` pode ser None. Sem `report` e sem o artefato, levanta
+        ReportRequiredError.
+        """
+        suffix = f".{format}"
+
+        with self._lock:
+            path = self.cache.lookup(key, suffix)
+
+            if path is not None:
+                done: Future = Future()
+                done.set_result(path)
+                return done
+
+            if key in self._in_flight:
+                self.cache.count_hit()
+                return self._in_flight[key]
+
+            if report is None:
+                raise ReportRequiredError("Relatório necessário para renderizar o artefato")
+
+            self._start()
+
+            self.cache.count_miss()
+            result: Future = Future()
+            tmp_path = self.cache.temp_path(key)
+
+            rendering = self._pool.submit(RENDERERS[format], str(tmp_path), report)
+            # Só depois de aceito pelo pool, para que uma falha ao agendar
+            # não deixe um Future que nunca será resolvido
+            self._in_flight[key] = result
+
+        def publish(rendered: Future) -> None:
+            try:
+                rendered.result()
+                result.set_result(self.cache.publish(key, suffix, tmp_path))
+            except Exception as exc:
+                tmp_path.unlink(missing_ok=True)
+                logger.opt(exception=exc).error(
+                    "Erro ao renderizar relatório | formato={}", format
+                )
+                result.set_exception(exc)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+
+        rendering.add_done_callback(publish)
+
+        return result
+
+    async def render(self, key: str, format: str, report: Optional[dict]) -> Path:
+        """
+        Versão aguardável de submit, para uso nos endpoints async.
+        """
+        rendering = self.submit(key, format, report)
+
+        if rendering.done():
+            # Artefato já em cache: nada a medir
+            return rendering.result()
+
+        with timed("render"):
+            return await asyncio.wrap_future(rendering)
+
+    def submit_job(self, key: str, format: str, report: Optional[dict]) -> dict[str, Any]:
+        """
+        Agenda a renderização e retorna um job consultável por get_job.
+
+        O job só é criado depois que a renderização foi aceita, para que
+        uma falha ao agendar não deixe um job eternamente em andamento.
+        """
+        rendering = self.submit(key, format, report)
+
+        job = self.jobs.create(formato=format, arquivo=None)
+        job_id = job["job_id"]
+        self.jobs.update(job_id, status=JOB_RENDERING)
+
+        def finish(rendered: Future) -> None:
+            try:
+                path = rendered.result()
+            except Exception:
+                self.jobs.finish(job_id, JOB_ERROR, erro="Erro ao renderizar relatório")
+            else:
+                self.jobs.finish(job_id, JOB_DONE, arquivo=str(path))
+
+        rendering.add_done_callback(finish)
+
+        return self.jobs.get(job_id)
+
+    def get_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _start(self) -> None:
+        # Criado no primeiro uso; "spawn" pelos mesmos motivos do pool de
+        # ingestão (não herdar locks de threads da API)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+
+report_cache = ArtifactCache(
+    REPORTS_DIR,
+    max_bytes=settings.report_cache_max_bytes,
+    max_age_seconds=settings.report_cache_max_age_seconds,
+)
+
+render_service = RenderService(report_cache, max_workers=settings.render_workers)
@@ -0,0 +1,183 @@
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+from hanami.core.metrics import timed
+from hanami.db.repository import SalesRepository
+
+# Seções disponíveis em /reports/dashboard, na ordem da resposta
+REPORT_SECTIONS = (
+    "vendas",
+    "financeiro",
+    "produtos",
+    "regional",
+    "estados",
+    "tendencias",
+    "clientes",
+)
+
+# Dimensão do rollup lida por cada seção ("tendencias" usa os períodos e
+# "clientes" consulta as vendas brutas)
+SECTION_DIMENSIONS = {
+    "vendas": "total",
+    "financeiro": "total",
+    "produtos": "nome_produto",
+    "regional": "regiao",
+    "estados": "estado_cliente",
+}
+
+GROUP_METRICS = [
+    "receita_total",
+    "unidades_vendidas",
+    "numero_transacoes",
+    "custo_total",
+    "lucro_total",
+    "ticket_medio",
+]
+
+
+def _round(value):
+    # Mesmo arredondamento do DataFrame.round usado nos endpoints individuais
+    return float(np.round(value, 2)) if isinstance(value, float) else value
+
+
+def _ticket(row: dict) -> float:
+    return row["receita_total"] / row["numero_transacoes"]
+
+
+def _sales_section(aggregates: dict) -> dict:
+    total_sales = float(sum(row["receita_total"] for row in aggregates["total"]))
+    transaction_count = int(sum(row["numero_transacoes"] for row in aggregates["total"]))
+
+    return {
+        "total_vendas": total_sales,
+        "numero_transacoes": transaction_count,
+        "media_por_transacao": (
+            total_sales / transaction_count
+            if transaction_count > 0
+            else 0.0
+        ),
+    }
+
+
+def _financial_section(aggregates: dict, has_cost: bool) -> dict:
+    net_revenue = float(sum(row["receita_total"] for row in aggregates["total"]))
+
+    # Sem custo informado o rollup soma zero; como em financial_summary,
+    # custo e lucro ficam nulos em vez de uma margem de 100%
+    if not has_cost:
+        return {
+            "receita_liquida": round(net_revenue, 2),
+            "lucro_bruto": None,
+            "custo_total": None,
+        }
+
+    total_cost = float(sum(row["custo_total"] for row in aggregates["total"]))
+
+    return {
+        "receita_liquida": round(net_revenue, 2),
+        "lucro_bruto": round(net_revenue - total_cost, 2),
+        "custo_total": round(total_cost, 2),
+    }
+
+
+def _products_section(aggregates: dict) -> list[dict]:
+    return [
+        {
+            "nome_produto": row["valor"],
+            "quantidade_vendida": row["unidades_vendidas"],
+            "total_arrecadado": row["receita_total"],
+        }
+        for row in aggregates["nome_produto"]
+    ]
+
+
+def _group_section(aggregates: dict, dimension: str) -> list[dict]:
+    return [
+        {
+            dimension: row["valor"],
+            **{
+                metric: _round(_ticket(row) if metric == "ticket_medio" else row[metric])
+                for metric in GROUP_METRICS
+            },
+        }
+        for row in aggregates[dimension]
+    ]
+
+
+def _trends_section(aggregates: dict) -> list[dict]:
+    return [
+        {
+            "periodo": row["valor"],
+            "receita_total": _round(row["receita_total"]),
+            "numero_transacoes": row["numero_transacoes"],
+            "ticket_medio": _round(_ticket(row)),
+        }
+        for row in aggregates["periodo"]
+    ]
+
+
+def customer_profile(repo: SalesRepository) -> dict:
+    """
+    Perfil demográfico no formato de /reports/customer-profile.
+    """
+    profile = repo.customer_distribution()
+
+    return {
+        "total_clientes": profile["total_clientes"],
+        "genero": profile["por_genero"].to_dict(orient="records"),
+        "faixa_etaria": profile["por_faixa_etaria"].to_dict(orient="records"),
+        "cidade": profile["por_cidade"].to_dict(orient="records"),
+        "estado": profile["por_estado"].to_dict(orient="records"),
+        "regiao": profile["por_regiao"].to_dict(orient="records"),
+    }
+
+
+@timed("build_report")
+def build_report(
+    repo: SalesRepository,
+    sections: Iterable[str] = REPORT_SECTIONS,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    freq: str = "M",
+) -> dict:
+    """
+    Calcula as seções pedidas a partir de uma única leitura do rollup.
+
+    Todas as seções baseadas no rollup (vendas, financeiro, produtos,
+    regional, estados e tendencias) saem da mesma consulta; "clientes"
+    depende das vendas brutas e faz uma consulta própria. O filtro de
+    período não se aplica a "clientes".
+    """
+    sections = list(dict.fromkeys(sections))
+    invalid = set(sections) - set(REPORT_SECTIONS)
+    if invalid:
+        raise ValueError(f"Seções inválidas: {', '.join(sorted(invalid))}")
+
+    aggregates = repo.rollup_report(
+        dimensions=[
+            SECTION_DIMENSIONS[section]
+            for section in sections
+            if section in SECTION_DIMENSIONS
+        ],
+        start_date=start_date,
+        end_date=end_date,
+        freq=freq if "tendencias" in sections else None,
+    )
+
+    builders = {
+        "vendas": lambda: _sales_section(aggregates),
+        "financeiro": lambda: _financial_section(aggregates, repo.has_cost_data()),
+        "produtos": lambda: _products_section(aggregates),
+        "regional": lambda: _group_section(aggregates, "regiao"),
+        "estados": lambda: _group_section(aggregates, "estado_cliente"),
+        "tendencias": lambda: _trends_section(aggregates),
+        "clientes": lambda: customer_profile(repo),
+    }
+
+    return {
+        section: builders[section]()
+        for section in REPORT_SECTIONS
+        if section in sections
+    }
@@ -1,3 +1,5 @@
+import base64
+import json
 from datetime import date
 
 def build_search_filters(
@@ -37,3 +39,30 @@ def build_search_filters(
         filters["max_valor"] = max_valor
 
     return filters
+
+
+def encode_cursor(data_venda: str | None, row_id: int) -> str:
+    """
+    Gera o cursor opaco que aponta para depois da venda informada.
+    """
+    payload = json.dumps([data_venda, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str | None, int]:
+    """
+    Lê um cursor gerado por encode_cursor.
+
+    Raises:
+        ValueError: se o cursor não for válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data_venda, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Cursor inválido") from exc
+
+    if not isinstance(row_id, int) or not (data_venda is None or isinstance(data_venda, str)):
+        raise ValueError("Cursor inválido")
+
+    return data_venda, row_id
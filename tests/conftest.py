@@ -0,0 +1,37 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Banco, logs e arquivos em data/ dos testes ficam em um diretório
+# temporário. O banco precisa ser definido antes de qualquer import de
+# hanami, que cria o engine na importação.
+WORKDIR = Path(tempfile.mkdtemp(prefix="hanami-tests-"))
+os.environ["HANAMI_DB_PATH"] = str(WORKDIR / "data" / "processed" / "hanami.db")
+
+from hanami.db.connection import create_sqlite_engine  # noqa: E402
+from hanami.db.repository import SalesRepository  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir():
+    """
+    Executa os testes a partir de WORKDIR, onde ficam data/ e logs/.
+    """
+    previous = Path.cwd()
+    os.chdir(WORKDIR)
+    yield WORKDIR
+    os.chdir(previous)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    sqlite_engine = create_sqlite_engine(tmp_path / "hanami.db")
+    yield sqlite_engine
+    sqlite_engine.dispose()
+
+
+@pytest.fixture
+def repo(engine):
+    return SalesRepository(engine)
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from generate_sales import generate_sales
+
+from hanami.services.analytics import (
+    calculate_financial_metrics,
+    calculate_product_analysis,
+    calculate_sales_metrics,
+    demographic_distribution,
+    metrics_by_region,
+    metrics_by_state,
+    sales_trends,
+)
+
+DEMOGRAPHIC_KEYS = ("por_genero", "por_faixa_etaria", "por_cidade", "por_estado", "por_regiao")
+
+
+@pytest.fixture
+def loaded(repo):
+    """
+    Repositório com vendas e o frame de referência lido dele.
+    """
+    repo.save_dataframe(next(generate_sales(600, 3)))
+    return repo, repo.fetch_dataframe()
+
+
+def assert_records_equal(actual: list[dict], expected: list[dict]) -> None:
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(actual), pd.DataFrame(expected), check_dtype=False, atol=0.011
+    )
+
+
+def test_summaries_match_pandas(loaded):
+    repo, df = loaded
+
+    assert_records_equal([repo.sales_summary()], [calculate_sales_metrics(df)])
+    assert_records_equal([repo.financial_summary()], [calculate_financial_metrics(df)])
+    assert_records_equal(repo.product_summary(), calculate_product_analysis(df))
+
+
+def test_sales_summary_with_period_matches_pandas(loaded):
+    repo, df = loaded
+    start, end = pd.Timestamp("2023-03-01"), pd.Timestamp("2023-06-30")
+    days = df["data_venda"].dt.normalize()
+
+    assert_records_equal(
+        [repo.sales_summary(start.date(), end.date())],
+        [calculate_sales_metrics(df[(days >= start) & (days <= end)])],
+    )
+
+
+@pytest.mark.parametrize("column, reference", [
+    ("regiao", metrics_by_region),
+    ("estado_cliente", metrics_by_state),
+])
+def test_group_metrics_match_pandas(loaded, column, reference):
+    repo, df = loaded
+
+    assert_records_equal(
+        repo.metrics_by_group(column).to_dict(orient="records"),
+        reference(df).to_dict(orient="records"),
+    )
+
+
+def test_customer_distribution_matches_pandas(loaded):
+    repo, df = loaded
+    actual = repo.customer_distribution()
+    expected = demographic_distribution(df)
+
+    assert actual["total_clientes"] == expected["total_clientes"]
+    for key in DEMOGRAPHIC_KEYS:
+        assert_records_equal(
+            actual[key].sort_values("valor").to_dict(orient="records"),
+            expected[key].sort_values("valor").to_dict(orient="records"),
+        )
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M", "Q", "Y"])
+def test_trends_match_pandas(loaded, freq):
+    repo, df = loaded
+
+    assert_records_equal(repo.trends(freq=freq), sales_trends(df, freq=freq))
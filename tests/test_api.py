@@ -0,0 +1,445 @@
+import asyncio
+import dataclasses
+import gzip
+import io
+import time
+import zipfile
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from generate_sales import generate_sales, write_sales
+
+from hanami.db.repository import SalesRepository
+from hanami.services.formats import MEDIA_TYPES
+from hanami.services.jobs import FINISHED_STATUSES
+
+pa_ipc = pytest.importorskip("pyarrow.ipc")
+pq = pytest.importorskip("pyarrow.parquet")
+
+ROWS = 2_000
+SEED = 42
+
+# Espera máxima pela conclusão do job de ingestão
+UPLOAD_TIMEOUT_SECONDS = 120
+
+REPORTS = [
+    "/reports/sales-summary",
+    "/reports/product-analysis",
+    "/reports/financial-metrics",
+    "/reports/regional-performance",
+    "/reports/regional-performance?estado=SP",
+    "/reports/customer-profile",
+    "/reports/dashboard",
+    "/reports/download?format=json",
+]
+
+
+def upload(client: TestClient, path) -> dict:
+    with path.open("rb") as content:
+        job = client.post("/upload/", files={"file": (path.name, content, "text/csv")}).json()
+
+    deadline = time.monotonic() + UPLOAD_TIMEOUT_SECONDS
+    while job["status"] not in FINISHED_STATUSES and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/upload/jobs/{job['job_id']}").json()
+
+    return job
+
+
+@pytest.fixture(scope="module")
+def sales():
+    return next(generate_sales(ROWS, SEED))
+
+
+@pytest.fixture(scope="module")
+def sales_file(workdir):
+    return write_sales(workdir / "data" / "raw" / "vendas_teste.csv", ROWS, SEED)
+
+
+@pytest.fixture(scope="module")
+def client(workdir, sales_file):
+    """
+    API com o banco de teste já carregado pelo upload do arquivo gerado.
+    """
+    from hanami.main import app
+
+    with TestClient(app) as test_client:
+        job = upload(test_client, sales_file)
+        assert job["status"] == "concluido", job
+        assert job["linhas_inseridas"] == ROWS
+
+        yield test_client
+
+
+def test_reupload_is_reported_as_duplicate(client, sales_file):
+    job = upload(client, sales_file)
+
+    assert job["status"] == "duplicado"
+    assert job["linhas_inseridas"] == 0
+
+
+def test_upload_checks_duplicates_off_the_event_loop(client, sales_file, monkeypatch):
+    threads = []
+    is_file_ingested = SalesRepository.is_file_ingested
+
+    def recording(self, file_hash):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("threadpool")
+        return is_file_ingested(self, file_hash)
+
+    monkeypatch.setattr(SalesRepository, "is_file_ingested", recording)
+
+    assert upload(client, sales_file)["status"] == "duplicado"
+    assert threads == ["threadpool"]
+
+
+@pytest.mark.parametrize("url", REPORTS)
+def test_reports_respond(client, url):
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_sales_summary_matches_generated_data(client, sales):
+    summary = client.get("/reports/sales-summary").json()
+
+    assert summary["numero_transacoes"] == ROWS
+    assert summary["total_vendas"] == pytest.approx(sales["valor_final"].sum())
+
+
+def test_financial_metrics_match_generated_data(client, sales):
+    financial = client.get("/reports/financial-metrics").json()
+
+    assert financial["custo_total"] == pytest.approx(sales["custo_produto"].sum())
+    assert financial["lucro_bruto"] == pytest.approx(
+        sales["valor_final"].sum() - sales["custo_produto"].sum()
+    )
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M", "Q", "Y"])
+def test_trends_cover_all_sales(client, sales, freq):
+    response = client.get("/analytics/trends", params={"freq": freq})
+
+    assert response.status_code == 200
+    series = response.json()
+    assert sum(point["numero_transacoes"] for point in series) == ROWS
+    assert sum(point["receita_total"] for point in series) == pytest.approx(
+        sales["valor_final"].sum(), abs=0.01 * len(series)
+    )
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M", "Q", "Y"])
+def test_dashboard_trends_match_analytics_trends(client, freq):
+    dashboard = client.get(
+        "/reports/dashboard", params={"secoes": "tendencias", "freq": freq}
+    )
+    trends = client.get("/analytics/trends", params={"freq": freq}).json()
+
+    assert dashboard.status_code == 200
+    assert [
+        (point["periodo"], point["numero_transacoes"])
+        for point in dashboard.json()["tendencias"]
+    ] == [(point["periodo"], point["numero_transacoes"]) for point in trends]
+
+
+def test_trends_filtered_by_state(client, sales):
+    series = client.get("/analytics/trends", params={"freq": "M", "estado": "SP"}).json()
+
+    assert sum(point["numero_transacoes"] for point in series) == int(
+        (sales["estado_cliente"] == "SP").sum()
+    )
+
+
+@pytest.mark.parametrize("canal", ["Online", "online", " ONLINE "])
+def test_trends_channel_filter_ignores_case(client, sales, canal):
+    response = client.get("/analytics/trends", params={"freq": "Y", "canal": canal})
+
+    assert response.status_code == 200
+    assert sum(point["numero_transacoes"] for point in response.json()) == int(
+        (sales["canal_venda"] == "Online").sum()
+    )
+
+
+def test_search_filters_and_counts(client, sales):
+    response = client.get(
+        "/data/search", params={"estado": "SP", "limit": 10, "incluir_total": True}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 10
+    assert body["total_resultados"] == int((sales["estado_cliente"] == "SP").sum())
+    assert all(item["estado_cliente"] == "SP" for item in body["items"])
+
+
+def test_search_pages_through_all_results(client):
+    seen = []
+    params = {"categoria": "Móveis", "limit": 50}
+
+    while True:
+        body = client.get("/data/search", params=params).json()
+        seen.extend(item["id"] for item in body["items"])
+
+        if body["next_cursor"] is None:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    total = client.get(
+        "/data/search", params={"categoria": "Móveis", "incluir_total": True}
+    ).json()["total_resultados"]
+
+    assert len(seen) == len(set(seen)) == total
+
+
+def read_tabular(content: bytes, format: str) -> pd.DataFrame:
+    if format == "csv":
+        return pd.read_csv(io.BytesIO(content))
+    if format == "ndjson":
+        return pd.read_json(io.BytesIO(content), lines=True)
+    if format == "arrow":
+        return pa_ipc.open_stream(content).read_all().to_pandas()
+    return pq.read_table(io.BytesIO(content)).to_pandas()
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson", "arrow", "parquet"])
+def test_search_formats_match_json(client, format):
+    params = {"estado": "SP", "limit": 25}
+    expected = client.get("/data/search", params=params).json()
+
+    response = client.get("/data/search", params={**params, "format": format})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(MEDIA_TYPES[format])
+    assert response.headers["x-next-cursor"] == expected["next_cursor"]
+    frame = read_tabular(response.content, format)
+    assert frame["id"].tolist() == [item["id"] for item in expected["items"]]
+    assert frame["valor_final"].tolist() == pytest.approx(
+        [item["valor_final"] for item in expected["items"]]
+    )
+
+
+@pytest.mark.parametrize("url, key", [
+    ("/reports/product-analysis", None),
+    # Em JSON, um objeto por região; nos formatos tabulares, uma linha
+    ("/reports/regional-performance", "regiao"),
+])
+def test_report_format_chosen_by_accept(client, url, key):
+    body = client.get(url).json()
+    expected = pd.DataFrame(body) if key is None else pd.DataFrame.from_dict(body, orient="index")
+
+    response = client.get(url, headers={"Accept": MEDIA_TYPES["arrow"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(MEDIA_TYPES["arrow"])
+    frame = read_tabular(response.content, "arrow")
+    if key is not None:
+        frame = frame.set_index(key).rename_axis(None)
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson", "parquet"])
+def test_export_streams_every_sale(client, sales, format):
+    response = client.get("/data/export", params={"format": format})
+
+    assert response.status_code == 200
+    assert f'filename="vendas.{format}"' in response.headers["content-disposition"]
+    frame = read_tabular(response.content, format)
+    assert sorted(frame["id_transacao"]) == sorted(sales["id_transacao"])
+    assert frame["valor_final"].sum() == pytest.approx(sales["valor_final"].sum())
+
+
+def test_export_gzip_with_filters(client, sales):
+    response = client.get("/data/export", params={"estado": "SP", "gzip": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="vendas.csv.gz"' in response.headers["content-disposition"]
+    frame = pd.read_csv(io.BytesIO(gzip.decompress(response.content)))
+    assert len(frame) == int((sales["estado_cliente"] == "SP").sum())
+    assert set(frame["estado_cliente"]) == {"SP"}
+
+
+def test_export_rejects_json(client):
+    assert client.get("/data/export", params={"format": "json"}).status_code == 400
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/data/search", params={"format": "xml"}).status_code == 400
+    assert client.get("/reports/product-analysis", params={"format": "xml"}).status_code == 400
+
+
+def test_search_rejects_invalid_cursor(client):
+    response = client.get("/data/search", params={"cursor": "nao-e-um-cursor"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido"
+
+
+def test_search_without_results(client):
+    assert client.get("/data/search", params={"estado": "XX"}).status_code == 404
+
+
+def test_conditional_get_answers_304_for_current_etag(client):
+    first = client.get("/reports/sales-summary")
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert "must-revalidate" in first.headers["cache-control"]
+
+    for header in [etag, f"W/{etag}", f'"outro", {etag}', "*"]:
+        cached = client.get("/reports/sales-summary", headers={"If-None-Match": header})
+
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    assert client.get(
+        "/reports/sales-summary", headers={"If-None-Match": '"outro"'}
+    ).status_code == 200
+
+
+def test_etag_depends_on_params_and_accept_but_not_their_order(client):
+    def etag(url, **headers):
+        return client.get(url, headers=headers).headers["etag"]
+
+    url = "/reports/product-analysis?sort_by=quantidade_vendida&format=json"
+
+    assert etag(url) == etag("/reports/product-analysis?format=json&sort_by=quantidade_vendida")
+    assert etag(url) != etag("/reports/product-analysis?sort_by=total_arrecadado&format=json")
+    assert etag("/reports/product-analysis") != etag(
+        "/reports/product-analysis", Accept="text/csv"
+    )
+
+
+def test_etag_changes_with_dataset_version(client):
+    from hanami.core.versioning import bump_dataset_version, dataset_versions
+    from hanami.db.connection import engine
+
+    etag = client.get("/reports/dashboard").headers["etag"]
+    download_etag = client.get("/reports/download?format=json").headers["etag"]
+
+    assert client.get(
+        "/reports/download?format=json", headers={"If-None-Match": download_etag}
+    ).status_code == 304
+
+    # Como um upload que alterou o dataset
+    with engine.begin() as conn:
+        version = bump_dataset_version(conn)
+    dataset_versions.set(engine, version)
+
+    response = client.get("/reports/dashboard", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.headers["etag"].startswith(f'"v{version}-')
+    assert client.get(
+        "/reports/download?format=json", headers={"If-None-Match": download_etag}
+    ).status_code == 200
+
+
+def _zip(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "limits, files",
+    [
+        ({"zip_max_entries": 2}, {"a.csv": b"x", "b.csv": b"x", "leia.txt": b"x"}),
+        # Compacta para poucos bytes, mas passa do limite descompactado
+        ({"zip_max_uncompressed_bytes": 1024 * 1024}, {"a.csv": b"0" * (2 * 1024 * 1024)}),
+    ],
+)
+def test_batch_rejects_zip_over_limits(client, workdir, monkeypatch, limits, files):
+    from hanami.api import upload as upload_api
+
+    monkeypatch.setattr(
+        upload_api, "settings", dataclasses.replace(upload_api.settings, **limits)
+    )
+    before = set((workdir / "data" / "raw").iterdir())
+
+    response = client.post(
+        "/upload/batch",
+        files=[("files", ("lote.zip", _zip(files), "application/zip"))],
+    )
+
+    assert response.status_code == 400
+    assert "ZIP recusado" in response.json()["detail"]
+    assert set((workdir / "data" / "raw").iterdir()) == before
+
+
+def wait_render_job(client: TestClient, job: dict) -> dict:
+    deadline = time.monotonic() + UPLOAD_TIMEOUT_SECONDS
+    while job["status"] not in FINISHED_STATUSES and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/reports/jobs/{job['job_id']}").json()
+
+    return job
+
+
+@pytest.mark.parametrize("format, media_type", [
+    ("json", "application/json"),
+    ("pdf", "application/pdf"),
+])
+def test_render_job_serves_the_direct_download(client, format, media_type):
+    response = client.get("/reports/download", params={"format": format, "modo": "job"})
+
+    assert response.status_code == 202
+    job = wait_render_job(client, response.json())
+    assert job["status"] == "concluido"
+    assert job["formato"] == format
+
+    from_job = client.get(job["url"])
+    direct = client.get("/reports/download", params={"format": format})
+
+    assert from_job.status_code == direct.status_code == 200
+    assert from_job.headers["content-type"].startswith(media_type)
+    assert from_job.content == direct.content
+
+
+def test_render_job_not_found(client):
+    assert client.get("/reports/jobs/inexistente").status_code == 404
+    assert client.get("/reports/jobs/inexistente/arquivo").status_code == 404
+
+
+def test_render_job_file_before_and_after_cache_removal(client, workdir):
+    from hanami.services.jobs import JOB_DONE
+    from hanami.services.rendering import render_service
+
+    job_id = render_service.jobs.create(formato="json", arquivo=None)["job_id"]
+
+    assert client.get(f"/reports/jobs/{job_id}").json()["status"] == "pendente"
+    assert client.get(f"/reports/jobs/{job_id}/arquivo").status_code == 409
+
+    render_service.jobs.finish(job_id, JOB_DONE, arquivo=str(workdir / "removido.json"))
+
+    assert client.get(f"/reports/jobs/{job_id}/arquivo").status_code == 410
+
+
+@pytest.mark.parametrize("modo", ["direto", "job"])
+def test_download_survives_eviction_after_cache_check(client, monkeypatch, modo):
+    from hanami.services.rendering import report_cache
+
+    # O artefato some entre a verificação do endpoint e o agendamento
+    monkeypatch.setattr(report_cache, "exists", lambda key, suffix: True)
+    monkeypatch.setattr(report_cache, "lookup", lambda key, suffix: None)
+
+    response = client.get("/reports/download", params={"format": "json", "modo": modo})
+
+    if modo == "job":
+        assert response.status_code == 202
+        job = wait_render_job(client, response.json())
+
+        assert job["status"] == "concluido"
+        response = client.get(job["url"])
+
+    assert response.status_code == 200
+    assert response.json()["vendas"]["numero_transacoes"] == ROWS
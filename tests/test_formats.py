@@ -0,0 +1,101 @@
+import gzip
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from hanami.services.formats import (
+    STREAM_FORMATS,
+    encode_frames,
+    iter_gzip,
+    negotiate_format,
+    sql_schema,
+)
+
+pa = pytest.importorskip("pyarrow")
+ipc = pytest.importorskip("pyarrow.ipc")
+pq = pytest.importorskip("pyarrow.parquet")
+
+SQL_TYPES = {"id": "INTEGER", "produto": "TEXT", "valor": "REAL"}
+
+
+def frames() -> list[pd.DataFrame]:
+    return [
+        pd.DataFrame({"id": [1, 2], "produto": ["Notebook", None], "valor": [10.5, 3.0]}),
+        pd.DataFrame({"id": [3], "produto": ["Cadeira"], "valor": [None]}),
+        pd.DataFrame({"id": [4, 5], "produto": ["Mesa", "Ação"], "valor": [1.25, 7.0]}),
+    ]
+
+
+def decode(content: bytes, format: str) -> pd.DataFrame:
+    if format == "csv":
+        return pd.read_csv(io.BytesIO(content))
+    if format == "ndjson":
+        return pd.DataFrame([json.loads(line) for line in content.splitlines()])
+    if format == "arrow":
+        return ipc.open_stream(content).read_all().to_pandas()
+    return pq.read_table(io.BytesIO(content)).to_pandas()
+
+
+@pytest.mark.parametrize("format", STREAM_FORMATS)
+def test_blocks_are_encoded_as_one_document(format):
+    chunks = list(encode_frames(frames(), format, sql_schema(list(SQL_TYPES), SQL_TYPES)))
+
+    # Um pedaço por bloco, enviado assim que o bloco é serializado
+    assert len(chunks) >= len(frames())
+    pd.testing.assert_frame_equal(
+        decode(b"".join(chunks), format),
+        pd.concat(frames(), ignore_index=True),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("format", ["csv", "arrow", "parquet"])
+def test_empty_result_keeps_the_columns(format):
+    # Como o bloco vazio de iter_search
+    empty = pd.DataFrame.from_records([], columns=list(SQL_TYPES))
+    schema = sql_schema(list(SQL_TYPES), SQL_TYPES)
+
+    decoded = decode(b"".join(encode_frames([empty], format, schema)), format)
+
+    assert decoded.empty
+    assert list(decoded.columns) == list(SQL_TYPES)
+
+
+def test_schema_coerces_values_stored_with_another_type():
+    # O SQLite aceita texto em coluna REAL
+    frame = pd.DataFrame({"id": [1, 2], "produto": ["a", "b"], "valor": [1.5, "n/d"]})
+    schema = sql_schema(list(SQL_TYPES), SQL_TYPES)
+
+    decoded = decode(b"".join(encode_frames([frame], "arrow", schema)), "arrow")
+
+    assert decoded["valor"].iloc[0] == 1.5
+    assert pd.isna(decoded["valor"].iloc[1])
+
+
+def test_gzip_stream_decompresses_to_the_original():
+    chunks = list(encode_frames(frames(), "csv"))
+
+    assert gzip.decompress(b"".join(iter_gzip(chunks))) == b"".join(chunks)
+
+
+@pytest.mark.parametrize(
+    "format, accept, expected",
+    [
+        ("CSV", "application/x-ndjson", "csv"),
+        (None, "application/x-ndjson", "ndjson"),
+        (None, "text/csv;q=0.5, application/vnd.apache.parquet", "parquet"),
+        (None, "application/jsonl", "ndjson"),
+        (None, "text/html, */*", "json"),
+        (None, "text/csv;q=0", "json"),
+        (None, None, "json"),
+    ],
+)
+def test_negotiate_format(format, accept, expected):
+    assert negotiate_format(format, accept) == expected
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        negotiate_format("xml", None)
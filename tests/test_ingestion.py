@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from generate_sales import generate_sales
+
+from hanami.services.ingestion import iter_validated_chunks
+
+ROWS = 20_000
+
+# Grande o bastante para o leitor do pyarrow entregar vários blocos antes
+# de chegar ao valor inválido, perto do fim do arquivo
+INVALID_ROW = ROWS - 100
+
+
+def _write_csv(path, sales: pd.DataFrame, invalid_age: bool) -> None:
+    """
+    CSV com uma linha em branco logo após o cabeçalho e um campo entre
+    aspas com quebra de linha; com `invalid_age`, uma idade que não é
+    número obriga a leitura tolerante.
+    """
+    sales = sales.astype({"idade_cliente": object})
+    sales.loc[1, "cidade_cliente"] = "São Paulo\nCapital"
+    if invalid_age:
+        sales.loc[INVALID_ROW, "idade_cliente"] = "n/d"
+
+    header, *lines = sales.to_csv(index=False, float_format="%.2f").split("\n", 1)
+    path.write_text(header + "\n\n" + lines[0], encoding="utf-8")
+
+
+@pytest.mark.parametrize("invalid_age", [False, True])
+def test_chunked_csv_reads_each_record_once(tmp_path, invalid_age):
+    sales = next(generate_sales(ROWS, seed=3))
+    path = tmp_path / "vendas.csv"
+    _write_csv(path, sales, invalid_age)
+
+    df = pd.concat(iter_validated_chunks(path, chunk_size=1_000), ignore_index=True)
+
+    assert len(df) == ROWS
+    assert df["id_transacao"].tolist() == sales["id_transacao"].tolist()
+    assert df.loc[1, "cidade_cliente"] == "São Paulo\nCapital"
+    if invalid_age:
+        assert pd.isna(df.loc[INVALID_ROW, "idade_cliente"])
+        assert df["idade_cliente"].notna().sum() == ROWS - 1
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from hanami.core.storage import ArtifactCache
+from hanami.services.jobs import JOB_DONE, JOB_ERROR
+from hanami.services.rendering import RenderService
+
+
+class BrokenPool:
+    """
+    Pool que recusa qualquer tarefa, como depois da morte de um worker.
+    """
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("pool encerrado")
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+class ManualPool:
+    """
+    Pool que só conclui as renderizações quando o teste mandar.
+    """
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, renderer, path, report):
+        rendering = Future()
+        self.tasks.append((renderer, path, report, rendering))
+        return rendering
+
+    def run_all(self) -> None:
+        for renderer, path, report, rendering in self.tasks:
+            renderer(path, report)
+            rendering.set_result(None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+@pytest.fixture
+def service(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=1024 * 1024, max_age_seconds=3600)
+    return RenderService(cache, max_workers=1)
+
+
+def test_failed_submit_creates_no_job(service):
+    service._pool = BrokenPool()
+
+    with pytest.raises(BrokenProcessPool):
+        service.submit_job("chave", "json", {"regional": []})
+
+    assert not service.jobs._jobs
+    # Um novo pedido da mesma chave tenta renderizar de novo, em vez de
+    # receber um Future que nunca será resolvido
+    assert "chave" not in service._in_flight
+
+
+def test_cached_artifact_finishes_job_immediately(service):
+    tmp_path = service.cache.temp_path("chave")
+    tmp_path.write_text("{}", encoding="utf-8")
+    path = service.cache.publish("chave", ".json", tmp_path)
+
+    job = service.submit_job("chave", "json", None)
+
+    assert job["status"] == JOB_DONE
+    assert job["arquivo"] == str(path)
+
+
+def test_jobs_for_the_same_key_share_one_render(service):
+    pool = service._pool = ManualPool()
+
+    first = service.submit_job("chave", "json", {"vendas": {"total": 1}})
+    second = service.submit_job("chave", "json", {"vendas": {"total": 1}})
+
+    assert len(pool.tasks) == 1
+    assert service.get_job(first["job_id"])["arquivo"] is None
+
+    pool.run_all()
+
+    done = [service.get_job(job["job_id"]) for job in (first, second)]
+    assert [job["status"] for job in done] == [JOB_DONE, JOB_DONE]
+    assert done[0]["arquivo"] == done[1]["arquivo"]
+    assert service.cache.lookup("chave", ".json") is not None
+    assert "chave" not in service._in_flight
+
+
+def test_failed_render_marks_job_as_error(service):
+    pool = service._pool = ManualPool()
+
+    job = service.submit_job("chave", "json", {"vendas": {"total": 1}})
+    pool.tasks[0][3].set_exception(RuntimeError("worker caiu"))
+
+    assert service.get_job(job["job_id"])["status"] == JOB_ERROR
+    assert service.cache.lookup("chave", ".json") is None
+    assert "chave" not in service._in_flight
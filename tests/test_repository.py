@@ -0,0 +1,397 @@
+import dataclasses
+
+import pandas as pd
+import pytest
+from generate_sales import generate_sales
+from sqlalchemy import text
+
+from hanami.db import repository
+from hanami.db.repository import DuplicateFileError, IncomingFile, SalesRepository
+from hanami.db.rollups import ROLLUP_DIMENSIONS, ROLLUP_TABLE
+from hanami.db.schema import (
+    MIGRATIONS,
+    SALES_COLUMNS,
+    TRANSACTION_INDEX,
+    _migration_unique_transactions,
+    index_new_sales,
+)
+from hanami.services.reports import build_report
+from hanami.services.search import decode_cursor, encode_cursor
+
+
+def sales_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """
+    Vendas fictícias válidas, com id_transacao TRX0000000001, TRX0000000002...
+    """
+    return next(generate_sales(rows, seed))
+
+
+def _scalar(engine, sql: str):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar_one()
+
+
+def _rollup(engine) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql_query(
+            text(
+                "SELECT dimensao, valor, dia, receita_total, unidades_vendidas, "
+                "custo_total, lucro_total, numero_transacoes "
+                f"FROM {ROLLUP_TABLE} ORDER BY dimensao, valor, dia"
+            ),
+            conn,
+        )
+
+
+def _grouped_sales(engine) -> pd.DataFrame:
+    """
+    O rollup esperado, calculado com GROUP BY diretamente sobre `sales`.
+    """
+    queries = [
+        f"SELECT '{dimension}' AS dimensao, "
+        + ("''" if dimension == "total" else f"COALESCE(CAST({dimension} AS TEXT), '')")
+        + " AS valor, substr(data_venda, 1, 10) AS dia, "
+        "SUM(valor_final) AS receita_total, SUM(quantidade) AS unidades_vendidas, "
+        "SUM(custo_produto) AS custo_total, SUM(margem_lucro) AS lucro_total, "
+        "COUNT(*) AS numero_transacoes FROM sales GROUP BY 2, 3"
+        for dimension in ROLLUP_DIMENSIONS
+    ]
+
+    with engine.connect() as conn:
+        return pd.read_sql_query(
+            text(" UNION ALL ".join(queries) + " ORDER BY dimensao, valor, dia"),
+            conn,
+        )
+
+
+def assert_rollup_matches_sales(engine) -> None:
+    pd.testing.assert_frame_equal(
+        _rollup(engine), _grouped_sales(engine), check_dtype=False, atol=1e-6
+    )
+
+
+def test_reupload_of_same_file_is_a_noop(repo, engine):
+    df = sales_frame(200)
+
+    assert repo.save_chunks([df], file_hash="abc", filename="vendas.csv") == 200
+    version = repo.dataset_version()
+    rollup = _rollup(engine)
+
+    with pytest.raises(DuplicateFileError):
+        repo.save_chunks([df], file_hash="abc", filename="vendas.csv")
+
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 200
+    assert _scalar(engine, "SELECT COUNT(*) FROM ingested_files") == 1
+    assert repo.dataset_version() == version
+    pd.testing.assert_frame_equal(_rollup(engine), rollup)
+
+
+def test_repeated_ids_in_file_are_inserted_once(repo, engine):
+    df = sales_frame(100)
+    repeated = pd.concat([df, df.iloc[:30]], ignore_index=True)
+
+    assert repo.save_dataframe(repeated) == 100
+    assert _scalar(engine, "SELECT COUNT(DISTINCT id_transacao) FROM sales") == 100
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 100
+    assert_rollup_matches_sales(engine)
+
+
+def test_repeated_ids_across_chunks_are_inserted_once(repo, engine, monkeypatch):
+    # Cada bloco é gravado separadamente, então as repetições do segundo
+    # bloco só são encontradas no banco
+    monkeypatch.setattr(repository, "WRITE_BLOCK_ROWS", 50)
+    df = sales_frame(150)
+
+    inserted = repo.save_chunks([df.iloc[:100], df.iloc[50:150]])
+
+    assert inserted == 150
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 150
+    assert_rollup_matches_sales(engine)
+
+
+def test_overlapping_upload_inserts_only_new_ids(repo, engine):
+    df = sales_frame(300)
+    repo.save_dataframe(df.iloc[:200])
+
+    assert repo.save_dataframe(df.iloc[100:]) == 100
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 300
+    assert_rollup_matches_sales(engine)
+
+
+def test_ignore_mode_keeps_stored_values(repo, engine):
+    df = sales_frame(50)
+    repo.save_dataframe(df)
+
+    changed = df.copy()
+    changed["valor_final"] = changed["valor_final"] + 1000
+    repo.save_dataframe(changed)
+
+    assert _scalar(engine, "SELECT SUM(valor_final) FROM sales") == pytest.approx(
+        df["valor_final"].sum()
+    )
+    assert_rollup_matches_sales(engine)
+
+
+def test_replace_mode_keeps_rollup_equal_to_sales(repo, engine):
+    df = sales_frame(400)
+    repo.save_dataframe(df.iloc[:300])
+
+    # Vendas já gravadas mudam de valor, dia e canal; outras são novas
+    changed = df.iloc[200:].copy()
+    changed["valor_final"] = changed["valor_final"] * 2
+    changed["data_venda"] = "2024-02-29"
+    changed["canal_venda"] = "Telefone"
+
+    assert repo.save_dataframe(changed, on_duplicate="replace") == 100
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 400
+    assert _scalar(
+        engine, "SELECT COUNT(*) FROM sales WHERE data_venda = '2024-02-29'"
+    ) == 200
+    assert_rollup_matches_sales(engine)
+    assert _scalar(
+        engine, f"SELECT COUNT(*) FROM {ROLLUP_TABLE} WHERE numero_transacoes <= 0"
+    ) == 0
+
+
+def test_replace_mode_keeps_last_repetition_in_file(repo, engine):
+    df = sales_frame(20)
+    last = df.iloc[:5].copy()
+    last["quantidade"] = 99
+
+    assert repo.save_dataframe(pd.concat([df, last]), on_duplicate="replace") == 20
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales WHERE quantidade = 99") == 5
+    assert_rollup_matches_sales(engine)
+
+
+def test_invalid_duplicate_mode_is_rejected(repo):
+    with pytest.raises(ValueError):
+        repo.save_dataframe(sales_frame(5), on_duplicate="merge")
+
+
+def test_batch_counts_are_exact_per_file(repo, engine, monkeypatch):
+    monkeypatch.setattr(repository, "WRITE_BLOCK_ROWS", 64)
+    df = sales_frame(500)
+    repo.save_chunks([df.iloc[:100]], file_hash="antigo")
+
+    files = [
+        # 50 já gravadas e 100 novas, em dois blocos
+        IncomingFile([df.iloc[50:120], df.iloc[120:200]], "a", "a.csv"),
+        # 50 repetidas do arquivo anterior e 150 novas
+        IncomingFile([df.iloc[150:350]], "b", "b.csv"),
+        # Mesmo conteúdo de um arquivo já ingerido
+        IncomingFile([df.iloc[:100]], "antigo", "antigo.csv"),
+        # Repetido no próprio lote
+        IncomingFile([df.iloc[400:]], "a", "a_copia.csv"),
+        # Só vendas novas, com uma repetição interna
+        IncomingFile([df.iloc[350:400], df.iloc[390:400]], "c", "c.csv"),
+    ]
+
+    assert repo.save_files(files) == [100, 150, None, None, 50]
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 400
+
+    with engine.connect() as conn:
+        recorded = dict(
+            conn.execute(
+                text("SELECT sha256, linhas_inseridas FROM ingested_files")
+            ).all()
+        )
+
+    assert recorded == {"antigo": 100, "a": 100, "b": 150, "c": 50}
+    assert_rollup_matches_sales(engine)
+
+
+def test_failed_batch_writes_nothing(repo, engine):
+    df = sales_frame(100)
+
+    def failing_chunks():
+        yield df.iloc[:50]
+        raise ValueError("falha de validação")
+
+    with pytest.raises(ValueError):
+        repo.save_files([
+            IncomingFile([df.iloc[50:]], "ok"),
+            IncomingFile(failing_chunks(), "falha"),
+        ])
+
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 0
+    assert _scalar(engine, "SELECT COUNT(*) FROM ingested_files") == 0
+
+
+def test_migration_removes_duplicate_transactions(engine):
+    # Banco criado antes do índice único de id_transacao
+    unique_migration = MIGRATIONS.index(_migration_unique_transactions)
+    df = sales_frame(60)
+    duplicated = pd.concat([df, df.iloc[:20].assign(valor_final=1.0)], ignore_index=True)
+    columns = list(SALES_COLUMNS)
+
+    with engine.connect() as conn:
+        with conn.begin():
+            for migration in MIGRATIONS[:unique_migration]:
+                migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {unique_migration}")
+            conn.exec_driver_sql(
+                f"INSERT INTO sales ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                list(duplicated[columns].astype(object).itertuples(index=False, name=None)),
+            )
+            index_new_sales(conn, after_id=0)
+
+    repo = SalesRepository(engine)
+
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales") == 60
+    # A primeira venda inserida de cada id é a que fica
+    assert _scalar(engine, "SELECT COUNT(*) FROM sales WHERE valor_final = 1.0") == 0
+    assert _scalar(
+        engine,
+        f"SELECT COUNT(*) FROM sqlite_master WHERE name = '{TRANSACTION_INDEX}'",
+    ) == 1
+    assert _scalar(engine, "PRAGMA user_version") == len(MIGRATIONS)
+    # Um único incremento, feito pela regeneração do rollup
+    assert repo.dataset_version() == 1
+    assert_rollup_matches_sales(engine)
+    assert repo.save_dataframe(df) == 0
+
+
+def test_rebuild_rollups_bumps_dataset_version(repo, engine):
+    repo.save_dataframe(sales_frame(80))
+    version = repo.dataset_version()
+
+    # Correção manual em `sales`, que o rollup incremental não vê
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sales SET valor_final = valor_final * 2 WHERE id <= 10"))
+
+    assert repo.rebuild_rollups() == version + 1
+    assert repo.dataset_version() == version + 1
+    assert _scalar(engine, "SELECT version FROM dataset_version") == version + 1
+    assert_rollup_matches_sales(engine)
+
+
+def test_snapshot_is_written_on_first_read_not_on_upload(repo, engine, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(
+        repository, "settings", dataclasses.replace(repository.settings, columnar_snapshot=True)
+    )
+    df = sales_frame(30)
+    repo.save_dataframe(df)
+
+    path = repository.snapshot_path(engine, repo.dataset_version())
+    assert not path.exists()
+
+    fetched = repo.fetch_dataframe(["id_transacao"])
+
+    assert path.exists()
+    assert fetched["id_transacao"].tolist() == df["id_transacao"].tolist()
+
+
+def _page_through(repo, filters: dict, limit: int, between_pages=None) -> list[int]:
+    seen = []
+    after = None
+
+    while True:
+        rows = repo.search(filters, limit=limit, after=after)
+        seen.extend(row["id"] for row in rows)
+
+        if len(rows) < limit:
+            return seen
+
+        after = decode_cursor(encode_cursor(rows[-1]["data_venda"], rows[-1]["id"]))
+        if between_pages is not None:
+            between_pages()
+
+
+def _search_order(engine, where: str = "1=1") -> list[int]:
+    with engine.connect() as conn:
+        return list(
+            conn.execute(
+                text(f"SELECT id FROM sales WHERE {where} ORDER BY data_venda DESC, id DESC")
+            ).scalars()
+        )
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50])
+def test_cursor_pages_cover_ties_and_sales_without_date(repo, engine, limit):
+    df = sales_frame(120)
+    # Poucas datas distintas: páginas terminam no meio de um mesmo dia
+    df["data_venda"] = [["2024-03-01", "2024-03-02", None][i % 3] for i in range(len(df))]
+    repo.save_dataframe(df)
+
+    assert _page_through(repo, {}, limit) == _search_order(engine)
+    assert _page_through(repo, {"estado": "SP"}, limit) == _search_order(
+        engine, "estado_cliente = 'SP'"
+    )
+
+
+def test_cursor_is_stable_while_sales_are_inserted(repo, engine):
+    df = sales_frame(300)
+    repo.save_dataframe(df.iloc[:200])
+    before = _search_order(engine)
+    later = iter([df.iloc[200:250], df.iloc[250:]])
+
+    def insert_more():
+        chunk = next(later, None)
+        if chunk is not None:
+            repo.save_dataframe(chunk)
+
+    seen = _page_through(repo, {}, 40, between_pages=insert_more)
+
+    # Vendas inseridas durante a paginação podem aparecer nas páginas
+    # seguintes, mas nenhuma venda já existente é repetida ou pulada
+    assert [row_id for row_id in seen if row_id in set(before)] == before
+    assert len(seen) == len(set(seen))
+
+
+@pytest.mark.parametrize("cursor", ["", "nao-e-base64!", "WzFd", "WyIyMDI0IiwiMSJd"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_unreadable_snapshot_falls_back_to_sqlite(repo, engine, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(
+        repository, "settings", dataclasses.replace(repository.settings, columnar_snapshot=True)
+    )
+    df = sales_frame(30)
+    repo.save_dataframe(df)
+    repo.refresh_snapshot()
+
+    # Como um snapshot truncado por uma gravação concorrente
+    path = repository.snapshot_path(engine, repo.dataset_version())
+    path.write_bytes(b"ARROW1")
+
+    fetched = repo.fetch_dataframe(["id_transacao", "valor_final"])
+
+    assert fetched["id_transacao"].tolist() == df["id_transacao"].tolist()
+    assert fetched["valor_final"].sum() == pytest.approx(df["valor_final"].sum())
+
+
+def test_financial_summary_without_cost_data(repo):
+    repo.save_dataframe(sales_frame(40).drop(columns=["custo_produto"]))
+
+    summary = repo.financial_summary()
+
+    assert summary["custo_total"] is None
+    assert summary["lucro_bruto"] is None
+    assert summary["receita_liquida"] > 0
+
+
+def test_dashboard_financial_section_without_cost_data(repo):
+    repo.save_dataframe(sales_frame(40).drop(columns=["custo_produto"]))
+
+    report = build_report(repo, sections=["financeiro"])
+
+    assert report["financeiro"] == repo.financial_summary()
+    assert report["financeiro"]["lucro_bruto"] is None
+
+
+def test_financial_summary_with_cost_data(repo):
+    df = sales_frame(40)
+    repo.save_dataframe(df)
+
+    summary = repo.financial_summary()
+
+    assert summary["custo_total"] == pytest.approx(df["custo_produto"].sum())
+    assert summary["lucro_bruto"] == pytest.approx(
+        df["valor_final"].sum() - df["custo_produto"].sum()
+    )
+    assert build_report(repo, sections=["financeiro"])["financeiro"] == summary
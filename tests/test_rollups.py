@@ -0,0 +1,131 @@
+import pandas as pd
+from generate_sales import generate_sales
+from sqlalchemy import text
+
+from hanami.db.rollups import (
+    ROLLUP_MEASURES,
+    ROLLUP_TABLE,
+    apply_rollup_deltas,
+    compute_rollup_deltas,
+    update_rollups,
+)
+from hanami.db.schema import SALES_COLUMNS
+
+COLUMNS = ["dimensao", "valor", "dia", *ROLLUP_MEASURES, "numero_transacoes"]
+
+
+def sales_frame(rows: int, seed: int = 11) -> pd.DataFrame:
+    """
+    Vendas com lacunas: sem data, sem região e sem custo em algumas linhas.
+    """
+    df = next(generate_sales(rows, seed))
+    df.loc[df.index[::7], "data_venda"] = None
+    df.loc[df.index[::5], "regiao"] = None
+    df.loc[df.index[::3], "custo_produto"] = None
+    return df
+
+
+def _insert_sales(engine, df: pd.DataFrame) -> None:
+    # Direto em `sales`, sem passar pela manutenção do rollup
+    columns = list(SALES_COLUMNS)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"INSERT INTO sales ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            list(
+                df[columns]
+                .astype(object)
+                .where(df[columns].notna(), None)
+                .itertuples(index=False, name=None)
+            ),
+        )
+
+
+def _rollup(engine) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql_query(
+            text(
+                f"SELECT {', '.join(COLUMNS)} FROM {ROLLUP_TABLE} "
+                "ORDER BY dimensao, valor, dia"
+            ),
+            conn,
+        )
+
+
+def _clear_rollup(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE}"))
+
+
+def test_deltas_match_rollup_computed_in_sql(repo, engine):
+    df = sales_frame(300)
+    _insert_sales(engine, df)
+
+    with engine.begin() as conn:
+        update_rollups(conn, after_rowid=0)
+    expected = _rollup(engine)
+
+    _clear_rollup(engine)
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df))
+
+    pd.testing.assert_frame_equal(_rollup(engine), expected, check_dtype=False, atol=1e-6)
+    # Vendas sem data ou sem região ficam no grupo ""
+    assert (expected["dia"] == "").any()
+    assert ((expected["dimensao"] == "regiao") & (expected["valor"] == "")).any()
+
+
+def test_deltas_accept_dates_already_parsed():
+    df = sales_frame(100)
+    parsed = df.assign(data_venda=pd.to_datetime(df["data_venda"]))
+
+    pd.testing.assert_frame_equal(
+        compute_rollup_deltas(parsed), compute_rollup_deltas(df), check_dtype=False
+    )
+
+
+def test_deltas_of_separate_blocks_add_up(repo, engine):
+    df = sales_frame(200)
+
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df))
+    expected = _rollup(engine)
+
+    _clear_rollup(engine)
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df.iloc[:120]))
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df.iloc[120:]))
+
+    pd.testing.assert_frame_equal(_rollup(engine), expected, check_dtype=False, atol=1e-6)
+
+
+def test_negated_deltas_remove_emptied_groups(repo, engine):
+    df = sales_frame(150)
+    removed = df.iloc[:40]
+    measures = [*ROLLUP_MEASURES, "numero_transacoes"]
+
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df))
+    groups = len(_rollup(engine))
+
+    negated = compute_rollup_deltas(removed)
+    negated[measures] = -negated[measures]
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, negated)
+
+    remaining = _rollup(engine)
+    _clear_rollup(engine)
+    with engine.begin() as conn:
+        apply_rollup_deltas(conn, compute_rollup_deltas(df.iloc[40:]))
+
+    assert len(remaining) < groups
+    assert (remaining["numero_transacoes"] > 0).all()
+    pd.testing.assert_frame_equal(remaining, _rollup(engine), check_dtype=False, atol=1e-6)
+
+
+def test_empty_block_has_no_deltas():
+    deltas = compute_rollup_deltas(sales_frame(10).iloc[:0])
+
+    assert deltas.empty
+    assert list(deltas.columns) == COLUMNS